@@ -6,6 +6,7 @@ Created on Wed Nov 25 19:34:56 2015
 """
 
 from .classes import fdp
+from .classes.local import open_local
 
 def nstxu():
     return fdp.Fdp().nstxu
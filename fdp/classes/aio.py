@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+aio.py - asyncio interface to the logbook and MDSplus events
+
+**Classes**
+
+* AsyncLogbook - logbook queries as awaitable futures
+* EventWaiter - MDSplus event waits in a bounded pool of threads
+* ShotWatcher - asynchronous iterator over new shots
+
+The blocking drivers (pymssql and MDSplus) run in executor threads, so an
+event loop can query the logbook and follow new shots without blocking.
+Logbook queries run in one thread, since the logbook connection is not
+thread safe, and each event thread has its own MDSplus event connection.
+Requires Python 3.5 or later; methods return futures, so this module has
+no async syntax and still imports with Python 2.
+
+**Usage**::
+
+    >>> entries = await nstxu.alogbook.get_entries(shot=204620)
+    >>> shot, data = await nstxu.await_event('myevent', timeout=60)
+    >>> async for shot in nstxu.watch_shots():
+    ...     shot.bes.load()
+
+Created on Mon Oct 19 00:10:37 2026
+
+@author: ktritz
+"""
+import functools
+import threading
+from concurrent import futures
+import MDSplus as mds
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+from .fdp_globals import FdpError, FdpTimeout, VERBOSE
+from .datasources import EVENT_SERVERS, SHOT_EVENTS
+
+# threads waiting for MDSplus events
+EVENT_WORKERS = 4
+
+# event wait timeout (s) between checks for a closed ShotWatcher
+WATCH_INTERVAL = 10
+
+
+def _check_asyncio():
+    if asyncio is None:
+        raise FdpError('The asyncio interface requires Python 3.5 or later')
+
+
+def _run(executor, func, *args, **kwargs):
+    # asyncio future for func(*args, **kwargs) in executor
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(executor,
+                                functools.partial(func, *args, **kwargs))
+
+
+class AsyncLogbook(object):
+    """
+    Logbook with queries returning asyncio futures
+
+    **Usage**::
+
+        >>> entries = await nstxu.alogbook.get_entries(shot=204620)
+        >>> shots = await nstxu.alogbook.get_shotlist(xp=1032)
+
+    """
+
+    def __init__(self, logbook):
+        _check_asyncio()
+        self._logbook = logbook
+        self._executor = futures.ThreadPoolExecutor(max_workers=1)
+
+    def get_entries(self, shot=None, date=None, xp=None):
+        return _run(self._executor, self._logbook.get_entries, shot=shot,
+                    date=date, xp=xp)
+
+    def get_shotlist(self, date=None, xp=None, verbose=False):
+        return _run(self._executor, self._logbook.get_shotlist, date=date,
+                    xp=xp, verbose=verbose)
+
+    def sync(self, full=False):
+        return _run(self._executor, self._logbook.sync, full=full)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class EventWaiter(object):
+    """
+    Wait for MDSplus events in a bounded pool of threads
+
+    Each thread opens its own connection to the event server.  Waits
+    beyond the number of workers are queued.
+    """
+
+    def __init__(self, machine, workers=EVENT_WORKERS):
+        _check_asyncio()
+        self._machine = machine
+        self.workers = workers
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self._local = threading.local()
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = mds.Connection(EVENT_SERVERS[self._machine._name])
+            self._local.connection = connection
+        return connection
+
+    def _wait(self, event, timeout=0):
+        return self._machine._wfevent(self._get_connection(), event, timeout)
+
+    def _next_shot(self, event, watcher):
+        # block until event, return the shot number or None when closed
+        while not watcher.closed:
+            try:
+                return self._machine._wait_shot(self._get_connection(),
+                                                event, WATCH_INTERVAL)
+            except FdpTimeout:
+                continue
+        return None
+
+    def wait(self, event, timeout=0):
+        """
+        Return a future for the event data, see Machine.wfevent()
+        """
+        return _run(self._executor, self._wait, event, timeout)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class ShotWatcher(object):
+    """
+    Asynchronous iterator over Shot objects of new shots
+
+    Each shot-complete event yields the shot for the event, from the shot
+    number in the event data or current_shot() on the event server.
+    Iteration stops after count shots or when the watcher is closed;
+    a closed watcher finishes within WATCH_INTERVAL seconds.
+    """
+
+    def __init__(self, machine, waiter, event=None, count=None):
+        _check_asyncio()
+        if event is None:
+            if machine._name not in SHOT_EVENTS:
+                raise FdpError('No shot event for {}'.format(
+                    machine._name.upper()))
+            event = SHOT_EVENTS[machine._name]
+        self._machine = machine
+        self._waiter = waiter
+        self.event = event
+        self.count = count
+        self.shots = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self.closed or (self.count is not None and
+                           self.shots >= self.count):
+            raise StopAsyncIteration
+        loop = asyncio.get_event_loop()
+        shotfuture = loop.create_future()
+        waitfuture = _run(self._waiter._executor, self._waiter._next_shot,
+                          self.event, self)
+
+        def done(future):
+            if shotfuture.done():
+                return
+            if future.cancelled():
+                shotfuture.cancel()
+            elif future.exception() is not None:
+                shotfuture.set_exception(future.exception())
+            elif future.result() is None:
+                shotfuture.set_exception(StopAsyncIteration())
+            else:
+                self.shots += 1
+                shot = getattr(self._machine, 's{}'.format(future.result()))
+                if VERBOSE: print('ShotWatcher: shot {}'.format(shot.shot))
+                shotfuture.set_result(shot)
+
+        waitfuture.add_done_callback(done)
+        return shotfuture
+
+    def close(self):
+        'Stop iteration after the current wait'
+        self.closed = True
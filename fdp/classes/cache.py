@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py - persistent on-disk cache for MDSplus signal data
+
+**Classes**
+
+* SignalCache - content-addressed, size-capped cache of signal arrays
+
+Created on Sun Oct 18 09:12:40 2026
+
+@author: ktritz
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from .fdp_globals import CACHE_DIR, CACHE_SIZE, VERBOSE
+
+
+class SignalCache(object):
+    """
+    Content-addressed cache of MDSplus signal arrays.
+
+    Arrays are keyed on (machine, shot, tree, node, dim_of, raw_of,
+    transpose) and stored as .npy files named by the SHA-1 digest of the
+    key.  Cached arrays are returned as copy-on-write memory maps, so only
+    the pages that are touched are read from disk.  When the total size
+    exceeds ``size`` bytes, the least-recently-used arrays are evicted.
+
+    **Usage**::
+
+        >>> nstxu._cache.stats()
+        {'hits': 64, 'misses': 2, 'evictions': 0, 'files': 66, 'bytes': ...}
+        >>> nstxu._cache.clear()
+
+    """
+
+    def __init__(self, name, directory=None, size=None):
+        self._name = name
+        if directory is None:
+            directory = CACHE_DIR
+        if size is None:
+            size = CACHE_SIZE
+        self.directory = os.path.join(directory, name)
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # LRU index of cached files, oldest first: {filename: nbytes}
+        self._index = None
+        self._nbytes = 0
+        # guards the index for parallel loader threads
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return '<signal cache {} ({} files, {:.1f} MB)>'.format(
+            self.directory, len(self._get_index()), self._nbytes / 1024.**2)
+
+    def _get_index(self):
+        if self._index is None:
+            if not os.path.isdir(self.directory):
+                try:
+                    os.makedirs(self.directory)
+                except OSError:
+                    pass
+            files = []
+            try:
+                for filename in os.listdir(self.directory):
+                    if not filename.endswith('.npy'):
+                        continue
+                    path = os.path.join(self.directory, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, filename, stat.st_size))
+            except OSError:
+                pass
+            files.sort()
+            self._index = OrderedDict([(filename, nbytes) for _, filename,
+                                       nbytes in files])
+            self._nbytes = sum(self._index.values())
+        return self._index
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def key(self, signal, window=None):
+        """
+        Return the content-address (hex digest) for a signal.
+
+        window is an optional (start, stop, step) index window.
+        """
+        key = (self._name,
+               int(signal.shot),
+               str(signal._mdstree).lower(),
+               signal._mdsnode,
+               getattr(signal, '_dim_of', None),
+               getattr(signal, '_raw_of', None),
+               signal._transpose)
+        if window is not None:
+            key = key + (tuple(window),)
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Return cached array for key as a memory map, or None if not cached.
+        """
+        with self._lock:
+            index = self._get_index()
+            filename = key + '.npy'
+            if filename not in index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                data = np.load(path, mmap_mode='c')
+                os.utime(path, None)
+            except (IOError, OSError, ValueError):
+                # evicted by another process or truncated file
+                self._nbytes -= index.pop(filename)
+                self.misses += 1
+                return None
+            # move to most-recently-used position
+            index[filename] = index.pop(filename)
+            self.hits += 1
+        if VERBOSE: print('SignalCache.get: hit {}'.format(key))
+        return data
+
+    def put(self, key, data):
+        """
+        Store array in the cache, then evict old arrays above the size cap.
+        """
+        data = np.asanyarray(data)
+        if data.dtype.hasobject or data.nbytes > self.size:
+            return
+        with self._lock:
+            index = self._get_index()
+        filename = key + '.npy'
+        try:
+            # write to a temporary file and rename for atomic updates
+            fd, tmppath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fileobj:
+                np.save(fileobj, np.asarray(data))
+            os.rename(tmppath, self._path(key))
+            nbytes = os.path.getsize(self._path(key))
+        except (IOError, OSError):
+            return
+        with self._lock:
+            if filename in index:
+                self._nbytes -= index.pop(filename)
+            index[filename] = nbytes
+            self._nbytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        index = self._get_index()
+        while self._nbytes > self.size and index:
+            filename, nbytes = index.popitem(last=False)
+            self._nbytes -= nbytes
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Return dictionary of cache statistics.
+        """
+        with self._lock:
+            index = self._get_index()
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'files': len(index),
+                    'bytes': self._nbytes}
+
+    def clear(self):
+        """
+        Remove all cached arrays.
+        """
+        with self._lock:
+            index = self._get_index()
+            for filename in list(index.keys()):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+            index.clear()
+            self._nbytes = 0
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+connectionpool.py - pool of MDSplus server connections
+
+**Classes**
+
+* ConnectionPool - MDS connections scheduled by (tree, shot) affinity
+
+Created on Sun Oct 18 12:20:48 2026
+
+@author: ktritz
+"""
+import threading
+from contextlib import contextmanager
+import MDSplus as mds
+from .fdp_globals import FdpError, MDS_POOL_SIZE, VERBOSE
+
+
+class ConnectionPool(object):
+    """
+    Pool of MDSplus connections with least-recently-used tree scheduling
+
+    Each connection keeps one (tree, shot) open and is used by one thread
+    at a time: connection() checks it out of the pool until the with
+    block ends.  A request for an open (tree, shot) reuses an idle
+    connection on it; otherwise a new connection is opened up to
+    ``size``, after which the least-recently-used idle connection is
+    closed and reopened on the requested tree.  When all connections are
+    checked out, requests wait.  Dead connections are replaced by
+    ``reconnect()``.
+
+    **Usage**::
+
+        >>> with pool.connection('activesp_raw', 204620) as connection:
+        ...     data = connection.get(node)
+        >>> pool.stats()
+        {'connections': 4, 'tree_opens': 12, 'hits': 230, ...}
+
+    """
+
+    def __init__(self, server, size=None):
+        self.server = server
+        self.size = size or MDS_POOL_SIZE
+        self.tree_opens = 0
+        self.hits = 0
+        self.evictions = 0
+        self.reconnects = 0
+        # connections ordered most-recently-used first
+        self._connections = []
+        # checked-out connections, and replacements of checked-out
+        # connections by reconnect()
+        self._busy = []
+        self._replaced = {}
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        # connect eagerly so configuration errors surface immediately
+        self._connections.append(self._connect())
+
+    def __repr__(self):
+        return '<connection pool {} ({}/{} connections)>'.format(
+            self.server, len(self._connections), self.size)
+
+    def __getitem__(self, index):
+        return self._connections[index]
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __iter__(self):
+        return iter(list(self._connections))
+
+    def _connect(self):
+        if VERBOSE: print('ConnectionPool: connecting to {}'.format(self.server))
+        try:
+            connection = mds.Connection(self.server)
+        except:
+            raise FdpError('MDSplus connection to {} failed'.format(
+                self.server))
+        connection.tree = None
+        return connection
+
+    def _open(self, connection, tree, shot):
+        self.tree_opens += 1
+        try:
+            connection.openTree(tree, shot)
+            connection.tree = (tree, shot)
+        except:
+            connection.tree = (None, None)
+            return False
+        return True
+
+    def _checkout(self, tree, shot):
+        # idle connection with (tree, shot) open, or None if all are busy
+        idle = [connection for connection in self._connections
+                if connection not in self._busy]
+        for connection in idle:
+            if connection.tree == (tree, shot):
+                self._connections.remove(connection)
+                self._connections.insert(0, connection)
+                self._busy.append(connection)
+                self.hits += 1
+                return connection
+        if len(self._connections) < self.size:
+            connection = self._connect()
+        elif idle:
+            connection = idle[-1]
+            self._connections.remove(connection)
+            if connection.tree not in [None, (None, None)]:
+                self.evictions += 1
+            try:
+                connection.closeAllTrees()
+            except:
+                pass
+        else:
+            return None
+        self._connections.insert(0, connection)
+        self._busy.append(connection)
+        if not self._open(connection, tree, shot) and \
+                not self.is_alive(connection):
+            newconnection = self.reconnect(connection, tree=(tree, shot))
+            del self._replaced[connection]
+            connection = newconnection
+        return connection
+
+    def acquire(self, tree, shot):
+        """
+        Check out a connection with (tree, shot) open, see release()
+        """
+        with self._lock:
+            while True:
+                connection = self._checkout(tree, shot)
+                if connection is not None:
+                    return connection
+                self._idle.wait()
+
+    def release(self, connection):
+        """
+        Return a checked-out connection to the pool
+        """
+        with self._lock:
+            while connection in self._replaced:
+                connection = self._replaced.pop(connection)
+            if connection in self._busy:
+                self._busy.remove(connection)
+            if len(self._connections) > self.size and \
+                    connection in self._connections:
+                # pool shrunk by resize() while checked out
+                self._close(connection)
+            self._idle.notify()
+
+    @contextmanager
+    def connection(self, tree, shot):
+        """
+        Context manager for a checked-out connection with (tree, shot) open
+        """
+        connection = self.acquire(tree, shot)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def is_alive(self, connection):
+        """
+        Return True if the connection responds to a trivial expression
+        """
+        try:
+            connection.get('1')
+        except:
+            return False
+        return True
+
+    def reconnect(self, connection, tree=None):
+        """
+        Replace a dead connection and reopen its tree
+
+        A checked-out connection stays checked out as its replacement.
+        """
+        with self._lock:
+            if tree is None:
+                tree = connection.tree
+            newconnection = self._connect()
+            self.reconnects += 1
+            if connection in self._connections:
+                index = self._connections.index(connection)
+                self._connections[index] = newconnection
+            else:
+                self._connections.insert(0, newconnection)
+            if connection in self._busy:
+                self._busy.remove(connection)
+                self._busy.append(newconnection)
+                self._replaced[connection] = newconnection
+            if tree not in [None, (None, None)]:
+                self._open(newconnection, *tree)
+            return newconnection
+
+    def _close(self, connection):
+        self._connections.remove(connection)
+        try:
+            connection.closeAllTrees()
+        except:
+            pass
+
+    def resize(self, size):
+        """
+        Set the maximum number of connections
+
+        Checked-out connections are closed when they are released.
+        """
+        with self._lock:
+            self.size = size
+            idle = [connection for connection in self._connections
+                    if connection not in self._busy]
+            while len(self._connections) > size and idle:
+                self._close(idle.pop())
+            self._idle.notify_all()
+
+    def stats(self):
+        """
+        Return dictionary of pool counters
+        """
+        return {'connections': len(self._connections),
+                'busy': len(self._busy),
+                'tree_opens': self.tree_opens,
+                'hits': self.hits,
+                'evictions': self.evictions,
+                'reconnects': self.reconnects}
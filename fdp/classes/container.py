@@ -8,10 +8,10 @@ import os
 import inspect
 import types
 import numpy as np
-import xml.etree.ElementTree as ET
 
 from .fdp_globals import FDP_DIR, VERBOSE
 from . import parse
+from .moduletree import get_module_tree
 from .node import Node
 from .signal import Signal
 
@@ -66,6 +66,11 @@ class Container(object):
         for read_only in ['parent']:
             setattr(self, '_'+read_only, kwargs.get(read_only, None))
 
+        # container classes are shared between machines, so keep the
+        # root machine of this instance (e.g. MDSplus or local HDF5)
+        if self._parent is not None:
+            self._root = self._parent._root
+
         try:
             self.shot = kwargs['shot']
             self._mdstree = kwargs['mdstree']
@@ -92,7 +97,9 @@ class Container(object):
             else:
                 NodeClass = cls._classes[NodeClassName]
             # NodeClass._mdstree = parse_mdstree(self, node)
-            setattr(self, node.get('name'), NodeClass(node, parent=self))
+            NodeObj = NodeClass(node, parent=self)
+            NodeObj._root = self._root
+            setattr(self, node.get('name'), NodeObj)
 
         for element in module_tree.findall('defaults'):
             method_defaults, defaults_dict = parse.parse_defaults(element)
@@ -114,6 +121,7 @@ class Container(object):
                 else:
                     SignalClass = cls._classes[SignalClassName]
                 SignalObj = SignalClass(**signal_dict)
+                SignalObj._root = self._root
                 refs = parse.parse_refs(self, element, SignalObj._transpose)
                 if not refs:
                     refs = SignalObj.axes
@@ -153,6 +161,7 @@ class Container(object):
                 else:
                     SignalClass = cls._classes[SignalClassName]
                 SignalObj = SignalClass(**signal_dict)
+                SignalObj._root = self._root
                 refs = parse.parse_refs(self, element, SignalObj._transpose)
                 if not refs:
                     refs = SignalObj.axes
@@ -283,6 +292,46 @@ class Container(object):
         word_list.extend(self._tags)
         return np.any([string.lower() in word.lower() for word in word_list])
 
+    def _get_pending_signals(self):
+        # list empty signals and axes in container and sub-containers,
+        # including dynamic containers already created
+        if Signal in self.__class__.mro():
+            queue = [self]
+        else:
+            queue = list(self._signals.values())
+            containers = list(self._containers.values())
+            containers.extend(container for container in
+                              self._dynamic_containers.values()
+                              if container is not None)
+            for container in containers:
+                queue.extend(container._get_pending_signals())
+        signals = []
+        found = set()
+        while queue:
+            signal = queue.pop(0)
+            if id(signal) in found:
+                continue
+            found.add(id(signal))
+            for axis in getattr(signal, 'axes', None) or []:
+                queue.append(getattr(signal, axis))
+            if signal._empty is True:
+                signals.append(signal)
+        return signals
+
+    def load(self):
+        """
+        Load all signals and axes with batched MDSplus requests
+
+        Nodes are grouped by tree and fetched with one server request per
+        tree, so later indexing of the signals needs no network access.
+
+        **Usage**::
+
+            >>> nstxu.s204620.bes.load()
+
+        """
+        self._root._load_signals(self._get_pending_signals())
+
 
 def Factory(module_branch, root=None, shot=None, parent=None):
     global _tree_dict
@@ -298,12 +347,8 @@ def Factory(module_branch, root=None, shot=None, parent=None):
     module = module_list[-1]
     branch_str = ''.join([word.capitalize() for word in module_list])
     if module_branch not in _tree_dict:
-        module_path = os.path.join(FDP_DIR, 'modules', root._name,
-                                   *module_list)
-        parse_tree = ET.parse(os.path.join(module_path,
-                                           ''.join([module, '.xml'])))
-        module_tree = parse_tree.getroot()
-        _tree_dict[module_branch] = module_tree
+        _tree_dict[module_branch] = get_module_tree(root._name,
+                                                    module_branch)
     try:
         ContainerClassName = 'Container' + branch_str
         if ContainerClassName not in Container._classes:
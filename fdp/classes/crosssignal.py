@@ -6,12 +6,101 @@ Created on Fri Jul 15 16:39:37 2016
 """
 
 from __future__ import division
-from scipy.signal import firwin, filtfilt, fftconvolve, hilbert
-from scipy.signal.spectral import _spectral_helper
+from scipy.signal import hilbert, get_window
 import numpy as np
 from .fdp_globals import FdpError
+from .fft import segments, nextpow2
+from .filters import bandpass
 import time
 
+
+def spectral_segments(data, fs, window='hann', nperseg=256, detrend=False):
+    """
+    Transform overlapping segments of multi-channel data once.
+
+    data is a 2D array (channel, sample).  Segments overlap by 50% and are
+    windowed, optionally detrended ('constant'), and transformed with a
+    real fft, as in scipy.signal.csd.  Returns freqs (Hz), times (s, from
+    the start of data), spectra (segment, freq, channel), and the density
+    scale factor.  The density cross spectrum of channels i and j is
+    scale * conj(spectra[..., i]) * spectra[..., j], doubled for
+    frequencies other than DC and Nyquist (see onesided()).
+    """
+    data = np.asarray(data)
+    if isinstance(window, (str, tuple)):
+        win = get_window(window, nperseg)
+    else:
+        win = np.asarray(window)
+        nperseg = win.size
+    step = nperseg - nperseg // 2
+    # strided view (segment, sample, channel)
+    segs = segments(data.T, nperseg, step)
+    if detrend == 'constant':
+        segs = segs - segs.mean(axis=1)[:, np.newaxis, :]
+    elif detrend:
+        raise FdpError('Only constant detrending is supported')
+    spectra = np.fft.rfft(segs * win[:, np.newaxis], axis=1)
+    freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+    times = (nperseg / 2 + step * np.arange(segs.shape[0])) / fs
+    scale = 1 / (fs * np.sum(win * win))
+    return freqs, times, spectra, scale
+
+
+def correlate_segments(signal1, signal2, nperseg):
+    """
+    Segment-averaged correlations of the fluctuating parts of two signals.
+
+    Signals are split into non-overlapping segments of nperseg points and
+    the mean of each segment is removed.  All segments are transformed at
+    once, and the segment averages are formed in the frequency domain, so
+    a single inverse transform gives all four results.  Returns
+    crosscorrelation, autocorrelation1, autocorrelation2 and
+    correlation_coef, each of length 2*nperseg - 1 for time delays
+    -(nperseg - 1) to (nperseg - 1), with
+    crosscorrelation[k + nperseg - 1] = Sum_i[x[i] * y[i + k]].
+    """
+    nseg = min(len(signal1), len(signal2)) // nperseg
+    if nseg == 0:
+        raise FdpError('Signals are shorter than nperseg')
+    seg1 = np.asarray(signal1[:nseg*nperseg], dtype=float).reshape(
+        nseg, nperseg)
+    seg2 = np.asarray(signal2[:nseg*nperseg], dtype=float).reshape(
+        nseg, nperseg)
+    seg1 = seg1 - seg1.mean(axis=1)[:, np.newaxis]
+    seg2 = seg2 - seg2.mean(axis=1)[:, np.newaxis]
+
+    # zero padding to >= 2*nperseg - 1 avoids circular wrap-around
+    nfft = nextpow2(2 * nperseg)
+    spectrum1 = np.fft.rfft(seg1, n=nfft, axis=1)
+    spectrum2 = np.fft.rfft(seg2, n=nfft, axis=1)
+    cross = np.conj(spectrum1) * spectrum2
+    # zero-delay autocorrelations normalize each segment
+    norm = np.sqrt(np.sum(seg1 * seg1, axis=1) * np.sum(seg2 * seg2, axis=1))
+    products = np.array([
+        cross.mean(axis=0),
+        np.square(np.absolute(spectrum1)).mean(axis=0),
+        np.square(np.absolute(spectrum2)).mean(axis=0),
+        (cross / norm[:, np.newaxis]).mean(axis=0)])
+    correlations = np.fft.irfft(products, n=nfft, axis=1)
+    # reorder delays from -(nperseg - 1) to (nperseg - 1)
+    correlations = np.concatenate((correlations[:, nfft - nperseg + 1:],
+                                   correlations[:, :nperseg]), axis=1)
+    return tuple(correlations)
+
+
+def onesided(density, nperseg, axis=0):
+    """
+    Double density of one-sided spectrum in place, except DC and Nyquist
+    """
+    index = [slice(None)] * density.ndim
+    if nperseg % 2:
+        index[axis] = slice(1, None)
+    else:
+        index[axis] = slice(1, -1)
+    density[tuple(index)] *= 2
+    return density
+
+
 class CrossSignal(object):
     """
     CrossSignal class
@@ -201,18 +290,11 @@ class CrossSignal(object):
             if self.fmax < self.fmin:
                 raise FdpError('fmin is larger than fmax')
             
-            # Filter data using 501 tap FIR filter generated using window
-            # method (Hamming window)
-            desirednumtaps = 501
-            if self.numpnts <= desirednumtaps:
-                numtaps = 2 * (self.numpnts // 2) - 1
-            else:
-                numtaps = desirednumtaps
-            
-            h = firwin(numtaps, [self.fmin, self.fmax], pass_zero=False,
-                       nyq=self.fNyquist)
-            self.signal1 = filtfilt(h, 1.0, self.signal1, padlen=numtaps)
-            self.signal2 = filtfilt(h, 1.0, self.signal2, padlen=numtaps)
+            # Filter both signals in one batch using 501 tap FIR filter
+            # generated using window method (Hamming window)
+            self.signal1, self.signal2 = bandpass(
+                [self.signal1, self.signal2], self.fSample,
+                fmin=self.fmin, fmax=self.fmax, numtaps=501)
 
     def calc_csd(self):
         """
@@ -244,41 +326,23 @@ class CrossSignal(object):
         if self.forcepower2 is True:
             self.nperseg = np.power(2, int(np.log2(self.nperseg - 1)) + 1)
         
-        # Calculate cross spectral density
-        self.freqs, self.times, self.csd = _spectral_helper(
-                self.signal1,
-                self.signal2,
-                fs=self.fSample,
-                window=self.window,
-                nperseg=self.nperseg,
-                detrend=self.detrend,
-                scaling='density',
-                mode='psd'
-            )
-        
-        # Calculate auto spectral density of signal 1
-        _, _, self.asd1 = _spectral_helper(
-                self.signal1,
-                self.signal1,
-                fs=self.fSample,
-                window=self.window,
-                nperseg=self.nperseg,
-                detrend=self.detrend,
-                scaling='density',
-                mode='psd'
-            )
-        
-        # Calculate auto spectral density of signal 2
-        _, _, self.asd2 = _spectral_helper(
-                self.signal2,
-                self.signal2,
-                fs=self.fSample,
+        # Transform segments of both signals once, then form the cross and
+        # auto spectral densities (freq, time) from the same spectra
+        self.freqs, self.times, spectra, scale = spectral_segments(
+                np.array([self.signal1, self.signal2]),
+                self.fSample,
                 window=self.window,
                 nperseg=self.nperseg,
-                detrend=self.detrend,
-                scaling='density',
-                mode='psd'
+                detrend=self.detrend
             )
+        spectrum1 = spectra[..., 0].T
+        spectrum2 = spectra[..., 1].T
+        self.csd = onesided(scale * np.conj(spectrum1) * spectrum2,
+                            self.nperseg)
+        self.asd1 = onesided(scale * np.square(np.absolute(spectrum1)),
+                             self.nperseg)
+        self.asd2 = onesided(scale * np.square(np.absolute(spectrum2)),
+                             self.nperseg)
         
         # Calculate time bin averaged spectral densities
         self.csd_binavg = np.mean(self.csd, axis=-1)
@@ -381,59 +445,23 @@ class CrossSignal(object):
         denotes the Fourier transform. This calculation is equivalent to 
         R[k] = Sum_i[x[i] * y[i + k]]
         """
-        # Segment the signals with nperseg points in each segment
-        signal1_seg = []
-        signal2_seg = []
-        nseg = self.numpnts // self.nperseg # Number of segments
-        for i in range(nseg):
-            start_i = i * self.nperseg
-            signal1_seg.append(self.signal1[start_i:start_i + self.nperseg])
-            signal2_seg.append(self.signal2[start_i:start_i + self.nperseg])
-        signal1_seg = np.array(signal1_seg)
-        signal2_seg = np.array(signal2_seg)
-        
-        xcorr = np.zeros((nseg, 2 * self.nperseg - 1))
-        autocorr1 = np.zeros((nseg, 2 * self.nperseg - 1))
-        autocorr2 = np.zeros((nseg, 2 * self.nperseg - 1))
-        xcorr_coef = np.zeros((nseg, 2 * self.nperseg - 1))
-        for i in range(nseg):
-            
-            # Subtract mean from each segment
-            signal1_seg[i,:] -= np.mean(signal1_seg, axis=1)[i]
-            signal2_seg[i,:] -= np.mean(signal2_seg, axis=1)[i]
-            
-            # Calculate cross-correlation for each segment
-            #     The second input is reversed to change the convolution to a
-            #     cross-correlation of the form Sum[x[i] * y[i - k]]. The
-            #     output is then reversed to put the cross-correlation into 
-            #     the more standard form Sum[x[i] * y[i +k]]
-            xcorr[i,:] = fftconvolve(signal1_seg[i,:],
-                                     signal2_seg[i,::-1])[::-1]
-            
-            # Calculate autocorrelations for each segment
-            autocorr1[i,:] = fftconvolve(signal1_seg[i,:],
-                                         signal1_seg[i,::-1])[::-1]
-            autocorr2[i,:] = fftconvolve(signal2_seg[i,:],
-                                         signal2_seg[i,::-1])[::-1]
-            
-            # Calculate correlation coefficient
-            xcorr_coef[i,:] = xcorr[i,:] / np.sqrt(
-                    autocorr1[i,self.nperseg-1] * autocorr2[i,self.nperseg-1])
-            
-            # Average over all segments
-            self.crosscorrelation = np.mean(xcorr, axis=0)
-            self.autocorrelation1 = np.mean(autocorr1, axis=0)
-            self.autocorrelation2 = np.mean(autocorr2, axis=0)
-            self.correlation_coef = np.mean(xcorr_coef, axis=0)
-            
-            # Calculate envelope of correlation using analytic signal method
-            self.correlation_coef_envelope = np.absolute(
-                    hilbert(self.correlation_coef))
-            
-            # Construct time axis for cross correlation
-            self.time_delays = np.linspace(-(self.nperseg - 1),
-                                            (self.nperseg - 1),
-                                           2*self.nperseg - 1) / self.fSample
+        # Segment-averaged correlations from one batched transform of all
+        # non-overlapping segments with nperseg points
+        (self.crosscorrelation,
+         self.autocorrelation1,
+         self.autocorrelation2,
+         self.correlation_coef) = correlate_segments(self.signal1,
+                                                     self.signal2,
+                                                     self.nperseg)
+
+        # Calculate envelope of correlation using analytic signal method
+        self.correlation_coef_envelope = np.absolute(
+                hilbert(self.correlation_coef))
+
+        # Construct time axis for cross correlation
+        self.time_delays = np.linspace(-(self.nperseg - 1),
+                                        (self.nperseg - 1),
+                                       2*self.nperseg - 1) / self.fSample
         
     def calc_correlation(self):
         """
@@ -461,4 +489,192 @@ class CrossSignal(object):
         delta_t = 1 / self.fSample
         self.time_delays = delta_t * np.linspace(-(self.numpnts - 1),
                                                   (self.numpnts - 1), 
-                                                 2*self.numpnts - 1)
\ No newline at end of file
+                                                 2*self.numpnts - 1)
+
+class CrossSpectralMatrix(object):
+    """
+    CrossSpectralMatrix class
+
+    Calculates time bin averaged cross spectral density, coherence and
+    cross phase for all pairs of signals.  Segments of each signal are
+    transformed once, and pairwise products are summed over segments with
+    einsum, in chunks of frequencies to bound memory.
+
+    Parameters
+    ==========
+    signals : list of fdp signals
+        Signals to be analyzed, uniformly sampled at the same frequency.
+    channels : list of str or int, optional
+        Subset of signals (names or indices) for matrix columns. Defaults to
+        all signals.
+    refchannels : list of str or int, optional
+        Subset of signals (names or indices) for matrix rows. Defaults to
+        channels.
+    tmin, tmax, window, nperseg, forcepower2, offsetminimum, offsetdc,
+    degrees : optional
+        See CrossSignal.
+    fchunk : int, optional
+        Number of frequencies per einsum chunk. Defaults to a chunk size
+        with about 64 MB of segment spectra.
+
+    Attributes
+    ==========
+    freqs : frequency array [kHz]
+    csd : complex cross spectral density csd(freq, refchannel, channel),
+        with csd[:, i, j] equal to CrossSignal(ref i, channel j).csd_binavg
+    asd : auto spectral density asd(freq, channel)
+    crosspower, crossphase, mscoherence, coherence : (freq, refchannel,
+        channel)
+    """
+
+    def __init__(self, signals, channels=None, refchannels=None, tmin=0.2,
+                 tmax=1.0, window='hann', nperseg=None, forcepower2=False,
+                 offsetminimum=False, offsetdc=False, degrees=True,
+                 fchunk=None):
+
+        self.signals = list(signals)
+        if not self.signals:
+            raise FdpError('No signals for CrossSpectralMatrix')
+        self.signalnames = [signal._name for signal in self.signals]
+        self.shot = self.signals[0].shot
+        self.tmin = tmin
+        self.tmax = tmax
+        self.window = window
+        self.nperseg = nperseg
+        self.forcepower2 = forcepower2
+        self.offsetminimum = offsetminimum
+        self.detrend = 'constant' if offsetdc else False
+        self.degrees = degrees
+        self.fchunk = fchunk
+
+        self.channels = self.select_channels(channels)
+        if refchannels is None:
+            self.refchannels = self.channels
+        else:
+            self.refchannels = self.select_channels(refchannels)
+        self.channelnames = [self.signalnames[i] for i in self.channels]
+        self.refchannelnames = [self.signalnames[i] for i in self.refchannels]
+
+        self.load_signals()
+        self.calc_csd()
+        self.calc_coherence()
+
+    def select_channels(self, channels):
+        'Return indices of channels, given as names or indices'
+
+        if channels is None:
+            return list(range(len(self.signals)))
+        indices = []
+        for channel in channels:
+            if isinstance(channel, str):
+                if channel not in self.signalnames:
+                    raise FdpError('{} is not a valid channel'.format(channel))
+                channel = self.signalnames.index(channel)
+            indices.append(int(channel))
+        return indices
+
+    def load_signals(self):
+        """
+        Load data in the time window for all channels in use, and check
+        that they have the same sampling rate and length.
+        """
+
+        used = sorted(set(self.channels) | set(self.refchannels))
+        signals = [self.signals[i] for i in used]
+        root = getattr(signals[0], '_root', None)
+        if root is not None:
+            # batched MDS requests for all channels and time axes
+            root._load_signals(signals + [signal.time for signal in signals])
+        fs = [1 / np.mean(np.diff(np.asarray(signal.time[:1000])))
+              for signal in signals]
+        if np.ptp(fs) >= 1e-3:
+            raise FdpError('Input signals have different sampling rates')
+        self.fSample = np.mean(fs)
+        self.fNyquist = self.fSample / 2
+
+        data = []
+        for signal in signals:
+            time = np.asarray(signal.time)
+            istart = np.searchsorted(time, self.tmin, side='left')
+            istop = np.searchsorted(time, self.tmax, side='right')
+            values = np.array(signal[istart:istop], dtype=float)
+            if self.offsetminimum:
+                # shift signal so that first 1,000 points are near zero
+                values -= np.mean(signal[:1000])
+            data.append(values)
+        if len(set([values.size for values in data])) != 1:
+            raise FdpError('Input signals are different lengths')
+        self.data = np.array(data)
+        self.numpnts = self.data.shape[1]
+        self.time0 = np.asarray(signals[0].time)[istart]
+        # rows of self.data for channels and refchannels
+        self._rows = [used.index(i) for i in self.channels]
+        self._refrows = [used.index(i) for i in self.refchannels]
+
+    def calc_csd(self):
+        """
+        Calculate time bin averaged cross spectral density matrix
+        """
+
+        if self.nperseg is None:
+            self.nperseg = int(np.sqrt(2 * self.numpnts))
+        if self.forcepower2 is True:
+            self.nperseg = np.power(2, int(np.log2(self.nperseg - 1)) + 1)
+
+        freqs, times, spectra, scale = spectral_segments(
+                self.data,
+                self.fSample,
+                window=self.window,
+                nperseg=self.nperseg,
+                detrend=self.detrend
+            )
+        self.numbins = spectra.shape[0]
+        self.freqs = freqs / 1000
+        self.times = times + self.time0
+
+        # auto spectral densities for all channels in use
+        asd = onesided(scale * np.mean(np.square(np.absolute(spectra)),
+                                       axis=0), self.nperseg)
+        self.asd = asd[:, self._rows]
+        self.refasd = asd[:, self._refrows]
+
+        # pairwise products, chunked over frequency
+        nfreq = freqs.size
+        fchunk = self.fchunk
+        if fchunk is None:
+            fchunk = max(1, 2**26 // (16 * self.numbins *
+                                       len(self._rows + self._refrows)))
+        self.csd = np.empty((nfreq, len(self._refrows), len(self._rows)),
+                            dtype=complex)
+        for fstart in range(0, nfreq, fchunk):
+            chunk = spectra[:, fstart:fstart + fchunk]
+            self.csd[fstart:fstart + fchunk] = np.einsum(
+                'sfi,sfj->fij',
+                np.conj(chunk[..., self._refrows]),
+                chunk[..., self._rows])
+        self.csd *= scale / self.numbins
+        onesided(self.csd, self.nperseg)
+
+    def calc_coherence(self):
+        'Calculate cross power, cross phase and coherence'
+
+        self.crosspower = np.absolute(self.csd)
+        self.crossphase = np.angle(self.csd)
+        if self.degrees:
+            self.crossphase = np.rad2deg(self.crossphase)
+        self.mscoherence = (np.square(self.crosspower) /
+                            (self.refasd[:, :, np.newaxis] *
+                             self.asd[:, np.newaxis, :]))
+        self.coherence = np.sqrt(self.mscoherence)
+        if self.numbins == 1:
+            self.minsig_mscoherence = 1
+            self.minsig_coherence = 1
+        else:
+            self.minsig_mscoherence = 1 - 0.05**(1/(self.numbins - 1))
+            self.minsig_coherence = np.sqrt(self.minsig_mscoherence)
+
+    def pair(self, refchannel, channel):
+        'Return (refchannel, channel) indices into matrix attributes'
+
+        return (self.refchannelnames.index(refchannel),
+                self.channelnames.index(channel))
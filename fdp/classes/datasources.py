@@ -21,6 +21,16 @@ EVENT_SERVERS = {
     'ltx': 'lithos.pppl.gov:8000'
 }
 
+# MDSplus event set when shot data is stored, and the tree for
+# current_shot() if the event has no shot number
+SHOT_EVENTS = {
+    'nstxu': 'shotdone'
+}
+
+SHOT_TREES = {
+    'nstxu': 'nstx'
+}
+
 LOGBOOK_CREDENTIALS = {
     'nstxu': {
         'server': 'sql2008.pppl.gov\sql2008',
@@ -12,6 +12,20 @@ VERBOSE = False
 TKROOT = None
 FDP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# on-disk signal cache location and size cap (bytes)
+CACHE_DIR = os.getenv('FDP_CACHE_DIR') or \
+    os.path.join(os.path.expanduser('~'), '.fdp', 'cache')
+CACHE_SIZE = 20 * 1024**3
+
+# answer logbook queries from a local SQLite mirror in CACHE_DIR/logbook
+LOGBOOK_MIRROR = bool(os.getenv('FDP_LOGBOOK_MIRROR'))
+
+# default number of pooled MDS server connections
+MDS_POOL_SIZE = 4
+
+# samples per chunk for long signal loads
+CHUNK_SIZE = 2**20
+
 class FdpError(Exception):
     """
     Error class for FDF package
@@ -27,6 +41,12 @@ class FdpError(Exception):
     def __str__(self):
         return self.message
 
+class FdpTimeout(FdpError):
+    """
+    Error class for MDSplus event waits that time out
+    """
+    pass
+
 class FdpWarning(Warning):
     """
     Warning class for FDF package
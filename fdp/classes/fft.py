@@ -5,9 +5,12 @@ Created on Fri Apr 15 21:00:08 2016
 @author: drsmith
 """
 
+from warnings import warn
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy import fftpack
-from .fdp_globals import FdpError
+from .fdp_globals import FdpError, FdpWarning
+from .filters import bandpass
 
 
 class Fft(object):
@@ -22,11 +25,13 @@ class Fft(object):
         time: time array for bins [s]
         freq: frequency array [kHz]
         power2: # of points in fft, power-of-2 (>=) enforced
+        fmin, fmax: zero-phase band-pass filter before binning [kHz],
+            offsetminimum is ignored if set
     """
 
     def __init__(self, signal, power2=None, tmin=0.2, tmax=1.0,
                  hanning=True, offsetminimum=False, offsetdc=False,
-                 normalizetodc=False):
+                 normalizetodc=False, fmin=None, fmax=None):
         self.signal = signal
         self.signalname = signal._name
         self.parentname = signal._parent._name
@@ -36,6 +41,8 @@ class Fft(object):
         self.offsetminimum = offsetminimum  # true to shift signal by minimum
         self.offsetdc = offsetdc  # true to remove DC component
         self.normalizetodc = normalizetodc
+        self.fmin = fmin  # band-pass filter limits in kHz
+        self.fmax = fmax
 
         if self.hanning:
             # 50% overlap for Hanning window
@@ -75,7 +82,13 @@ class Fft(object):
         self.loadSignal()
         self.makeTimeBins()
         if self.offsetminimum:
-            self.applyMinimumOffset()
+            if self.fmin is None and self.fmax is None:
+                self.applyMinimumOffset()
+            else:
+                # the minimum of unfiltered samples is no offset of
+                # band-passed bins
+                warn('offsetminimum is ignored with fmin/fmax',
+                     FdpWarning)
         if self.offsetdc:
             self.normalizetodc = False
             self.applyDcOffset()
@@ -99,10 +112,9 @@ class Fft(object):
             raise FdpError('Data must be floating or complex')
 
     def makeTimeBins(self):
-        self.time = []
-        self.fft = []
-        time_indices = np.where(np.logical_and(self.signal.time>=self.tmin,
-                                                self.signal.time<=self.tmax))[0]
+        time = np.asarray(self.signal.time)
+        time_indices = np.where(np.logical_and(time>=self.tmin,
+                                                time<=self.tmax))[0]
         istart = time_indices[0]
         istop = time_indices[time_indices.size-1]
         if self.power2 is None:
@@ -110,78 +122,184 @@ class Fft(object):
             self.power2 = np.int(np.sqrt((istop-istart+1)*self.overlapfactor))
         self.power2 = nextpow2(self.power2)
         self.nfft = self.power2
-        t = np.mean(self.signal.time[istart:istart+self.power2])
-        while self.signal.time[istart+self.power2-1] <= self.tmax:        
-            self.time.append(t)
-            self.fft.append(self.signal[istart:istart+self.power2])
-            # candidate istart and t for next iteration
-            istart = istart + self.power2/self.overlapfactor
-            t = np.mean(self.signal.time[istart:istart+self.power2])
-        # convert lists to ndarrays
+        step = self.power2 // self.overlapfactor
+        # bins end at or before tmax
+        iend = np.searchsorted(time, self.tmax, side='right')
+        self.nbins = max((iend - istart - self.power2) // step + 1, 0)
+        # bin center times, from a strided view of the time axis
+        self.time = segments(time, self.power2, step, start=istart,
+                             nseg=self.nbins).mean(axis=1)
+        # one copy of the binned signal, modified in place below
         # at this point, fft contains modified input signals
-        self.fft = np.array(self.fft)
-        self.time = np.array(self.time)
-        self.nbins = self.time.size
+        self.fft = self.makeSignalBins(istart, step)
+
+    def makeSignalBins(self, istart, step):
+        data, start = self.filterSignals([self.signal], istart, step)
+        return segments(data[0], self.power2, step,
+                        start=start, nseg=self.nbins).copy()
+
+    def filterSignals(self, signals, istart, step, numtaps=501):
+        # returns data(channel, sample) and start index of the first bin;
+        # with fmin/fmax set, the binned span plus numtaps samples either
+        # side is band-passed for all channels in one batch
+        if self.fmin is None and self.fmax is None:
+            return [np.asarray(signal) for signal in signals], istart
+        npoints = min([signal.size for signal in signals])
+        lower = max(istart - numtaps, 0)
+        upper = min(istart + (self.nbins-1)*step + self.power2 + numtaps,
+                    npoints)
+        data = np.array([np.asarray(signal)[lower:upper]
+                         for signal in signals])
+        fs = 1/np.mean(np.diff(np.asarray(self.signal.time[0:10000])))
+        fmin = self.fmin*1e3 if self.fmin is not None else None
+        fmax = self.fmax*1e3 if self.fmax is not None else None
+        data = bandpass(data, fs, fmin=fmin, fmax=fmax, numtaps=numtaps)
+        return data, istart - lower
 
     def applyMinimumOffset(self):
-        zerosignal = np.min(self.signal[0:1e4])
+        zerosignal = np.min(self.signal[0:10000])
         self.fft -= zerosignal
-    
+
     def applyDcOffset(self):
         # remove DC offset bin-wise
-        for i in range(self.nbins):
-            self.fft[i,:] -= np.mean(self.fft[i,:])
-    
+        self.fft -= self.fft.mean(axis=-1)[..., np.newaxis]
+
     def applyHanningWindow(self):
         self.window = np.hanning(self.power2)
-        for i in range(self.nbins):
-            self.fft[i,:] = np.multiply(self.fft[i,:], self.window)
-    
+        self.fft *= self.window
+
     def calcIntegratedSignalPower(self):
-        self.intpower = np.sum(np.square(np.absolute(self.fft)), axis=1)
-    
+        if self.iscomplexsignal:
+            self.intpower = np.sum(np.square(np.absolute(self.fft)), axis=-1)
+        else:
+            self.intpower = np.einsum('...i,...i->...', self.fft, self.fft)
+
     def calcFft(self):
-        timeint = np.mean(np.diff(self.signal.time[0:1e4]))
-        # complex-valued, double-sided FFT
-        self.fft = fftpack.fft(self.fft, 
-                               n=self.power2,
-                               axis=1)
-        # frequency array in kHz
-        self.freq = fftpack.fftfreq(self.power2, d=timeint)/1e3
+        timeint = np.mean(np.diff(self.signal.time[0:10000]))
+        if self.iscomplexsignal:
+            # complex-valued, double-sided FFT
+            self.fft = fftpack.fft(self.fft,
+                                   n=self.power2,
+                                   axis=-1)
+            # frequency array in kHz
+            self.freq = fftpack.fftfreq(self.power2, d=timeint)/1e3
+        else:
+            # real input, complex-valued, single-sided FFT
+            self.fft = np.fft.rfft(self.fft, n=self.power2, axis=-1)
+            self.fft[..., 1:self.power2//2] *= np.sqrt(2.0)
+            self.freq = np.fft.rfftfreq(self.power2, d=timeint)/1e3
         # check integrated power (bin-wise)
         self.checkIntegratedPower()
-        # if real-valued input, convert to single-sided FFT
-        if not self.iscomplexsignal:
-            # complex-valued, single-sided FFT
-            ssfft = self.fft[:,0:self.power2/2+1].copy()
-            ssfft[:,1:self.power2/2] *= np.sqrt(2.0)
-            self.fft = ssfft
-            self.freq = self.freq[0:self.power2/2+1].copy()
-            self.freq[self.power2/2] = -self.freq[self.power2/2]
-            # check integrated power (bin-wise)
-            self.checkIntegratedPower()
-            
+
     def applyNormalizeToDc(self):
-        for i in range(self.nbins):
-            self.fft[i,:] /= np.real(self.fft[i,0])
-            
+        self.fft /= np.real(self.fft[..., 0:1])
+
     def calcPsd(self):
         # PSD in dB: 10*log10 (|FFT|^2)
-        self.psd = np.square(np.absolute(self.fft))
+        self.psd = np.square(self.fft.real) + np.square(self.fft.imag)
         self.logpsd = 10*np.log10(self.psd)
         # bin-averaged PSD in dB: 10*log10 (|FFT|^2)
-        self.binavg_psd = np.mean(self.psd, axis=0)
+        self.binavg_psd = np.mean(self.psd, axis=-2)
         self.binavg_logpsd = 10*np.log10(self.binavg_psd)
         
                 
     def checkIntegratedPower(self):
         intpowercheck = np.sum(np.square(np.absolute(self.fft)),
-                               axis=1)/self.power2
+                               axis=-1)/self.power2
         if not np.allclose(self.intpower, intpowercheck):
             raise FdpError('Integrated power mismatch')
         
 
 
+class MultiFft(Fft):
+    """
+    MultiFft class
+
+    Calculates binned ffts for time interval tmin to tmax for several
+    signals sharing a time axis.  All channels are binned into one array
+    and transformed together.
+
+    Attributes
+        fft: complex-valued fft(channel, time, freq)
+        psd, logpsd: psd(channel, time, freq)
+        binavg_psd, binavg_logpsd: psd(channel, freq)
+        signalnames: channel names
+        (see Fft for other attributes)
+    """
+
+    def __init__(self, signals, *args, **kwargs):
+        self.signals = list(signals)
+        if not self.signals:
+            raise FdpError('No signals for MultiFft')
+        self.signalnames = [signal._name for signal in self.signals]
+        self.nchannels = len(self.signals)
+        super(MultiFft, self).__init__(self.signals[0], *args, **kwargs)
+
+    def loadSignal(self):
+        root = getattr(self.signal, '_root', None)
+        if root is not None:
+            # batched MDS requests for all channels and time axes
+            root._load_signals(self.signals +
+                               [signal.time for signal in self.signals])
+        time = np.asarray(self.signal.time)
+        for signal in self.signals[1:]:
+            if signal.time is not self.signal.time and \
+                    not np.array_equal(time, signal.time):
+                raise FdpError('Signals {} and {} do not share a time axis'.
+                               format(self.signal._name, signal._name))
+        kinds = set([signal.dtype.kind for signal in self.signals])
+        if not kinds.issubset(['f', 'c']):
+            raise FdpError('Data must be floating or complex')
+        self.iscomplexsignal = 'c' in kinds
+
+    def makeSignalBins(self, istart, step):
+        dtype = np.result_type(*[signal.dtype for signal in self.signals])
+        bins = np.empty((self.nchannels, self.nbins, self.power2),
+                        dtype=dtype)
+        data, start = self.filterSignals(self.signals, istart, step)
+        for i in range(self.nchannels):
+            bins[i] = segments(data[i], self.power2, step,
+                               start=start, nseg=self.nbins)
+        return bins
+
+    def applyMinimumOffset(self):
+        zerosignal = np.array([np.min(signal[0:10000])
+                               for signal in self.signals])
+        self.fft -= zerosignal[:, np.newaxis, np.newaxis]
+
+
+def group_by_time(signals):
+    """
+    Return lists of signals that share time axis values
+    """
+    groups = []
+    for signal in signals:
+        for group in groups:
+            if signal.time is group[0].time or \
+                    np.array_equal(signal.time, group[0].time):
+                group.append(signal)
+                break
+        else:
+            groups.append([signal])
+    return groups
+
+
+def segments(data, nperseg, step, start=0, nseg=None):
+    """
+    Return strided view of data as segments(segment, nperseg)
+
+    Segments start every step samples from index start.  The view shares
+    memory with data, so copy before modifying segments in place.
+    """
+    data = np.asarray(data)
+    maxseg = max((data.shape[0] - start - nperseg) // step + 1, 0)
+    if nseg is None or nseg > maxseg:
+        nseg = maxseg
+    stride = data.strides[0]
+    return as_strided(data[start:], shape=(nseg, nperseg) + data.shape[1:],
+                      strides=(step*stride, stride) + data.strides[1:])
+
+
 def nextpow2(number):
     """Return next power of 2 (>= number)"""
     exp = int(np.log2(number-1))+1
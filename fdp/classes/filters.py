@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+filters.py - zero-phase band-pass filters with cached designs
+
+**Functions**
+
+* get_design - cached FIR or IIR (second-order sections) filter design
+* bandpass - zero-phase band-pass filter along an axis of multi-channel data
+* fftfilt - FFT overlap-add FIR filter along the last axis
+
+Designs are cached by (kind, fs, fmin, fmax, numtaps or order).  FIR
+filters are applied forward and backward as a single FFT overlap-add
+convolution with the zero-phase kernel h * h[::-1]; IIR filters are applied
+forward and backward as second-order sections.  All channels are filtered in
+one batched operation.
+
+Created on Sun Oct 18 18:40:05 2026
+
+@author: ktritz
+"""
+import numpy as np
+from scipy.signal import firwin, butter, sosfilt, sosfilt_zi
+from .fdp_globals import FdpError
+
+_designs = {}
+
+
+def get_design(fs, fmin=None, fmax=None, kind='fir', numtaps=501, order=4):
+    """
+    Return cached filter design for band fmin to fmax (Hz)
+
+    kind='fir' returns FIR taps from firwin (Hamming window), kind='iir'
+    returns Butterworth second-order sections.  fmin=None gives a
+    low-pass filter and fmax=None gives a high-pass filter.
+    """
+    nyq = fs / 2.
+    if fmin is not None and fmin <= 0:
+        fmin = None
+    if fmax is not None and fmax >= nyq:
+        fmax = None
+    if fmin is None and fmax is None:
+        return None
+    if fmin is not None and fmin >= nyq:
+        raise FdpError('fmin is outside valid range')
+    if fmax is not None and fmax <= 0:
+        raise FdpError('fmax is outside valid range')
+    if fmin is not None and fmax is not None and fmax <= fmin:
+        raise FdpError('fmin is larger than fmax')
+    if kind == 'fir':
+        key = (kind, fs, fmin, fmax, numtaps)
+    elif kind == 'iir':
+        key = (kind, fs, fmin, fmax, order)
+    else:
+        raise FdpError('Filter kind must be fir or iir')
+    if key not in _designs:
+        if fmin is None:
+            band, btype = fmax, 'lowpass'
+        elif fmax is None:
+            band, btype = fmin, 'highpass'
+        else:
+            band, btype = [fmin, fmax], 'bandpass'
+        if kind == 'fir':
+            _designs[key] = firwin(numtaps, band, nyq=nyq,
+                                   pass_zero=(btype == 'lowpass'))
+        else:
+            _designs[key] = butter(order, np.array(band) / nyq, btype=btype,
+                                   output='sos')
+    return _designs[key]
+
+
+def _nextpow2(number):
+    return 2**int(np.ceil(np.log2(number)))
+
+
+def fftfilt(kernel, data, nfft=None):
+    """
+    Full convolution of kernel with data along the last axis, using FFT
+    overlap-add with blocks of nfft points
+    """
+    nkernel = kernel.size
+    npoints = data.shape[-1]
+    nout = npoints + nkernel - 1
+    if nfft is None:
+        nfft = min(_nextpow2(max(8 * nkernel, 1024)), _nextpow2(nout))
+    if nfft < nkernel:
+        raise FdpError('nfft must be at least the kernel length')
+    blocksize = nfft - nkernel + 1
+    kernelfft = np.fft.rfft(kernel, n=nfft)
+    out = np.zeros(data.shape[:-1] + (nout,))
+    for start in range(0, npoints, blocksize):
+        block = np.fft.rfft(data[..., start:start + blocksize], n=nfft,
+                            axis=-1)
+        block = np.fft.irfft(block * kernelfft, n=nfft, axis=-1)
+        stop = min(start + nfft, nout)
+        out[..., start:stop] += block[..., :stop - start]
+    return out
+
+
+def _odd_extension(data, padlen):
+    # odd extension of data(..., sample) at both ends, as in filtfilt
+    left = 2 * data[..., :1] - data[..., padlen:0:-1]
+    right = 2 * data[..., -1:] - data[..., -2:-padlen - 2:-1]
+    return np.concatenate((left, data, right), axis=-1)
+
+
+def bandpass(data, fs, fmin=None, fmax=None, axis=-1, kind='fir',
+             numtaps=501, order=4):
+    """
+    Zero-phase band-pass filter data along axis (fs, fmin, fmax in Hz)
+
+    **Usage**::
+
+        >>> filtered = bandpass(data, 2e6, fmin=10e3, fmax=100e3)
+
+    """
+    data = np.asarray(data)
+    if data.dtype.kind == 'c':
+        kwargs = dict(fs=fs, fmin=fmin, fmax=fmax, axis=axis, kind=kind,
+                      numtaps=numtaps, order=order)
+        return bandpass(data.real, **kwargs) + \
+            1j * bandpass(data.imag, **kwargs)
+    data = data.astype(float)
+    axis = axis % data.ndim
+    npoints = data.shape[axis]
+    if kind == 'fir' and npoints <= numtaps:
+        # odd number of taps shorter than the data
+        numtaps = 2 * (npoints // 2) - 1
+    design = get_design(fs, fmin=fmin, fmax=fmax, kind=kind,
+                        numtaps=numtaps, order=order)
+    if design is None:
+        return data.copy()
+    # filter along the last axis
+    data = np.rollaxis(data, axis, data.ndim)
+    if kind == 'fir':
+        padlen = min(design.size, npoints - 1)
+        extended = _odd_extension(data, padlen)
+        # forward-backward filtering is convolution with h * h[::-1]
+        kernel = np.convolve(design, design[::-1])
+        delay = design.size - 1
+        filtered = fftfilt(kernel, extended)
+        filtered = filtered[..., padlen + delay:padlen + delay + npoints]
+    else:
+        padlen = min(3 * (2 * design.shape[0] + 1), npoints - 1)
+        extended = _odd_extension(data, padlen)
+        zi = sosfilt_zi(design).reshape((design.shape[0],) +
+                                        (1,) * (data.ndim - 1) + (2,))
+        filtered, _ = sosfilt(design, extended, axis=-1,
+                              zi=zi * extended[..., :1])
+        filtered = filtered[..., ::-1]
+        filtered, _ = sosfilt(design, filtered, axis=-1,
+                              zi=zi * filtered[..., :1])
+        filtered = filtered[..., ::-1][..., padlen:padlen + npoints]
+    return np.rollaxis(filtered, filtered.ndim - 1, axis)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+loader.py - parallel MDSplus loader across shots and trees
+
+**Classes**
+
+* ParallelLoader - bounded pool of worker threads with their own MDS
+  connections
+* FetchSet - progress-reporting set of fetch futures
+
+Created on Sun Oct 18 11:05:31 2026
+
+@author: ktritz
+"""
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from concurrent import futures
+from .fdp_globals import FdpError, VERBOSE
+from .datasources import MDS_SERVERS
+from .connectionpool import ConnectionPool
+
+
+def resolve_signals(shot, pattern):
+    """
+    Return empty signals and axes in shot matching a dotted pattern
+
+    The last branch may contain shell-style wildcards, e.g.
+    'magnetics.highn.*' or 'bes.ch0?'.
+    """
+    branches = pattern.split('.')
+    obj = shot
+    for index, branch in enumerate(branches):
+        if any(char in branch for char in '*?['):
+            if index != len(branches) - 1:
+                raise FdpError('Wildcards are only valid in the last branch '
+                               'of {}'.format(pattern))
+            signals = []
+            for name in sorted(obj._signals.keys()):
+                if fnmatchcase(name, branch):
+                    signals.extend(obj._signals[name]._get_pending_signals())
+            return signals
+        obj = getattr(obj, branch)
+    return obj._get_pending_signals()
+
+
+class FetchSet(object):
+    """
+    Set of futures returned by Machine.fetch()
+
+    Each future loads all requested nodes for one (shot, tree) pair and
+    returns the list of loaded signals.
+
+    **Usage**::
+
+        >>> fetchset = nstxu.fetch(shots, 'magnetics.highn.*', workers=8)
+        >>> fetchset.progress()
+        (640, 1200)
+        >>> fetchset.wait()
+
+    """
+
+    def __init__(self, futurelist, sizes, verbose=False):
+        self.futures = futurelist
+        self._sizes = dict(zip(futurelist, sizes))
+        self.nsignals = sum(sizes)
+        self.verbose = verbose
+        if verbose:
+            for future in futurelist:
+                future.add_done_callback(self._future_done)
+
+    def _future_done(self, future):
+        print('fetch: {} of {} signals loaded'.format(*self.progress()))
+
+    def __repr__(self):
+        nloaded, nsignals = self.progress()
+        return '<fetch set {}/{} signals in {} requests>'.format(
+            nloaded, nsignals, len(self.futures))
+
+    def __len__(self):
+        return len(self.futures)
+
+    def __iter__(self):
+        # iterate over futures as they complete
+        return futures.as_completed(self.futures)
+
+    def progress(self):
+        """
+        Return (loaded signals, total signals)
+        """
+        # from future states, which are final before wait() returns
+        nloaded = sum(self._sizes[future] for future in self.futures
+                      if future.done() and not future.cancelled() and
+                      future.exception() is None)
+        return nloaded, self.nsignals
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def wait(self, timeout=None):
+        futures.wait(self.futures, timeout=timeout)
+        return self
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+    def result(self, timeout=None):
+        """
+        Wait for all fetches and return the list of loaded signals
+        """
+        signals = []
+        for future in self.futures:
+            signals.extend(future.result(timeout=timeout))
+        return signals
+
+
+class ParallelLoader(object):
+    """
+    Bounded pool of worker threads for loading MDSplus data
+
+    Each worker thread owns a single-connection ConnectionPool.  Requests
+    are grouped by (shot, tree), so a worker opens each tree once and
+    fetches all of its nodes with a single batched request.
+    """
+
+    def __init__(self, machine, workers=4):
+        self._machine = machine
+        self.workers = workers
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self._local = threading.local()
+
+    def _get_pool(self):
+        # thread-local pool, reopens tree only when (tree, shot) changes
+        if self._machine._connections is None:
+            # local data, no MDS server
+            return None
+        if getattr(self._local, 'pool', None) is None:
+            self._local.pool = ConnectionPool(
+                MDS_SERVERS[self._machine._name], size=1)
+        return self._local.pool
+
+    def _load_group(self, shot, tree, signals):
+        if VERBOSE: print('ParallelLoader: {} nodes in {} for shot {}'.
+                          format(len(signals), tree, shot))
+        datalist = self._machine._get_mdsdata_many(signals,
+                                                   pool=self._get_pool())
+        for signal, data in zip(signals, datalist):
+            self._machine._attach(signal, data)
+        return signals
+
+    def fetch(self, shots, patterns, verbose=False):
+        if not isinstance(shots, (list, tuple)):
+            try:
+                shots = list(shots)
+            except TypeError:
+                shots = [shots]
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+        groups = OrderedDict()
+        found = set()
+        for shot in shots:
+            shot = int(shot)
+            if shot == 0:
+                continue
+            shotobj = getattr(self._machine, 's{}'.format(shot))
+            for pattern in patterns:
+                for signal in resolve_signals(shotobj, pattern):
+                    if id(signal) in found:
+                        continue
+                    found.add(id(signal))
+                    group = (signal.shot, signal._mdstree)
+                    groups.setdefault(group, []).append(signal)
+        futurelist = []
+        sizes = []
+        for (shot, tree), signals in groups.items():
+            futurelist.append(self._executor.submit(self._load_group,
+                                                    shot, tree, signals))
+            sizes.append(len(signals))
+        return FetchSet(futurelist, sizes, verbose=verbose)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
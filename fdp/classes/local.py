@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+local.py - HDF5 shot bundles for use without MDSplus access
+
+**Classes**
+
+* LocalMachine - machine with signal data read from an HDF5 shot bundle
+* LocalLogbook - logbook entries stored in an HDF5 shot bundle
+
+**Functions**
+
+* export_shot - write loaded signals of a shot to an HDF5 shot bundle
+* open_local - open an HDF5 shot bundle as a machine
+
+Bundles are laid out as /<shot>/<module>/<sub-container>/<signal>, with
+axes stored as _<axis>.  Signal attributes hold units, axes, point_axes
+and the MDSplus location, and shot groups hold the logbook entries.
+Modules are defined by the module XML of the fdp installation that opens
+the bundle.
+
+Created on Sun Oct 18 15:02:11 2026
+
+@author: ktritz
+"""
+import json
+import datetime
+import threading
+from warnings import warn
+import numpy as np
+try:
+    import h5py
+except ImportError:
+    h5py = None
+from .machine import Machine
+from .shot import Shot
+from .parse import parse_method
+from .fdp_globals import FdpError, FdpWarning, VERBOSE
+from .datasources import machineAlias
+
+FORMAT_VERSION = 1
+
+
+def _jsonable(obj):
+    # json.dumps() default for numpy values and dates
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+def _dataset_path(signal):
+    name = signal._name
+    if signal._is_axis():
+        name = '_' + name
+    branch = signal._parent._get_branch().split('.')
+    return '/'.join([str(signal.shot)] + branch + [name])
+
+
+def _loaded_signals(container):
+    # loaded signals and axes in container and sub-containers, including
+    # dynamic containers already created
+    queue = list(container._signals.values())
+    subcontainers = list(container._containers.values())
+    subcontainers.extend(subcontainer for subcontainer in
+                         container._dynamic_containers.values()
+                         if subcontainer is not None)
+    for subcontainer in subcontainers:
+        queue.extend(_loaded_signals(subcontainer))
+    signals = []
+    found = set()
+    while queue:
+        signal = queue.pop(0)
+        if id(signal) in found:
+            continue
+        found.add(id(signal))
+        for axis in getattr(signal, 'axes', None) or []:
+            queue.append(getattr(signal, axis))
+        if signal._empty is False:
+            signals.append(signal)
+    return signals
+
+
+def export_shot(shot, path, modules=None, compression=None):
+    """
+    Write loaded signals of a shot to an HDF5 shot bundle
+
+    If modules are given, they are loaded first.  Otherwise, all loaded
+    signals in referenced modules are written.  Datasets are contiguous
+    and memory-mapped when the bundle is opened; use compression='gzip'
+    for smaller, chunked datasets that are read through h5py.
+    """
+    if h5py is None:
+        raise FdpError('Shot export requires h5py')
+    if modules is None:
+        containers = [module for module in shot._modules.values()
+                      if module is not None]
+    else:
+        if not isinstance(modules, list):
+            modules = [modules]
+        shot.prefetch(modules)
+        containers = []
+        for module in modules:
+            obj = shot
+            for branch in module.split('.'):
+                obj = getattr(obj, branch)
+            containers.append(obj)
+    with h5py.File(path, 'a') as h5file:
+        h5file.attrs['machine'] = shot._root._name
+        h5file.attrs['format'] = FORMAT_VERSION
+        shotgroup = h5file.require_group(str(shot.shot))
+        shotgroup.attrs['logbook'] = json.dumps(shot.logbook_entries,
+                                                default=_jsonable)
+        for container in containers:
+            branch = container._get_branch()
+            shotgroup.require_group(branch.replace('.', '/'))
+            for signal in _loaded_signals(container):
+                _export_signal(h5file, signal, compression)
+    if VERBOSE: print('export_shot: wrote shot {} to {}'.format(shot.shot,
+                                                              path))
+
+
+def _export_signal(h5file, signal, compression):
+    path = _dataset_path(signal)
+    data = np.asarray(signal)
+    if path in h5file:
+        del h5file[path]
+    kwargs = {}
+    if compression and data.ndim and data.size:
+        kwargs = {'compression': compression, 'shuffle': True,
+                  'chunks': True}
+    dataset = h5file.create_dataset(path, data=data, **kwargs)
+    dataset.attrs['units'] = signal.units or ''
+    dataset.attrs['axes'] = json.dumps(list(signal.axes))
+    dataset.attrs['point_axes'] = json.dumps(signal.point_axes,
+                                             default=_jsonable)
+    dataset.attrs['mdstree'] = str(signal._mdstree)
+    dataset.attrs['mdsnode'] = str(signal._mdsnode)
+
+
+class LocalLogbook(object):
+    """
+    Logbook entries stored in an HDF5 shot bundle
+    """
+
+    def __init__(self, h5file):
+        self.logbook = {}
+        for name, group in h5file.items():
+            if not name.isdigit():
+                continue
+            entries = json.loads(group.attrs.get('logbook', '[]'))
+            for entry in entries:
+                if entry.get('rundate'):
+                    year, month, day = entry['rundate'].split('-')
+                    entry['rundate'] = datetime.date(int(year), int(month),
+                                                     int(day))
+            self.logbook[int(name)] = entries
+
+    def _shot_query(self, shot=[]):
+        # entries are read with the bundle
+        pass
+
+    def get_shotlist(self, date=None, xp=None, verbose=False):
+        # return list of shots in bundle for date and/or XP
+        if date and not isinstance(date, list):
+            date = [date]
+        if xp and not isinstance(xp, list):
+            xp = [xp]
+        dates = [str(d) for d in date or []]
+        xps = [int(x) for x in xp or []]
+        shotlist = []
+        for shot, entries in self.logbook.items():
+            for entry in entries:
+                rundate = entry['rundate']
+                if (rundate and rundate.strftime('%Y%m%d') in dates) or \
+                        entry['xp'] in xps:
+                    shotlist.append(shot)
+        if verbose:
+            for shot in sorted(set(shotlist)):
+                print('   {}'.format(shot))
+        return np.unique(shotlist)
+
+    def get_entries(self, shot=None, date=None, xp=None):
+        # return list of logbook entries (dictionaries) for shot(s)
+        shotlist = []
+        if shot and not isinstance(shot, list):
+            shot = [shot]
+        if shot:
+            shotlist.extend(shot)
+        if xp or date:
+            shotlist.extend(self.get_shotlist(date=date, xp=xp))
+        entries = []
+        for sh in np.unique(shotlist):
+            entries.extend(self.logbook.get(sh, []))
+        return entries
+
+
+class LocalMachine(Machine):
+    """
+    Machine with signal data read from an HDF5 shot bundle
+
+    Contiguous datasets are memory-mapped, compressed datasets are read
+    through h5py, and windows read only the requested samples.  Full
+    loads copy the data into the signal, since a signal cannot adopt the
+    memory map as its buffer.
+    """
+
+    def __init__(self, path):
+        if VERBOSE: print('{}.__init__({})'.format(self._name, path))
+        self._path = path
+        self._h5file = h5py.File(path, 'r')
+        self._arrays = {}
+        self._shots = {}
+        self._classlist = {}
+        self._cache = None
+        self._loader = None
+        self._load_lock = threading.RLock()
+        self._eventConnection = None
+        self._connections = None
+        self._logbook = LocalLogbook(self._h5file)
+        self.s0 = Shot(0, root=self, parent=self)
+        for shot in sorted(self._logbook.logbook):
+            self._shots[shot] = Shot(shot, root=self, parent=self)
+
+    def __repr__(self):
+        return '<local machine {} from {}>'.format(self._name.upper(),
+                                                   self._path)
+
+    def _get_connection(self, shot, tree, pool=None):
+        raise FdpError('No MDSplus access for local shot bundle {}'.format(
+            self._path))
+
+    def _get_array(self, signal):
+        # memory map for contiguous datasets, else h5py dataset
+        path = _dataset_path(signal)
+        if path not in self._arrays:
+            dataset = self._h5file.get(path)
+            if dataset is not None and dataset.chunks is None and \
+                    dataset.size:
+                try:
+                    offset = dataset.id.get_offset()
+                except (AttributeError, ValueError):
+                    offset = None
+                if offset is not None:
+                    dataset = np.memmap(self._path, mode='c',
+                                        dtype=dataset.dtype,
+                                        shape=dataset.shape, offset=offset)
+            self._arrays[path] = dataset
+        return self._arrays[path]
+
+    def _get_mdsdata(self, signal, window=None):
+        array = self._get_array(signal)
+        if array is None:
+            msg = 'No data in {} for shot {}, tree {}, and node {}'.format(
+                self._path, signal.shot, signal._mdstree, signal._mdsnode)
+            warn(msg, FdpWarning)
+            return np.zeros(0)
+        if window is None:
+            return array[...]
+        start, stop, step = window
+        start, stop = min(start, len(array)), min(stop, len(array))
+        if start >= stop:
+            return np.zeros(0, dtype=array.dtype)
+        return array[start:stop:step]
+
+    def _get_mdsdata_many(self, signals, pool=None):
+        return [self._get_mdsdata(signal) for signal in signals]
+
+    def _get_chunked_size(self, signal):
+        # memory-mapped or chunked datasets need no chunked loads
+        return None
+
+    def _load_chunked(self, signal):
+        return False
+
+    def _get_mdsindex(self, signal, values):
+        data = self._get_mdsdata(signal)
+        return [int(np.abs(float(value) - data).argmin())
+                for value in values]
+
+
+def open_local(path):
+    """
+    Open an HDF5 shot bundle written by Shot.export()
+
+    **Usage**::
+
+        >>> nstxu = fdp.open_local('/scratch/204620.h5')
+        >>> nstxu.s204620.bes.ch01.plot()
+
+    """
+    if h5py is None:
+        raise FdpError('Opening shot bundles requires h5py')
+    with h5py.File(path, 'r') as h5file:
+        name = machineAlias(str(h5file.attrs['machine']))
+        if int(h5file.attrs.get('format', 0)) > FORMAT_VERSION:
+            raise FdpError('Unsupported shot bundle format in {}'.format(
+                path))
+    MachineClassName = 'LocalMachine' + name.capitalize()
+    MachineClass = type(MachineClassName, (LocalMachine, ), {})
+    MachineClass._name = name
+    parse_method(MachineClass, level='top')
+    parse_method(MachineClass, level=name)
+    return MachineClass(path)
@@ -4,11 +4,29 @@ Created on Wed Nov 25 12:19:00 2015
 
 @author: ktritz
 """
+import time
 import datetime
+import threading
 import numpy as np
 import pymssql
-from .fdp_globals import FdpError
+from .fdp_globals import FdpError, LOGBOOK_MIRROR
 from .datasources import LOGBOOK_CREDENTIALS
+from .logbookmirror import LogbookMirror
+
+# shots per bulk logbook query, below the SQL Server parameter limit
+SHOT_QUERY_SIZE = 1000
+
+# minimum time between syncs of the local mirror (s)
+MIRROR_SYNC_INTERVAL = 10
+
+
+def _rundate(rundate):
+    # yyyymmdd integer to date
+    rundate = repr(rundate)
+    year = rundate[0:4]
+    month = rundate[4:6]
+    day = rundate[6:8]
+    return datetime.date(int(year), int(month), int(day))
 
 
 class Logbook(object):
@@ -22,6 +40,9 @@ class Logbook(object):
         self._shotlist_query_prefix = ''
         self._shot_query_prefix = ''
 
+        # the server connection is shared, so cursors are used under
+        # _cursor_lock
+        self._cursor_lock = threading.RLock()
         self._logbook_connection = None
         self._make_logbook_connection()
 
@@ -29,6 +50,11 @@ class Logbook(object):
         # kw is shot, value is list of logbook entries
         self.logbook = {}
 
+        # optional local SQLite copy of the logbook
+        self._mirror = None
+        if LOGBOOK_MIRROR:
+            self.use_mirror()
+
     def _make_logbook_connection(self):
         self._credentials = LOGBOOK_CREDENTIALS[self._name]
         self._table = self._credentials['table']
@@ -65,63 +91,108 @@ class Logbook(object):
                     txt = txt + '  {0}:{1}'.format(key, self._credentials[key])
                 raise FdpError(txt)
 
-    def _get_cursor(self):
+    def use_mirror(self, path=None, sync=True):
+        """
+        Answer queries from a local SQLite mirror of the logbook
+
+        The mirror is synced with the server now (unless sync is False) and
+        when newer shots are requested.  Returns the LogbookMirror.
+        """
+        self._mirror = LogbookMirror(self._name, path=path)
+        if sync:
+            self.sync()
+        return self._mirror
+
+    def sync(self, full=False):
+        # copy new entries from the server to the mirror
+        if self._mirror is None:
+            raise FdpError('No local logbook mirror')
+        with self._cursor_lock:
+            return self._mirror.sync(self, full=full)
+
+    def _sync_mirror(self):
+        # sync, at most once per MIRROR_SYNC_INTERVAL
+        if time.time() - self._mirror.synctime > MIRROR_SYNC_INTERVAL:
+            self.sync()
+
+    def _get_cursor(self, rowcount=0):
+        # rowcount=0 returns all rows
         try:
             cursor = self._logbook_connection.cursor()
-            cursor.execute('SET ROWCOUNT 500')
+            cursor.execute('SET ROWCOUNT {}'.format(rowcount))
         except:
             raise FdpError('Cursor error')
         return cursor
 
     def _shot_query(self, shot=[]):
-        cursor = self._get_cursor()
+        # fetch entries of uncached shots, with one query per
+        # SHOT_QUERY_SIZE shots
         if shot and not isinstance(shot, list):
             shot = [shot]
-        for sh in shot:
-            if sh not in self.logbook:
-                query = ('{0} and shot={1} '
+        shots = sorted(set(int(sh) for sh in shot or []
+                           if sh not in self.logbook))
+        if not shots:
+            return
+        # shots are cached only after the query succeeds
+        rows = self._query_entries(shots)
+        entries = dict((sh, []) for sh in shots)
+        for row in rows:
+            row['rundate'] = _rundate(row['rundate'])
+            entries[row['shot']].append(row)
+        self.logbook.update(entries)
+
+    def _query_entries(self, shots):
+        # logbook entries of sorted shots, from the mirror or server
+        if self._mirror is not None:
+            if shots[-1] > self._mirror.maxshot:
+                # shots newer than the mirror
+                self._sync_mirror()
+            return self._mirror.entries(shots)
+        rows = []
+        with self._cursor_lock:
+            cursor = self._get_cursor()
+            for start in range(0, len(shots), SHOT_QUERY_SIZE):
+                chunk = shots[start:start + SHOT_QUERY_SIZE]
+                query = ('{0} and shot IN ({1}) '
                          'ORDER BY shot ASC, entered ASC'
-                         ).format(self._shot_query_prefix, sh)
-                cursor.execute(query)
-                rows = cursor.fetchall()  # list of logbook entries
-                for row in rows:
-                    rundate = repr(row['rundate'])
-                    year = rundate[0:4]
-                    month = rundate[4:6]
-                    day = rundate[6:8]
-                    row['rundate'] = datetime.date(int(year), int(month),
-                                                   int(day))
-                self.logbook[sh] = rows
+                         ).format(self._shot_query_prefix,
+                                  ', '.join(['%d'] * len(chunk)))
+                cursor.execute(query, tuple(chunk))
+                rows.extend(cursor.fetchall())  # list of logbook entries
+            cursor.close()
+        return rows
 
     def get_shotlist(self, date=None, xp=None, verbose=False):
         # return list of shots for date and/or XP
-        cursor = self._get_cursor()
         rows = []
         shotlist = []   # start with empty shotlist
 
         if date and not isinstance(date, list):      # if it's just a single date
             date = [date]   # put it into a list
-        for d in date:
-            query = ('{0} and rundate={1} ORDER BY shot ASC'.
-                     format(self._shotlist_query_prefix, d))
-            cursor.execute(query)
-            rows.extend(cursor.fetchall())
-
         if xp and not isinstance(xp, list):           # if it's just a single xp
             xp = [xp]             # put it into a list
-        for x in xp:
-            query = ('{0} and xp={1} ORDER BY shot ASC'.
-                     format(self._shotlist_query_prefix, x))
-            cursor.execute(query)
-            rows.extend(cursor.fetchall())
+
+        if self._mirror is not None:
+            self._sync_mirror()
+            rows.extend(self._mirror.shotlist(date=date, xp=xp))
+        else:
+            with self._cursor_lock:
+                cursor = self._get_cursor()
+                for d in date or []:
+                    query = ('{0} and rundate={1} ORDER BY shot ASC'.
+                             format(self._shotlist_query_prefix, d))
+                    cursor.execute(query)
+                    rows.extend(cursor.fetchall())
+                for x in xp or []:
+                    query = ('{0} and xp={1} ORDER BY shot ASC'.
+                             format(self._shotlist_query_prefix, x))
+                    cursor.execute(query)
+                    rows.extend(cursor.fetchall())
+                cursor.close()
 
         for row in rows:
-            rundate = repr(row['rundate'])
-            year = rundate[0:4]
-            month = rundate[4:6]
-            day = rundate[6:8]
-            row['rundate'] = datetime.date(int(year), int(month), int(day))
-        if verbose:
+            row['rundate'] = _rundate(row['rundate'])
+        if verbose and rows:
             print('date {}'.format(rows[0]['rundate']))
             for row in rows:
                 print('   {shot} in XP {xp}'.format(**row))
@@ -129,7 +200,6 @@ class Logbook(object):
         shotlist.extend([row['shot'] for row in rows
                         if row['shot'] is not None])
 
-        cursor.close()
         return np.unique(shotlist)
 
     def get_entries(self, shot=None, date=None, xp=None):
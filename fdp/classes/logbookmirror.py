@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+logbookmirror.py - local SQLite mirror of the shot logbook
+
+**Classes**
+
+* LogbookMirror - copy of the logbook entries table, synced incrementally
+
+Rows with a dbkey above the largest mirrored dbkey, or entered after the
+latest mirrored entry, are copied from the logbook server on each sync.
+Voiding an entry changes neither, so each sync also reads the keys of
+voided entries, and entries edited in place are picked up by a full copy
+every REFRESH_INTERVAL seconds.  Shot and shot list queries are then
+answered from the local database, which has indexes on shot, rundate and
+xp.
+
+Created on Sun Oct 18 23:05:52 2026
+
+@author: ktritz
+"""
+import os
+import time
+import sqlite3
+import datetime
+import threading
+from .fdp_globals import CACHE_DIR, VERBOSE
+
+COLUMNS = ('dbkey', 'username', 'rundate', 'shot', 'xp', 'topic', 'text',
+           'entered', 'voided')
+
+# rows copied per fetch during sync
+SYNC_BATCH = 10000
+
+# time (s) between full copies, for entries edited in place
+REFRESH_INTERVAL = 24 * 3600
+
+
+class LogbookMirror(object):
+    """
+    Local SQLite copy of a machine logbook
+
+    **Usage**::
+
+        >>> mirror = nstxu.mirror_logbook()
+        >>> mirror.sync(nstxu._logbook)
+        12
+        >>> mirror.entries([204620, 204621])
+
+    Parameters
+    ==========
+    name : str
+        Machine name.
+    path : str, optional
+        SQLite database file.  Defaults to CACHE_DIR/logbook/<name>.sqlite.
+    """
+
+    def __init__(self, name, path=None):
+        if path is None:
+            path = os.path.join(CACHE_DIR, 'logbook',
+                                '{}.sqlite'.format(name))
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._name = name
+        self.path = path
+        # shared by loader threads
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'dbkey INTEGER PRIMARY KEY, username TEXT, rundate INTEGER, '
+                'shot INTEGER, xp INTEGER, topic TEXT, text TEXT, '
+                'entered timestamp, voided)')
+            for column in ['shot', 'rundate', 'xp']:
+                self._db.execute(
+                    'CREATE INDEX IF NOT EXISTS entries_{0} '
+                    'ON entries ({0})'.format(column))
+            self._db.execute('CREATE TABLE IF NOT EXISTS sync '
+                             '(key TEXT PRIMARY KEY, value)')
+
+    def __repr__(self):
+        return '<logbook mirror {} ({} entries)>'.format(self.path,
+                                                         self.count())
+
+    def _get_sync(self, key, default=None):
+        row = self._db.execute('SELECT value FROM sync WHERE key=?',
+                               (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def count(self):
+        'Number of mirrored entries'
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM entries').\
+                fetchone()[0]
+
+    @property
+    def maxshot(self):
+        'Largest mirrored shot number, 0 if empty'
+        with self._lock:
+            shot = self._db.execute('SELECT MAX(shot) FROM entries').\
+                fetchone()[0]
+        return shot or 0
+
+    @property
+    def synctime(self):
+        'Time of the last sync, in s since the epoch'
+        with self._lock:
+            return self._get_sync('synctime', 0)
+
+    def sync(self, logbook, full=False):
+        """
+        Copy new entries and voided flags from the logbook server
+
+        With full=True, or REFRESH_INTERVAL after the last full copy, all
+        entries are copied again.  Returns the number of rows copied or
+        voided.
+        """
+        with self._lock:
+            if time.time() - self._get_sync('fulltime', 0) > REFRESH_INTERVAL:
+                full = True
+            maxdbkey = self._db.execute('SELECT MAX(dbkey) FROM entries').\
+                fetchone()[0]
+            # keeps the timestamp type, unlike MAX()
+            entered = self._db.execute('SELECT entered FROM entries '
+                                       'ORDER BY entered DESC LIMIT 1').\
+                fetchone()
+            entered = entered and entered[0]
+            if full or maxdbkey is None or entered is None:
+                maxdbkey = -1
+                entered = datetime.datetime(1900, 1, 1)
+            cursor = logbook._get_cursor(rowcount=0)
+            cursor.execute(('SELECT {0} FROM {1} WHERE dbkey > %d '
+                            'OR entered > %s ORDER BY dbkey ASC').format(
+                                ', '.join(COLUMNS), logbook._table),
+                           (maxdbkey, entered))
+            nrows = 0
+            with self._db:
+                if full:
+                    # drops entries deleted on the server
+                    self._db.execute('DELETE FROM entries')
+                while True:
+                    rows = cursor.fetchmany(SYNC_BATCH)
+                    if not rows:
+                        break
+                    self._db.executemany(
+                        'INSERT OR REPLACE INTO entries ({0}) VALUES '
+                        '({1})'.format(', '.join(COLUMNS),
+                                       ', '.join(['?'] * len(COLUMNS))),
+                        [tuple(row[column] for column in COLUMNS)
+                         for row in rows])
+                    nrows += len(rows)
+                nrows += self._sync_voided(logbook, cursor)
+                self._db.execute('INSERT OR REPLACE INTO sync VALUES (?, ?)',
+                                 ('synctime', time.time()))
+                if full:
+                    self._db.execute('INSERT OR REPLACE INTO sync VALUES '
+                                     '(?, ?)', ('fulltime', time.time()))
+            cursor.close()
+        if VERBOSE: print('LogbookMirror.sync: {} rows from {} server'.
+                          format(nrows, self._name.upper()))
+        return nrows
+
+    def _sync_voided(self, logbook, cursor):
+        # voiding keeps dbkey and entered, so compare voided keys
+        cursor.execute('SELECT dbkey, voided FROM {} WHERE voided IS NOT '
+                       'NULL'.format(logbook._table))
+        voided = dict((row['dbkey'], row['voided'])
+                      for row in cursor.fetchall())
+        mirrored = set(row[0] for row in self._db.execute(
+            'SELECT dbkey FROM entries WHERE voided IS NOT NULL'))
+        nrows = 0
+        for dbkey in set(voided) - mirrored:
+            nrows += self._db.execute(
+                'UPDATE entries SET voided=? WHERE dbkey=?',
+                (voided[dbkey], dbkey)).rowcount
+        for dbkey in mirrored - set(voided):
+            nrows += self._db.execute(
+                'UPDATE entries SET voided=NULL WHERE dbkey=?',
+                (dbkey,)).rowcount
+        return nrows
+
+    def _select(self, query, values):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(query, values)]
+
+    def entries(self, shots):
+        """
+        Return entries (dicts) of shots, ordered by shot and entry time
+        """
+        shots = [int(shot) for shot in shots]
+        rows = []
+        # stay below the SQLite variable limit
+        for start in range(0, len(shots), 500):
+            chunk = shots[start:start + 500]
+            rows.extend(self._select(
+                'SELECT {0} FROM entries WHERE voided IS NULL AND shot IN '
+                '({1}) ORDER BY shot ASC, entered ASC'.format(
+                    ', '.join(COLUMNS), ', '.join(['?'] * len(chunk))),
+                chunk))
+        return rows
+
+    def shotlist(self, date=None, xp=None):
+        """
+        Return (rundate, shot, xp, voided) rows for dates and XPs
+        """
+        rows = []
+        for column, values in [('rundate', date), ('xp', xp)]:
+            if not values:
+                continue
+            values = [int(value) for value in values]
+            rows.extend(self._select(
+                'SELECT DISTINCT rundate, shot, xp, voided FROM entries '
+                'WHERE voided IS NULL AND {0} IN ({1}) '
+                'ORDER BY shot ASC'.format(column,
+                                           ', '.join(['?'] * len(values))),
+                values))
+        return rows
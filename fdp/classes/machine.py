@@ -4,15 +4,22 @@ Created on Wed Nov 25 12:05:14 2015
 
 @author: ktritz
 """
-from collections import Mapping, MutableMapping, deque
+from collections import Mapping, MutableMapping, OrderedDict, deque
 import os
+import threading
 import numpy as np
 from warnings import warn
 import MDSplus as mds
 from .logbook import Logbook
 from .shot import Shot
-from .fdp_globals import FDP_DIR, FdpError, FdpWarning, VERBOSE
-from .datasources import machineAlias, MDS_SERVERS, EVENT_SERVERS
+from .cache import SignalCache
+from .loader import ParallelLoader
+from .connectionpool import ConnectionPool
+from .aio import AsyncLogbook, EventWaiter, ShotWatcher
+from .fdp_globals import FDP_DIR, FdpError, FdpTimeout, FdpWarning, VERBOSE, \
+    CHUNK_SIZE
+from .datasources import machineAlias, MDS_SERVERS, EVENT_SERVERS, \
+    SHOT_EVENTS, SHOT_TREES
 
 
 class Machine(MutableMapping):
@@ -28,33 +35,37 @@ class Machine(MutableMapping):
 
     """
 
-    # Maintain a dictionary of cached MDS server connections to speed up
+    # Maintain pools of cached MDS server connections to speed up
     # access for multiple shots and trees. This is a static class variable
     # to avoid proliferation of MDS server connections
-    _connections = []
+    _pools = {}
     _parent = None
     _modules = None
+    _alogbook = None
+    _eventwaiter = None
 
-    def __init__(self, name='nstxu', shotlist=None, xp=None, date=None):
+    def __init__(self, name='nstxu', shotlist=None, xp=None, date=None,
+                 cache=True, connections=None):
         self._shots = {}  # shot dictionary with shot number (int) keys
         self._classlist = {}
         self._name = machineAlias(name)
         if VERBOSE: print('{}.__init__'.format(self._name))
+        # persistent on-disk cache of signal data, keyed on MDS location
+        self._cache = SignalCache(self._name) if cache else None
+        self._loader = None
+        # signal data is attached under this lock, see _attach()
+        self._load_lock = threading.RLock()
         self._logbook = Logbook(name=self._name, root=self)
         self._eventConnection = mds.Connection(EVENT_SERVERS[self._name])
-        if len(self._connections) is 0:
+        server = MDS_SERVERS[self._name]
+        if server not in self._pools:
             if VERBOSE: print('{}.__init__  Precaching MDS connections...'.
                               format(self._name))
-            for _ in range(2):
-                try:
-                    connection = mds.Connection(MDS_SERVERS[self._name])
-                    connection.tree = None
-                    self._connections.append(connection)
-                except:
-                    msg = 'MDSplus connection to {} failed'.format(
-                        MDS_SERVERS[self._name])
-                    raise FdpError(msg)
+            self._pools[server] = ConnectionPool(server, size=connections)
             if VERBOSE: print('{}.__init__  Finished MDS'.format(self._name))
+        elif connections is not None:
+            self._pools[server].resize(connections)
+        self._connections = self._pools[server]
         self.s0 = Shot(0, root=self, parent=self)
         if shotlist or xp or date:
             self.addshot(shotlist=shotlist, xp=xp, date=date)
@@ -101,39 +112,193 @@ class Machine(MutableMapping):
         shotlist.extend(['s{}'.format(shot) for shot in self._shots.iterkeys()])
         return shotlist
 
-    def _get_connection(self, shot, tree):
-        for connection in self._connections:
-            if connection.tree == (tree, shot):
-                self._connections.remove(connection)
-                self._connections.insert(0, connection)
-                return connection
-        connection = self._connections.pop()
-        try:
-            connection.closeAllTrees()
-        except:
-            pass
-        try:
-            connection.openTree(tree, shot)
-            connection.tree = (tree, shot)
-        except:
-            connection.tree = (None, None)
-        finally:
-            self._connections.insert(0, connection)
-        return connection
+    def _get_connection(self, shot, tree, pool=None):
+        # with statement for a checked-out connection with tree open
+        if pool is None:
+            pool = self._connections
+        return pool.connection(tree, shot)
 
-    def _get_mdsdata(self, signal):
+    def _get_mdsdata(self, signal, window=None):
         shot = signal.shot
         if shot is 0:
             print('No MDS data exists for model tree')
             return None
-        connection = self._get_connection(shot, signal._mdstree)
+        if window is not None:
+            return self._get_mdsdata_window(signal, window)
+        data = None
+        if self._cache is not None:
+            key = self._cache.key(signal)
+            data = self._cache.get(key)
+        if data is None:
+            data = self._fetch_mdsdata(signal)
+            if data is None:
+                return np.zeros(0)
+            if self._cache is not None:
+                self._cache.put(key, data)
+        if hasattr(signal, '_postprocess'):
+            data = signal._postprocess(data)
+        return data
+
+    def _get_mdsdata_window(self, signal, window):
+        # samples start:stop:step of a 1-D signal, only the window is
+        # transferred unless the full signal is already cached
+        start, stop, step = window
+        key = None
+        if self._cache is not None:
+            data = self._cache.get(self._cache.key(signal))
+            if data is not None:
+                return data[start:stop:step]
+            key = self._cache.key(signal, window=window)
+            data = self._cache.get(key)
+            if data is not None:
+                return data
+        data = self._fetch_mdsdata(signal, window=window)
+        if data is None:
+            return np.zeros(0)
+        if key is not None:
+            self._cache.put(key, data)
+        return data
+
+    def _get_chunked_size(self, signal):
+        # number of samples if a 1-D signal is long enough to load in
+        # chunks, or None if cached in full, short, or the query fails
+        if self._cache is not None and \
+                self._cache.get(self._cache.key(signal)) is not None:
+            return None
+        expression = 'size(data({}))'.format(self._tdi_node(signal))
+        with self._get_connection(signal.shot, signal._mdstree) as connection:
+            try:
+                size = int(connection.get(expression))
+            except:
+                return None
+        if size <= CHUNK_SIZE:
+            return None
+        return size
+
+    def _load_chunked(self, signal):
+        # fill an empty 1-D signal in place.  data(node) is evaluated once
+        # into the TDI variable _fdpc of the checked-out connection, and
+        # one request returns its size and, for short records, the data.
+        # Longer records are read CHUNK_SIZE samples at a time so only one
+        # copy is in memory.  Returns False if cached in full or on an MDS
+        # error, for a plain load.
+        key = None
+        if self._cache is not None:
+            key = self._cache.key(signal)
+            if self._cache.get(key) is not None:
+                return False
+        with self._get_connection(signal.shot, signal._mdstree) as connection:
+            try:
+                getmany = connection.getMany()
+                getmany.append('size', '_fdpc = data({}); size(_fdpc)'.
+                               format(self._tdi_node(signal)))
+                getmany.append('data', 'size(_fdpc) > {} ? 0B : _fdpc'.
+                               format(CHUNK_SIZE))
+                getmany.execute()
+                size = int(getmany.get('size'))
+                if size <= CHUNK_SIZE:
+                    data = getmany.get('data').value_of().value
+            except:
+                return False
+            if size > CHUNK_SIZE and \
+                    not self._read_chunks(signal, connection, size):
+                return False
+        if size > CHUNK_SIZE:
+            signal._empty = False
+            signal.__dict__.pop('_pyramid', None)
+            data = signal
+        else:
+            data = np.asarray(data)
+            signal._set_data(data)
+        if key is not None:
+            self._cache.put(key, data)
+        return True
+
+    def _read_chunks(self, signal, connection, size):
+        # resize signal and fill it from the long record in _fdpc
         try:
-            data = connection.get(signal._mdsnode)
+            signal.resize((size,), refcheck=False)
+            # fill through an ndarray view, the signal is still empty
+            array = signal.view(np.ndarray)
+            for start in range(0, size, CHUNK_SIZE):
+                stop = min(start + CHUNK_SIZE, size)
+                array[start:stop] = connection.get('_fdpc[{} : {}]'.format(
+                    start, stop - 1)).value_of().value
         except:
+            return False
+        finally:
+            try:
+                connection.get('deallocate("_fdpc")')
+            except:
+                pass
+        return True
+
+    def _get_mdsindex(self, signal, values):
+        # indices of the 1-D signal (an axis) nearest to values, computed
+        # on the MDS server, or None if the server lookup fails
+        values = [float(value) for value in values]
+        if self._cache is not None:
+            data = self._cache.get(self._cache.key(signal))
+            if data is not None:
+                return [int(np.abs(value - data).argmin())
+                        for value in values]
+        expression = '_fdpi = data({}); [{}]'.format(
+            self._tdi_node(signal),
+            ', '.join(['minloc(abs(_fdpi - {!r}))'.format(value)
+                       for value in values]))
+        with self._get_connection(signal.shot, signal._mdstree) as connection:
+            try:
+                indices = connection.get(expression).value_of().value
+            except:
+                return None
+        return [int(index) for index in np.ravel(indices)]
+
+    def _tdi_node(self, signal):
+        # TDI expression for signal data including raw_of/dim_of
+        node = signal._mdsnode
+        if getattr(signal, '_raw_of', None) is not None:
+            node = 'raw_of({})'.format(node)
+        if getattr(signal, '_dim_of', None) is not None:
+            node = 'dim_of({})'.format(node)
+        return node
+
+    def _window_node(self, signal, window):
+        # TDI subscript for samples start:stop:step, clipped to the record
+        start, stop, step = window
+        return ('_fdpw = data({0}); '
+                '_fdpw[{1} : min({2}, size(_fdpw)) - 1 : {3}]').format(
+                    self._tdi_node(signal), start, stop, step)
+
+    def _fetch_mdsdata(self, signal, pool=None, window=None):
+        if pool is None:
+            pool = self._connections
+        node = signal._mdsnode
+        if window is not None:
+            node = self._window_node(signal, window)
+        data = None
+        with self._get_connection(signal.shot, signal._mdstree,
+                                  pool=pool) as connection:
+            try:
+                data = connection.get(node)
+            except:
+                if not pool.is_alive(connection):
+                    # dead socket, reconnect and retry once
+                    connection = pool.reconnect(connection)
+                    try:
+                        data = connection.get(node)
+                    except:
+                        pass
+        if data is None:
             msg = 'MDSplus connection error for shot {}, tree {}, and node {}'.format(
                 signal.shot, signal._mdstree, signal._mdsnode)
             warn(msg, FdpWarning)
-            return np.zeros(0)
+            return None
+        if window is not None:
+            # raw_of/dim_of applied on the server
+            return data.value_of().value
+        return self._process_mdsdata(signal, data)
+
+    def _process_mdsdata(self, signal, data):
         try:
             if signal._raw_of is not None:
                 data = data.raw_of()
@@ -147,10 +312,87 @@ class Machine(MutableMapping):
         data = data.value_of().value
         if signal._transpose is not None:
             data = data.transpose(signal._transpose)
-        if hasattr(signal, '_postprocess'):
-            data = signal._postprocess(data)
         return data
 
+    def _get_mdsdata_many(self, signals, pool=None):
+        # batched _get_mdsdata(), one MDS request per (shot, tree)
+        datalist = [None] * len(signals)
+        pending = OrderedDict()
+        for index, signal in enumerate(signals):
+            if self._cache is not None:
+                datalist[index] = self._cache.get(self._cache.key(signal))
+            if datalist[index] is None:
+                group = (signal.shot, signal._mdstree)
+                pending.setdefault(group, []).append(index)
+        for (shot, tree), indices in pending.items():
+            if VERBOSE: print('{}._get_mdsdata_many: {} nodes in {} for shot {}'.
+                              format(self._name, len(indices), tree, shot))
+            fetched = self._fetch_mdsdata_many(
+                shot, tree, [signals[index] for index in indices],
+                pool=pool)
+            for index, data in zip(indices, fetched):
+                if data is None:
+                    data = np.zeros(0)
+                elif self._cache is not None:
+                    self._cache.put(self._cache.key(signals[index]), data)
+                datalist[index] = data
+        for index, signal in enumerate(signals):
+            if datalist[index].size and hasattr(signal, '_postprocess'):
+                datalist[index] = signal._postprocess(datalist[index])
+        return datalist
+
+    def _fetch_mdsdata_many(self, shot, tree, signals, pool=None):
+        if pool is None:
+            pool = self._connections
+        with self._get_connection(shot, tree, pool=pool) as connection:
+            getmany = connection.getMany()
+            for index, signal in enumerate(signals):
+                getmany.append('n{}'.format(index), signal._mdsnode)
+            try:
+                getmany.execute()
+            except:
+                getmany = None
+        if getmany is None:
+            # server without GetManyExecute or dead socket,
+            # fall back to single requests
+            return [self._fetch_mdsdata(signal, pool=pool)
+                    for signal in signals]
+        datalist = []
+        for index, signal in enumerate(signals):
+            try:
+                data = getmany.get('n{}'.format(index))
+            except:
+                msg = 'MDSplus error for shot {}, tree {}, and node {}'.format(
+                    shot, tree, signal._mdsnode)
+                warn(msg, FdpWarning)
+                datalist.append(None)
+                continue
+            datalist.append(self._process_mdsdata(signal, data))
+        return datalist
+
+    def _load_signals(self, signals):
+        # fill empty signals in place with batched MDS requests
+        loadlist = []
+        loaded = set()
+        for signal in signals:
+            if signal._empty is True and signal.shot != 0 and \
+                    id(signal) not in loaded:
+                loaded.add(id(signal))
+                loadlist.append(signal)
+        if not loadlist:
+            return
+        for signal, data in zip(loadlist,
+                                self._get_mdsdata_many(loadlist)):
+            self._attach(signal, data)
+
+    def _attach(self, signal, data):
+        # attach data loaded outside the lock, unless another thread has
+        # loaded the signal meanwhile; resizing a loaded signal would free
+        # a buffer that thread or a view may still use
+        with self._load_lock:
+            if signal._empty is True:
+                signal._set_data(data)
+
     def _get_modules(self):
         if VERBOSE: print('{}._get_modules()'.format(self._name))
         if self._modules is None:
@@ -197,7 +439,13 @@ class Machine(MutableMapping):
     def adddate(self, date=[]):
         self.addshot(date=date)
 
+    def _query_logbook(self):
+        # logbook entries of all shots in bulk queries, before shots
+        # query them one by one
+        self._logbook._shot_query(shot=list(self._shots.keys()))
+
     def listshot(self):
+        self._query_logbook()
         keys = self._shots.keys()
         keys.sort()
         for shotkey in keys:
@@ -208,6 +456,64 @@ class Machine(MutableMapping):
         # return a list of shots
         return self._logbook.get_shotlist(date=date, xp=xp, verbose=verbose)
 
+    def mirror_logbook(self, path=None, sync=True):
+        """
+        Keep a local SQLite mirror of the logbook and query it
+
+        The mirror is synced incrementally, with only new entries copied
+        from the logbook server.  Returns the LogbookMirror.
+
+        **Usage**::
+
+            >>> nstxu.mirror_logbook()
+            >>> nstxu.get_shotlist(xp=1032)
+
+        """
+        return self._logbook.use_mirror(path=path, sync=sync)
+
+    def fetch(self, shots, signals, workers=4, verbose=False):
+        """
+        Load signals for many shots in parallel
+
+        Returns a FetchSet of futures, one per (shot, tree), that reports
+        progress as worker threads load data.  signals is a dotted pattern
+        (or list of patterns) with optional wildcards in the last branch.
+
+        **Usage**::
+
+            >>> fetchset = nstxu.fetch(range(204600, 204800),
+            ...                        'magnetics.highn.*', workers=8)
+            >>> fetchset.progress()
+            >>> fetchset.wait()
+
+        """
+        with self._load_lock:
+            if self._loader is None or self._loader.workers != workers:
+                if self._loader is not None:
+                    self._loader.shutdown(wait=False)
+                self._loader = ParallelLoader(self, workers=workers)
+            loader = self._loader
+        return loader.fetch(shots, signals, verbose=verbose)
+
+    def overview(self, shots, specs, path='.', **kwargs):
+        """
+        Render one PNG overview figure per shot
+
+        Data for batches of shots is loaded concurrently and figures are
+        drawn in a process pool.  Returns per-figure timings.  See
+        OverviewRenderer for keyword arguments.
+
+        **Usage**::
+
+            >>> nstxu.overview(nstxu.get_shotlist(date=20161006),
+            ...                ['magnetics.highn.highn_1', 'bes.ch0?'],
+            ...                path='overviews')
+
+        """
+        from .render import OverviewRenderer
+        renderer = OverviewRenderer(self, specs, path=path, **kwargs)
+        return renderer.render(shots)
+
     def setevent(self, event, shot_number=None, data=None):
         event_data = bytearray()
         if shot_number is not None:
@@ -221,11 +527,95 @@ class Machine(MutableMapping):
         return status
 
     def wfevent(self, event, timeout=0):
+        return self._wfevent(self._eventConnection, event, timeout)
+
+    @property
+    def alogbook(self):
+        """
+        Logbook with queries returning asyncio futures, see AsyncLogbook
+        """
+        if self._alogbook is None:
+            self._alogbook = AsyncLogbook(self._logbook)
+        return self._alogbook
+
+    def _get_eventwaiter(self):
+        if self._eventwaiter is None:
+            self._eventwaiter = EventWaiter(self)
+        return self._eventwaiter
+
+    def await_event(self, event, timeout=0):
+        """
+        Return an asyncio future for the data of the next MDSplus event
+
+        The wait runs in a bounded pool of event threads, see wfevent() for
+        the data and timeout.  Requires Python 3.5 or later.
+
+        **Usage**::
+
+            >>> shot, data = await nstxu.await_event('myevent', timeout=60)
+
+        """
+        return self._get_eventwaiter().wait(event, timeout)
+
+    def watch_shots(self, event=None, count=None):
+        """
+        Return an asynchronous iterator over new shots
+
+        Yields a Shot for each shot-complete event (SHOT_EVENTS in
+        datasources, or event), up to count shots.  Call close() on the
+        iterator to stop watching.
+
+        **Usage**::
+
+            >>> async for shot in nstxu.watch_shots():
+            ...     shot.bes.load()
+
+        """
+        return ShotWatcher(self, self._get_eventwaiter(), event=event,
+                           count=count)
+
+    def start_prefetch(self, signals, spectra=None, **kwargs):
+        """
+        Start a PrefetchDaemon that loads data for each new shot
+
+        signals are fetch() patterns, and spectra lists containers for
+        multifft(), or maps containers to multifft() keyword arguments.
+        See PrefetchDaemon for other keyword arguments.  Returns the
+        running daemon.
+
+        **Usage**::
+
+            >>> daemon = nstxu.start_prefetch(['bes.*', 'magnetics.highn.*'],
+            ...                               spectra={'bes': {'tmax': 1.0}})
+            >>> daemon.spectra(204620)['bes']
+            >>> daemon.stop()
+
+        """
+        from .prefetch import PrefetchDaemon
+        daemon = PrefetchDaemon(self, signals, spectra=spectra, **kwargs)
+        daemon.start()
+        return daemon
+
+    def _wait_shot(self, connection, event=None, timeout=0):
+        # wait for a shot-complete event, return the shot number
+        if event is None:
+            if self._name not in SHOT_EVENTS:
+                raise FdpError('No shot event for {}'.format(
+                    self._name.upper()))
+            event = SHOT_EVENTS[self._name]
+        data = self._wfevent(connection, event, timeout)
+        if isinstance(data, tuple):
+            return int(data[0])
+        return int(connection.get('current_shot("{}")'.format(
+            SHOT_TREES[self._name])).value)
+
+    def _wfevent(self, connection, event, timeout=0):
+        # wait for event on an MDSplus connection
         event_string = 'kind(_data=wfevent("{}",*,{})) == 0BU ? "timeout"' \
                        ': _data'.format(event, timeout)
-        data = self._eventConnection.get(event_string).value
+        data = connection.get(event_string).value
         if type(data) is str:
-            raise FdpError('Timeout after {}s in wfevent'.format(timeout))
+            raise FdpTimeout('Timeout after {}s in wfevent'.format(timeout))
         if not data.size:
             return None
         if data.size > 3:
@@ -329,12 +719,18 @@ class ImmutableMachine(Mapping):
     def __dir__(self):
         return ['s{}'.format(shot) for shot in self._shots]
 
+    def _query_logbook(self):
+        # logbook entries of all shots in bulk queries
+        self._parent._logbook._shot_query(shot=list(self._shots.keys()))
+
     def logbook(self):
+        self._query_logbook()
         for shotnum in self._shots:
             shotObj = self._shots[shotnum]
             shotObj.logbook()
 
     def list_shots(self):
+        self._query_logbook()
         for shotnum in self._shots:
             shotObj = self._shots[shotnum]
             print('{} in XP {} on {}'.format(
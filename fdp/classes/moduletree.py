@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+moduletree.py - compiled module XML trees
+
+**Classes**
+
+* ModuleElement - lightweight, picklable copy of a module XML element
+
+**Functions**
+
+* get_module_tree - compiled tree of a module branch
+* compile_modules - compile all module XML files of a machine
+
+The module XML files of a machine are parsed once, range elements are
+expanded, and the compiled trees are pickled to CACHE_DIR.  Later
+processes load all trees from one file, which is recompiled when any XML
+file changes or COMPILE_VERSION is increased.
+
+Created on Sun Oct 18 22:14:05 2026
+
+@author: ktritz
+"""
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+from .fdp_globals import FDP_DIR, CACHE_DIR, VERBOSE
+from .parse import parse_range
+
+# increase when ModuleElement or parse_range() change
+COMPILE_VERSION = 1
+
+_machine_trees = {}
+
+
+class ModuleElement(object):
+    """
+    Module XML element with the ElementTree methods used by Container
+
+    Channels of range elements are expanded with parse_range() when the
+    element is compiled.
+    """
+    __slots__ = ('tag', 'attrib', 'children', 'channels', 'xml')
+
+    def __init__(self, element, xml=None):
+        self.tag = element.tag
+        self.attrib = dict(element.attrib)
+        self.children = [ModuleElement(child) for child in element]
+        self.channels = None
+        if element.get('range') is not None:
+            self.channels = parse_range(element)
+        # XML text of module root elements
+        self.xml = xml
+
+    def __repr__(self):
+        return '<ModuleElement {} {}>'.format(self.tag, self.get('name'))
+
+    def __iter__(self):
+        return iter(self.children)
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+    def keys(self):
+        return list(self.attrib.keys())
+
+    def findall(self, tag):
+        return [child for child in self.children if child.tag == tag]
+
+
+def _compile_file(filename):
+    with open(filename, 'rb') as f:
+        xml = f.read()
+    return ModuleElement(ET.fromstring(xml), xml=xml)
+
+
+def _module_files(machine):
+    # {branch: xml file} for module directories containing <module>.xml
+    machine_path = os.path.join(FDP_DIR, 'modules', machine)
+    files = {}
+    for path, dirs, _ in os.walk(machine_path):
+        dirs[:] = [d for d in dirs if d[0] is not '_']
+        relpath = os.path.relpath(path, machine_path)
+        if relpath == os.curdir:
+            continue
+        module_list = relpath.split(os.sep)
+        filename = os.path.join(path, ''.join([module_list[-1], '.xml']))
+        if os.path.isfile(filename):
+            files['.'.join(module_list).lower()] = filename
+    return files
+
+
+def _stamp(files):
+    return dict((branch, (os.path.getmtime(filename),
+                          os.path.getsize(filename)))
+                for branch, filename in files.items())
+
+
+def _cache_file(machine, directory=None):
+    if directory is None:
+        directory = CACHE_DIR
+    return os.path.join(directory, 'modules', '{}-py{}.pickle'.format(
+        machine, sys.version_info[0]))
+
+
+def compile_modules(machine, directory=None):
+    """
+    Return {branch: ModuleElement} for all modules of machine
+
+    Compiled trees are read from the cache in directory (defaults to
+    CACHE_DIR) when they are current, otherwise the XML files are
+    compiled and the cache is rewritten.
+    """
+    files = _module_files(machine)
+    stamp = _stamp(files)
+    cache_file = _cache_file(machine, directory)
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['version'] == COMPILE_VERSION and \
+                cached['stamp'] == stamp:
+            if VERBOSE: print('compile_modules({}): loaded {}'.format(
+                machine, cache_file))
+            return cached['trees']
+    except Exception:
+        pass
+    trees = dict((branch, _compile_file(filename))
+                 for branch, filename in files.items())
+    if VERBOSE: print('compile_modules({}): compiled {} modules'.format(
+        machine, len(trees)))
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmpfile = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': COMPILE_VERSION,
+                         'stamp': stamp,
+                         'trees': trees}, f, pickle.HIGHEST_PROTOCOL)
+        if os.name == 'nt' and os.path.exists(cache_file):
+            os.remove(cache_file)
+        os.rename(tmpfile, cache_file)
+    except (IOError, OSError):
+        # read-only cache, compiled trees are kept for this process
+        pass
+    return trees
+
+
+def get_module_tree(machine, module_branch):
+    """
+    Return compiled ModuleElement tree for a dotted module branch
+
+    All modules of machine are compiled (or loaded from the cache) on the
+    first call.
+    """
+    module_branch = module_branch.lower()
+    if machine not in _machine_trees:
+        _machine_trees[machine] = compile_modules(machine)
+    trees = _machine_trees[machine]
+    if module_branch not in trees:
+        module_list = module_branch.split('.')
+        trees[module_branch] = _compile_file(os.path.join(
+            FDP_DIR, 'modules', machine, *(module_list +
+                                           [''.join([module_list[-1],
+                                                     '.xml'])])))
+    return trees[module_branch]
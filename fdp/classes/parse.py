@@ -53,68 +53,94 @@ def parse_defaults(element):
     return method_defaults, defaults_dict
 
 
+def parse_range(element):
+    """
+    Return (name, title, desc, index) of each channel of a range element
+
+    index is the zero-filled channel number for the mdsnode format string.
+    """
+    number_list = element.get('range').split(',')
+    name_range = element.get('namerange')
+    if name_range is None:
+        name_list = number_list
+    else:
+        name_list = name_range.split(',')
+        if len(name_list) != len(number_list):
+            name_list = number_list
+    if len(number_list) == 1:
+        start = 0
+        end = int(number_list[0])
+        namestart = 0
+        nameend = int(name_list[0])
+    else:
+        start = int(number_list[0])
+        end = int(number_list[1])+1
+        namestart = int(name_list[0])
+        nameend = int(name_list[1])+1
+    if len(name_list)==3:
+        digits = int(name_list[2])
+    else:
+        digits = int(np.ceil(np.log10(end-1)))
+    nrange = range(namestart, nameend)
+    channels = []
+    for i, index in enumerate(range(start, end)):
+        index = str(index).zfill(digits)
+        name = element.get('name').format(str(nrange[i]).zfill(digits))
+        title = None
+        if element.get('title'):
+            title = element.get('title').format(index)
+        desc = None
+        if element.get('desc'):
+            desc = element.get('desc').format(index)
+        channels.append((name, title, desc, index))
+    return channels
+
+
+_signal_dict = {}
+
+
 def parse_signal(obj, element):
+    global _signal_dict
+
     if VERBOSE: print('Begin parse_signal({}, {})'.
                       format(obj._name, element.get('name')))
+    # signal attributes depend only on the element and the container class,
+    # so parse once per class and copy for each new container
+    key = (type(obj), element)
+    if key not in _signal_dict:
+        _signal_dict[key] = _parse_signal(obj, element)
+    signal_dict = []
+    for signal in _signal_dict[key]:
+        signal = dict(signal, _parent=obj, axes=list(signal['axes']))
+        if signal['_transpose'] is not None:
+            signal['_transpose'] = list(signal['_transpose'])
+        signal_dict.append(signal)
+    if VERBOSE: print('End parse_signal({}, {})'.
+                      format(obj._name, element.get('name')))
+    return signal_dict
+
+
+def _parse_signal(obj, element):
     units = parse_units(obj, element)
     axes, transpose = parse_axes(obj, element)
-    number_range = element.get('range')
-    if number_range is None:
-        name = element.get('name')
-        title = element.get('title')
-        desc = element.get('desc')
-        mdspath, dim_of = parse_mdspath(obj, element)
-        mdstree = parse_mdstree(obj, element)
-        error = parse_error(obj, element)
-        signal_dict = [{'_name': name, 'units': units, 'axes': axes,
-                        '_mdsnode': mdspath, '_mdstree': mdstree,
-                        '_dim_of': dim_of, '_error': error, '_parent': obj,
-                        '_transpose': transpose, '_title': title,
-                        '_desc': desc}]
+    mdspath, dim_of = parse_mdspath(obj, element)
+    mdstree = parse_mdstree(obj, element)
+    error = parse_error(obj, element)
+    if element.get('range') is None:
+        channels = [(element.get('name'), element.get('title'),
+                     element.get('desc'), None)]
     else:
-        number_list = number_range.split(',')
-        name_range = element.get('namerange')
-        if name_range is None:
-            name_list = number_list
-        else:
-            name_list = name_range.split(',')
-            if len(name_list) != len(number_list):
-                name_list = number_list
-        if len(number_list) == 1:
-            start = 0
-            end = int(number_list[0])
-            namestart = 0
-            nameend = int(name_list[0])
-        else:
-            start = int(number_list[0])
-            end = int(number_list[1])+1
-            namestart = int(name_list[0])
-            nameend = int(name_list[1])+1
-        signal_dict = []
-        if len(name_list)==3:
-            digits = int(name_list[2])
-        else:
-            digits = int(np.ceil(np.log10(end-1)))
-        for i, index in enumerate(range(start, end)):
-            nrange = range(namestart, nameend)
-            name = element.get('name').format(str(nrange[i]).zfill(digits))
-            title = None
-            if element.get('title'):
-                title = element.get('title').format(str(index).zfill(digits))
-            desc = None
-            if element.get('desc'):
-                desc = element.get('desc').format(str(index).zfill(digits))
-            mdspath, dim_of = parse_mdspath(obj, element)
-            mdspath = mdspath.format(str(index).zfill(digits))
-            mdstree = parse_mdstree(obj, element)
-            error = parse_error(obj, element)
-            signal_dict.append({'_name': name, 'units': units, 'axes': axes,
-                                '_mdsnode': mdspath, '_mdstree': mdstree,
-                                '_dim_of': dim_of, '_error': error,
-                                '_parent': obj, '_transpose': transpose,
-                                '_title': title, '_desc': desc})
-    if VERBOSE: print('End parse_signal({}, {})'.
-                      format(obj._name, element.get('name')))
+        # compiled module trees keep the expanded range
+        channels = getattr(element, 'channels', None) or \
+            parse_range(element)
+    signal_dict = []
+    for name, title, desc, index in channels:
+        signal_dict.append({'_name': name, 'units': units, 'axes': axes,
+                            '_mdsnode': mdspath if index is None else
+                            mdspath.format(index),
+                            '_mdstree': mdstree, '_dim_of': dim_of,
+                            '_error': error, '_transpose': transpose,
+                            '_title': title, '_desc': desc})
     return signal_dict
 
 
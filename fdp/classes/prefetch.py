@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+prefetch.py - between-shot prefetch of signals and spectra
+
+**Classes**
+
+* PrefetchDaemon - background thread that loads data for each new shot
+
+The daemon waits for the shot-complete MDSplus event on its own event
+connection.  For each new shot it loads the requested signals with the
+parallel loader, which also stores them in the on-disk signal cache, and
+computes container spectra with multifft().  Prefetched shots stay in the
+machine with their signals loaded, since analysis scripts may already use
+them, until they are released with release().  Spectra are kept for the
+most recent shots.
+
+Created on Mon Oct 19 00:52:16 2026
+
+@author: ktritz
+"""
+import time
+import threading
+from collections import OrderedDict
+from warnings import warn
+import MDSplus as mds
+from .fdp_globals import FdpError, FdpTimeout, FdpWarning, VERBOSE
+from .datasources import EVENT_SERVERS, SHOT_EVENTS
+
+# event wait timeout (s) between checks for a stopped daemon
+PREFETCH_INTERVAL = 10
+
+# first and longest wait (s) before reconnecting to the event server
+RECONNECT_INTERVAL = 1
+RECONNECT_MAX = 300
+
+
+class PrefetchDaemon(threading.Thread):
+    """
+    Background thread that prefetches signals and spectra for new shots
+
+    **Usage**::
+
+        >>> daemon = PrefetchDaemon(nstxu, ['bes.*', 'magnetics.highn.*'],
+        ...                         spectra={'bes': {'tmin': 0.2,
+        ...                                          'tmax': 1.0}})
+        >>> daemon.start()
+        >>> daemon.spectra(204620)['bes']
+        >>> daemon.release(204620)
+        >>> daemon.stop()
+
+    Parameters
+    ==========
+    machine : fdp machine
+        Machine with a signal cache.
+    signals : str or list of str
+        Machine.fetch() patterns for signals to load.
+    spectra : list or dict, optional
+        Containers ('bes', 'magnetics.highn') for multifft(), or a dict of
+        containers and multifft() keyword arguments.
+    event : str, optional
+        Shot-complete event.  Defaults to SHOT_EVENTS in datasources.
+    workers : int, optional
+        Loader threads.  Defaults to 4.
+    keep : int, optional
+        Shots with spectra kept in memory.  Defaults to 10.
+
+    Attributes
+    ==========
+    shots : OrderedDict of shot number -> dict with fetch and spectra
+        times in s, signals loaded, spectra by container, and whether the
+        shot was added to the machine by the daemon
+    """
+
+    def __init__(self, machine, signals, spectra=None, event=None,
+                 workers=4, keep=10, verbose=False):
+        super(PrefetchDaemon, self).__init__(name='PrefetchDaemon')
+        self.daemon = True
+        if not isinstance(signals, (list, tuple)):
+            signals = [signals]
+        if spectra is None:
+            spectra = {}
+        elif not isinstance(spectra, dict):
+            if not isinstance(spectra, (list, tuple)):
+                spectra = [spectra]
+            spectra = dict((container, {}) for container in spectra)
+        if machine._cache is None:
+            raise FdpError('Prefetch requires a machine with a signal '
+                           'cache, not cache=False')
+        if event is None:
+            if machine._name not in SHOT_EVENTS:
+                raise FdpError('No shot event for {}'.format(
+                    machine._name.upper()))
+            event = SHOT_EVENTS[machine._name]
+        self.machine = machine
+        self.signals = list(signals)
+        self.spectra_kwargs = spectra
+        self.event = event
+        self.workers = workers
+        self.keep = keep
+        self.verbose = verbose
+        self.shots = OrderedDict()
+        # shots added to the machine by the daemon, until released
+        self._created = set()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<prefetch daemon for {} ({} shots)>'.format(
+            self.machine._name.upper(), len(self.shots))
+
+    def _connect(self):
+        return mds.Connection(EVENT_SERVERS[self.machine._name])
+
+    def run(self):
+        connection = None
+        backoff = RECONNECT_INTERVAL
+        while not self._stopped.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                shot = self.machine._wait_shot(connection, self.event,
+                                               PREFETCH_INTERVAL)
+            except FdpTimeout:
+                continue
+            except Exception as error:
+                warn('Event wait failed for {}: {}, reconnecting in {} s'.
+                     format(self.machine._name.upper(), error, backoff),
+                     FdpWarning)
+                connection = None
+                self._stopped.wait(backoff)
+                backoff = min(2 * backoff, RECONNECT_MAX)
+                continue
+            backoff = RECONNECT_INTERVAL
+            if self._stopped.is_set():
+                break
+            try:
+                self.prefetch(shot)
+            except Exception as error:
+                warn('Prefetch failed for shot {}: {}'.format(shot, error),
+                     FdpWarning)
+
+    def prefetch(self, shot):
+        """
+        Load signals and compute spectra for shot, returns the shot record
+
+        The shot stays in the machine until released with release().
+        """
+        record = {'signals': 0, 'fetch': None, 'spectra': {},
+                  'spectratime': None,
+                  'created': shot not in self.machine._shots}
+        try:
+            self._prefetch(shot, record)
+        finally:
+            with self._lock:
+                if record['created']:
+                    self._created.add(shot)
+                self.shots.pop(shot, None)
+                self.shots[shot] = record
+                while len(self.shots) > self.keep:
+                    self.shots.popitem(last=False)
+        if self.verbose or VERBOSE:
+            print('PrefetchDaemon: shot {}, {} signals in {:.2f} s, '
+                  'spectra in {:.2f} s'.format(shot, record['signals'],
+                                               record['fetch'],
+                                               record['spectratime']))
+        return record
+
+    def _prefetch(self, shot, record):
+        t0 = time.time()
+        if self.signals:
+            fetchset = self.machine.fetch([shot], self.signals,
+                                          workers=self.workers)
+            for future in fetchset:
+                # surface load errors
+                future.result()
+            record['signals'] = fetchset.nsignals
+        record['fetch'] = time.time() - t0
+        t0 = time.time()
+        shotobj = getattr(self.machine, 's{}'.format(shot))
+        for name, kwargs in self.spectra_kwargs.items():
+            container = shotobj
+            for branch in name.split('.'):
+                container = getattr(container, branch)
+            record['spectra'][name] = container.multifft(**kwargs)
+        record['spectratime'] = time.time() - t0
+
+    def spectra(self, shot):
+        """
+        Return {container: multifft() result} for a prefetched shot
+        """
+        with self._lock:
+            if shot not in self.shots:
+                raise FdpError('Shot {} is not prefetched'.format(shot))
+            return self.shots[shot]['spectra']
+
+    def release(self, shot):
+        """
+        Forget a prefetched shot, and drop it from the machine if the
+        daemon added it there
+
+        Signals of a dropped shot load from the signal cache when the shot
+        is used again.
+        """
+        with self._lock:
+            if shot not in self.shots and shot not in self._created:
+                raise FdpError('Shot {} is not prefetched'.format(shot))
+            self.shots.pop(shot, None)
+            created = shot in self._created
+            self._created.discard(shot)
+        if created:
+            self.machine._shots.pop(shot, None)
+
+    def stop(self, wait=True):
+        'Stop after the current event wait or prefetch'
+        self._stopped.set()
+        if wait and self.is_alive():
+            self.join()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+pyramid.py - multi-resolution min/max envelopes for plotting long signals
+
+**Classes**
+
+* MinMaxPyramid - block minima and maxima of a signal at several strides
+
+**Functions**
+
+* get_pyramid - pyramid for a signal, built once and cached on the signal
+
+Level 0 holds the minimum and maximum (with sample index) of every block
+of BASE samples (or a given base), and each further level combines FACTOR
+blocks of the level below.  A query for an index range and a pixel
+width reads the coarsest level with at least one block per pixel, so it
+returns fewer than 2 * FACTOR points per pixel regardless of signal
+length.
+
+Created on Sun Oct 18 20:05:37 2026
+
+@author: ktritz
+"""
+import numpy as np
+from .fdp_globals import FdpError
+
+BASE = 16
+FACTOR = 4
+
+
+def _block_extrema(minvalues, maxvalues, blocksize):
+    # positions of minimum and maximum in each block, last block partial
+    nvalues = minvalues.size
+    nfull = nvalues // blocksize
+    offsets = np.arange(nfull) * blocksize
+    imin = minvalues[:nfull * blocksize].reshape(nfull, blocksize).argmin(
+        axis=1) + offsets
+    imax = maxvalues[:nfull * blocksize].reshape(nfull, blocksize).argmax(
+        axis=1) + offsets
+    if nvalues > nfull * blocksize:
+        start = nfull * blocksize
+        imin = np.append(imin, minvalues[start:].argmin() + start)
+        imax = np.append(imax, maxvalues[start:].argmax() + start)
+    return imin, imax
+
+
+class MinMaxPyramid(object):
+    """
+    Block minima and maxima of 1-D data at strides base * FACTOR**level
+
+    Built in one pass over the data, which may be given in chunks of a
+    multiple of base samples.  Only the data given as an array is kept.
+
+    **Usage**::
+
+        >>> pyramid = MinMaxPyramid(np.asarray(signal))
+        >>> indices, values = pyramid.envelope(0, signal.size, 1000)
+
+    """
+
+    def __init__(self, data=None, chunks=None, base=BASE):
+        self.size = 0
+        self.base = base
+        # per level: (index of min, index of max, min values, max values)
+        self.levels = []
+        self._data = None
+        if data is not None:
+            chunks = [data]
+            self._data = data
+        pieces = []
+        for chunk in chunks or []:
+            chunk = np.asarray(chunk)
+            if self.size % base:
+                raise FdpError('Chunks must be multiples of {} samples'.
+                               format(base))
+            imin, imax = _block_extrema(chunk, chunk, base)
+            pieces.append((imin + self.size, imax + self.size,
+                           chunk[imin], chunk[imax]))
+            self.size += chunk.size
+        if not pieces:
+            return
+        self.levels.append(tuple(np.concatenate(arrays)
+                                 for arrays in zip(*pieces)))
+        while self.levels[-1][0].size > 1:
+            imin, imax, vmin, vmax = self.levels[-1]
+            pmin, pmax = _block_extrema(vmin, vmax, FACTOR)
+            self.levels.append((imin[pmin], imax[pmax],
+                                vmin[pmin], vmax[pmax]))
+
+    def blocksize(self, level):
+        'Samples per block at level'
+        return self.base * FACTOR**level
+
+    def envelope(self, start, stop, pixels):
+        """
+        Return (indices, values) of min/max points for samples start:stop
+
+        Points are in index order, with fewer than 2 * FACTOR per pixel.
+        If the range has few samples and the data was given, all samples
+        in the range are returned.
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), self.size)
+        if stop <= start:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        nsamples = stop - start
+        pixels = max(int(pixels), 1)
+        if nsamples <= 2 * pixels * self.base and self._data is not None:
+            indices = np.arange(start, stop)
+            return indices, np.asarray(self._data[start:stop])
+        level = 0
+        while level + 1 < len(self.levels) and \
+                self.blocksize(level + 1) * pixels <= nsamples:
+            level += 1
+        blocksize = self.blocksize(level)
+        imin, imax, vmin, vmax = self.levels[level]
+        first = start // blocksize
+        last = (stop - 1) // blocksize + 1
+        imin, imax = imin[first:last], imax[first:last]
+        vmin, vmax = vmin[first:last], vmax[first:last]
+        # min and max of each block, in index order
+        minfirst = imin <= imax
+        indices = np.empty(2 * imin.size, dtype=imin.dtype)
+        values = np.empty(2 * imin.size, dtype=vmin.dtype)
+        indices[0::2] = np.where(minfirst, imin, imax)
+        indices[1::2] = np.where(minfirst, imax, imin)
+        values[0::2] = np.where(minfirst, vmin, vmax)
+        values[1::2] = np.where(minfirst, vmax, vmin)
+        return indices, values
+
+
+def get_pyramid(signal):
+    """
+    Return MinMaxPyramid for a 1-D signal, cached on the signal
+    """
+    pyramid = signal.__dict__.get('_pyramid')
+    if pyramid is None or pyramid.size != signal.size:
+        pyramid = MinMaxPyramid(np.asarray(signal[:]))
+        signal._pyramid = pyramid
+    return pyramid
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+render.py - batch rendering of shot overview figures
+
+**Classes**
+
+* OverviewRenderer - prefetch signals for many shots and render one PNG
+  overview per shot in a process pool
+
+**Functions**
+
+* resolve_panels - signals in a shot for a dotted panel spec
+
+Signals for batches of shots are loaded concurrently with
+Machine.fetch().  Each panel is reduced to a min/max envelope of about one
+point per pixel in the main process, and the shot is then released.  Only
+these short arrays are sent to worker processes, which draw with the Agg
+backend and no pyplot state.
+
+Created on Sun Oct 18 21:02:48 2026
+
+@author: ktritz
+"""
+from __future__ import division
+import os
+import time
+import multiprocessing
+from fnmatch import fnmatchcase
+from warnings import warn
+import numpy as np
+from .pyramid import get_pyramid
+from .fdp_globals import FdpError, FdpWarning, VERBOSE
+
+
+def resolve_panels(shot, spec):
+    """
+    Return signals in shot for a dotted spec, one per panel
+
+    A spec names a signal ('magnetics.highn.highn_1'), a container
+    ('bes', for all signals in the container), or signals matching
+    wildcards in the last branch ('bes.ch0?').
+    """
+    branches = spec.split('.')
+    obj = shot
+    for branch in branches[:-1]:
+        obj = getattr(obj, branch)
+    last = branches[-1]
+    if any(char in last for char in '*?['):
+        return [obj._signals[name] for name in sorted(obj._signals.keys())
+                if fnmatchcase(name, last)]
+    obj = getattr(obj, last)
+    if obj._is_container():
+        return [obj._signals[name] for name in sorted(obj._signals.keys())]
+    return [obj]
+
+
+def _fetch_pattern(shot, spec):
+    # Machine.fetch() pattern for spec, only direct signals of containers
+    branches = spec.split('.')
+    if any(char in branches[-1] for char in '*?['):
+        return spec
+    obj = shot
+    for branch in branches:
+        obj = getattr(obj, branch)
+    if obj._is_container():
+        return spec + '.*'
+    return spec
+
+
+def _render_figure(job):
+    # draw one overview figure with Agg, returns (filename, seconds)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    t0 = time.time()
+    panels = job['panels']
+    ncols = min(job['ncols'], max(len(panels), 1))
+    nrows = max((len(panels) + ncols - 1) // ncols, 1)
+    width, height = job['panelsize']
+    fig = Figure(figsize=(width * ncols, height * nrows))
+    FigureCanvasAgg(fig)
+    for index, panel in enumerate(panels):
+        ax = fig.add_subplot(nrows, ncols, index + 1)
+        ax.plot(panel['x'], panel['y'], linewidth=0.5)
+        ax.set_title(panel['title'], fontsize='small')
+        ax.set_xlabel(panel['xlabel'], fontsize='small')
+        ax.set_ylabel(panel['ylabel'], fontsize='small')
+        ax.tick_params(labelsize='x-small')
+        if job['xlim'] is not None:
+            ax.set_xlim(*job['xlim'])
+    fig.suptitle(job['title'])
+    fig.tight_layout(rect=(0, 0, 1, 0.97))
+    fig.savefig(job['filename'], dpi=job['dpi'])
+    return job['filename'], time.time() - t0
+
+
+class OverviewRenderer(object):
+    """
+    Render PNG overview figures, one per shot, for a list of panel specs
+
+    **Usage**::
+
+        >>> renderer = OverviewRenderer(nstxu, ['magnetics.highn.highn_1',
+        ...                                     'bes.ch0?', 'mpts'],
+        ...                             path='overviews', tmax=1.2)
+        >>> timings = renderer.render(nstxu.get_shotlist(date=20161006))
+
+    Parameters
+    ==========
+    machine : fdp machine
+    specs : list of str
+        Panel specs, see resolve_panels().
+    path : str, optional
+        Output directory.  Files are named <shot>.png.
+    ncols : int, optional
+        Panels per row.  Defaults to 3.
+    panelsize : tuple, optional
+        Panel (width, height) in inches.  Defaults to (4, 2.5).
+    dpi : int, optional
+        Defaults to 100.
+    tmin, tmax : float, optional
+        Time range of panels in s.  Defaults to full signals.
+    workers : int, optional
+        Threads for concurrent MDS loads.  Defaults to 4.
+    batchsize : int, optional
+        Shots loaded together.  Defaults to 8.
+    processes : int, optional
+        Render processes.  Defaults to the number of CPUs; 0 renders in
+        this process.
+
+    Attributes
+    ==========
+    timings : list of dicts with shot, filename, panels, and prepare and
+        render times in s, one per figure
+    fetchtime : time in s to load data for all shots
+    """
+
+    def __init__(self, machine, specs, path='.', ncols=3, panelsize=(4, 2.5),
+                 dpi=100, tmin=None, tmax=None, workers=4, batchsize=8,
+                 processes=None, verbose=False):
+        if not isinstance(specs, (list, tuple)):
+            specs = [specs]
+        self.machine = machine
+        self.specs = list(specs)
+        self.path = path
+        self.ncols = ncols
+        self.panelsize = panelsize
+        self.dpi = dpi
+        self.tmin = tmin
+        self.tmax = tmax
+        self.workers = workers
+        self.batchsize = batchsize
+        self.processes = processes
+        self.verbose = verbose
+        self.timings = []
+        self.fetchtime = None
+
+    def _get_shot(self, shot):
+        return getattr(self.machine, 's{}'.format(int(shot)))
+
+    def fetch(self, shots):
+        """
+        Load panel signals for shots concurrently
+        """
+        t0 = time.time()
+        first = self._get_shot(shots[0])
+        patterns = [_fetch_pattern(first, spec) for spec in self.specs]
+        fetchset = self.machine.fetch(shots, patterns, workers=self.workers,
+                                      verbose=self.verbose)
+        for future in fetchset:
+            # surface load errors
+            future.result()
+        fetchtime = time.time() - t0
+        self.fetchtime = (self.fetchtime or 0) + fetchtime
+        if self.verbose or VERBOSE:
+            print('render: loaded {} signals for {} shots in {:.2f} s'.format(
+                fetchset.nsignals, len(shots), fetchtime))
+
+    def _panel(self, signal):
+        # envelope of one signal, about one min/max pair per pixel
+        signal[:]
+        if signal.ndim != 1 or signal.size == 0:
+            warn('Skipping panel for {} signal {}'.format(
+                'empty' if signal.size == 0 else '{}-D'.format(signal.ndim),
+                signal._name), FdpWarning)
+            return None
+        xaxis = getattr(signal, signal.axes[0])
+        x = np.asarray(xaxis[:])
+        start, stop = 0, x.size
+        if self.tmin is not None:
+            start = np.searchsorted(x, self.tmin, side='left')
+        if self.tmax is not None:
+            stop = np.searchsorted(x, self.tmax, side='right')
+        pixels = int(self.panelsize[0] * self.dpi)
+        indices, values = get_pyramid(signal).envelope(start, stop, pixels)
+        return {'x': x[indices],
+                'y': values,
+                'title': '{} {}'.format(signal._parent._name.upper(),
+                                        signal._name),
+                'xlabel': '{} ({})'.format(xaxis._name, xaxis.units),
+                'ylabel': signal.units or ''}
+
+    def prepare(self, shot):
+        """
+        Return the render job for one shot, with panel envelopes
+        """
+        shotobj = self._get_shot(shot)
+        panels = []
+        for spec in self.specs:
+            for signal in resolve_panels(shotobj, spec):
+                panel = self._panel(signal)
+                if panel is not None:
+                    panels.append(panel)
+        xlim = None
+        if self.tmin is not None and self.tmax is not None:
+            xlim = (self.tmin, self.tmax)
+        return {'filename': os.path.join(self.path,
+                                         '{}.png'.format(shotobj.shot)),
+                'title': '{} shot {}'.format(self.machine._name.upper(),
+                                             shotobj.shot),
+                'panels': panels,
+                'ncols': self.ncols,
+                'panelsize': self.panelsize,
+                'dpi': self.dpi,
+                'xlim': xlim}
+
+    def release(self, shot, drop=True):
+        """
+        Drop pyramids of panel signals, and the shot from the machine
+        """
+        shotobj = self._get_shot(shot)
+        for spec in self.specs:
+            for signal in resolve_panels(shotobj, spec):
+                signal.__dict__.pop('_pyramid', None)
+        if drop:
+            self.machine._shots.pop(shotobj.shot, None)
+
+    def render(self, shots):
+        """
+        Fetch data and render one PNG per shot, returns timings
+        """
+        if not isinstance(shots, (list, tuple)):
+            try:
+                shots = list(shots)
+            except TypeError:
+                shots = [shots]
+        shots = [int(shot) for shot in shots]
+        if not shots:
+            raise FdpError('No shots to render')
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        processes = self.processes
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(processes) if processes else None
+        self.timings = []
+        self.fetchtime = 0
+        try:
+            results = []
+            for start in range(0, len(shots), self.batchsize):
+                batch = shots[start:start + self.batchsize]
+                # shots created for rendering are dropped after prepare()
+                created = [shot not in self.machine._shots for shot in batch]
+                self.fetch(batch)
+                for shot, drop in zip(batch, created):
+                    t0 = time.time()
+                    job = self.prepare(shot)
+                    self.release(shot, drop=drop)
+                    timing = {'shot': shot,
+                              'filename': job['filename'],
+                              'panels': len(job['panels']),
+                              'prepare': time.time() - t0}
+                    if pool is None:
+                        results.append(_render_figure(job))
+                    else:
+                        results.append(pool.apply_async(_render_figure,
+                                                        (job,)))
+                    self.timings.append(timing)
+            for timing, result in zip(self.timings, results):
+                if pool is not None:
+                    result = result.get()
+                timing['render'] = result[1]
+                if self.verbose or VERBOSE:
+                    print('render: {filename} with {panels} panels, '
+                          'prepare {prepare:.2f} s, render {render:.2f} s'.
+                          format(**timing))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return self.timings
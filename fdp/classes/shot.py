@@ -21,10 +21,9 @@ class Shot(MutableMapping):
         self._root = root
         self._parent = parent
         self._logbook = root._logbook
-        self._logbook_entries = []
-        self._modules = {module: None for module in root._get_modules()}
-        self.xp = self._get_xp()
-        self.date = self._get_date()
+        # logbook entries, xp and date are queried on first use
+        self._logbook_entries = None
+        self._modules = dict.fromkeys(root._get_modules())
         self._efits = []
 
     def __getattr__(self, attribute):
@@ -75,12 +74,25 @@ class Shot(MutableMapping):
     def __dir__(self):
         return self._modules.keys()
 
+    @property
+    def logbook_entries(self):
+        # list of logbook entries (dictionaries), queried on first use
+        if self._logbook_entries is None:
+            self._logbook_entries = self._logbook.get_entries(shot=self.shot)
+        return self._logbook_entries
+
+    @property
+    def xp(self):
+        return self._get_xp()
+
+    @property
+    def date(self):
+        return self._get_date()
+
     def _get_xp(self):
         # query logbook for XP, return XP (list if needed)
-        if not self._logbook_entries:
-            self._logbook_entries = self._logbook.get_entries(shot=self.shot)
         xplist = []
-        for entry in self._logbook_entries:
+        for entry in self.logbook_entries:
             if entry['xp']:
                 xplist.append(entry['xp'])
         if len(np.unique(xplist)) == 1:
@@ -91,20 +103,16 @@ class Shot(MutableMapping):
 
     def _get_date(self):
         # query logbook for rundate, return rundate
-        if not self._logbook_entries:
-            self._logbook_entries = self._logbook.get_entries(shot=self.shot)
         date = 0
-        if self._logbook_entries:
-            date = self._logbook_entries[0]['rundate']
+        if self.logbook_entries:
+            date = self.logbook_entries[0]['rundate']
         return date
 
     def logbook(self):
-        # return a list of logbook entries (dictionaries)
-        if not self._logbook_entries:
-            self._logbook_entries = self._logbook.get_entries(shot=self.shot)
-        if self._logbook_entries:
+        # print logbook entries
+        if self.logbook_entries:
             print('Logbook entries for {}'.format(self.shot))
-            for entry in self._logbook_entries:
+            for entry in self.logbook_entries:
                 print('************************************')
                 print(('{shot} on {rundate} in XP {xp}\n'
                        '{username} in topic {topic}\n\n'
@@ -113,6 +121,44 @@ class Shot(MutableMapping):
         else:
             print('No logbook entries for {}'.format(self.shot))
 
+    def prefetch(self, modules=None):
+        """
+        Load signals for diagnostic modules with batched MDSplus requests
+
+        **Usage**::
+
+            >>> nstxu.s204620.prefetch(['bes', 'magnetics.highn'])
+
+        """
+        if modules is None:
+            modules = list(self._modules.keys())
+        if not isinstance(modules, list):
+            modules = [modules]
+        signals = []
+        for module in modules:
+            obj = self
+            for branch in module.split('.'):
+                obj = getattr(obj, branch)
+            signals.extend(obj._get_pending_signals())
+        self._root._load_signals(signals)
+
+    def export(self, path, modules=None, compression=None):
+        """
+        Write signals to an HDF5 shot bundle for use without MDSplus
+
+        Listed modules are loaded first; without modules, all loaded
+        signals are written.  Datasets are memory-mapped when the bundle
+        is opened with fdp.open_local(path), unless written with
+        compression='gzip'.
+
+        **Usage**::
+
+            >>> nstxu.s204620.export('204620.h5', modules=['bes', 'mpts'])
+
+        """
+        from .local import export_shot
+        export_shot(self, path, modules=modules, compression=compression)
+
     def check_efit(self):
         if len(self._efits):
             return self._efits
@@ -124,11 +170,11 @@ class Shot(MutableMapping):
         tree_exists = []
         for tree in trees:
             data = None
-            connection = self._get_connection(self.shot, tree)
-            try:
-                data = connection.get('\{}::userid'.format(tree)).value
-            except:
-                pass
+            with self._get_connection(self.shot, tree) as connection:
+                try:
+                    data = connection.get('\{}::userid'.format(tree)).value
+                except:
+                    pass
             if data and data is not '*':
                 tree_exists.append(tree)
         self._efits = tree_exists
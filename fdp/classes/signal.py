@@ -79,6 +79,8 @@ class Signal(np.ndarray):
             else:
                 for key,val in objdict.iteritems():
                     setattr(self, key, val)
+            # plot envelopes describe obj data, not views of it
+            self.__dict__.pop('_pyramid', None)
 
             if '_fname' in objdict and objdict['_fname'] == 'transpose':
                 if objaxes is not None:
@@ -214,6 +216,10 @@ class Signal(np.ndarray):
             #print('      {}.__getitem__: self.shape is {}'.format(self._name, self.shape))
             #print('      {}.__getitem__: type(index) is {}'.format(self._name, type(index)))
 
+        if self._is_window(index):
+            # fetch only the requested window from the MDS server
+            return self._get_window(index)
+
         #This passes index to array_finalize after a new signal obj is created to assign axes
         def parseindex(index, dims):
              #format index to account for single elements and pad with appropriate slices.
@@ -265,13 +271,8 @@ class Signal(np.ndarray):
 
         if self._empty is True:
             # get MDSplus data
-            self._empty=False
             if VERBOSE: print('      {}.__getitem__: getting MDS data'.format(self._name))
-            data = self._root._get_mdsdata(self)
-            #print('      {}.__getitem__: resize'.format(self._name))
-            self.resize(data.shape, refcheck=False)
-            if VERBOSE: print('      {}.__getitem__: attaching MDS data'.format(self._name))
-            self[:] = data
+            self._load()
             if VERBOSE: print('      {}.__getitem__: end attaching MDS data'.format(self._name))
 
         if VERBOSE:
@@ -300,6 +301,66 @@ class Signal(np.ndarray):
         return retvalue
 
 
+    def _load(self):
+        # get MDSplus data and attach to signal, under the machine load
+        # lock so loader threads do not attach data at the same time
+        with self._root._load_lock:
+            if self._empty is not True:
+                return
+            if self._is_windowed() and self._root._load_chunked(self):
+                return
+            data = self._root._get_mdsdata(self)
+            self._set_data(data)
+
+    def _set_data(self, data):
+        # attach data array to empty signal, without Signal.__getitem__
+        # so an empty signal does not load itself during assignment
+        self._empty = False
+        self.__dict__.pop('_pyramid', None)
+        self.resize(data.shape, refcheck=False)
+        np.ndarray.__setitem__(self, Ellipsis, data)
+
+    def _is_windowed(self):
+        # empty 1-D signals can be subscripted on the MDS server
+        try:
+            return (self._empty is True and self.shot != 0 and
+                    getattr(self, '_transpose', None) is None and
+                    len(self.axes) <= 1 and
+                    not hasattr(self, '_postprocess'))
+        except (AttributeError, TypeError):
+            return False
+
+    def _is_window(self, index):
+        # explicit slice bounds, e.g. signal[1000:5000] or signal[0:10000:10]
+        if not isinstance(index, slice):
+            return False
+        start, stop, step = index.start, index.stop, index.step
+        if not isinstance(start, (int, long)) or \
+                not isinstance(stop, (int, long)) or \
+                not isinstance(step, (int, long, type(None))):
+            return False
+        if not 0 <= start < stop < sys.maxsize or (step or 1) < 1:
+            return False
+        return self._is_windowed()
+
+    def _get_window(self, index):
+        # new signal with window data and windowed axes, self stays empty
+        step = index.step or 1
+        data = self._root._get_mdsdata(self, window=(index.start, index.stop,
+                                                     step))
+        window = np.asarray(data).view(type(self))
+        axes = list(getattr(self, 'axes', []))
+        for key, value in self.__dict__.items():
+            if key not in axes and key not in ['_slic', '_fname', '_fargs',
+                                               '_fkwargs', '_pyramid']:
+                setattr(window, key, value)
+        window.axes = axes
+        window.point_axes = list(self.point_axes)
+        window._empty = False
+        for axis in axes:
+            setattr(window, axis, getattr(self, axis)[index])
+        return window
+
     def __getattr__(self, attribute):
         if attribute is '_parent' or self._parent is None:
             raise AttributeError("'{}' object has no attribute '{}'".format(
@@ -314,10 +375,7 @@ class Signal(np.ndarray):
 #        if VERBOSE:
 #            print('Called custom __repr__')
         if self._empty is True:
-            data = self._root._get_mdsdata(self)
-            self.resize(data.shape, refcheck=False)
-            self[:] = data
-            self._empty=False
+            self._load()
         return super(Signal,self).__repr__()
         #return np.asarray(self).__repr__()
 
@@ -325,10 +383,7 @@ class Signal(np.ndarray):
 #        if VERBOSE:
 #            print('Called custom __str__')
         if self._empty is True:
-            data = self._root._get_mdsdata(self)
-            self.resize(data.shape, refcheck=False)
-            self[:] = data
-            self._empty=False
+            self._load()
         return super(Signal,self).__str__()
         #return np.asarray(self).__str__()
 
@@ -346,26 +401,46 @@ class Signal(np.ndarray):
             print('      {}.__getslice__'.format(self._name))
         return self.__getitem__(slice(start, stop))
 
-    def __call__(self, **kwargs):
+    def __call__(self, stride=None, **kwargs):
+        """
+        Slice signal by axis values, e.g. signal(time=(0.2, 0.21))
+
+        For empty 1-D signals, only the requested window (every stride-th
+        sample) is fetched from the MDS server.
+        """
         try:
             slc = [slice(None)] * len(self.axes)
         except TypeError:
             print('No axes present for signal {}.'.format(self._name))
             return None
+        if stride is not None and slc:
+            slc[0] = slice(None, None, stride)
         for kwarg, values in kwargs.items():
             if kwarg not in self.axes:
                 print('      {} is not a valid axis.'.format(kwarg))
                 raise TypeError
             axis = self.axes.index(kwarg)
             axis_value = getattr(self, kwarg)
+            axis_stride = stride if axis == 0 else None
             try:
-                axis_inds = [np.abs(value-axis_value[:]).argmin()
+                if len(slc) == 1 and self._is_windowed() and \
+                        getattr(axis_value, '_empty', False) is True:
+                    # look up window indices on the MDS server
+                    axis_inds = self._root._get_mdsindex(axis_value, values)
+                    if axis_inds is not None:
+                        slc[axis] = slice(axis_inds[0], axis_inds[1],
+                                          axis_stride)
+                        continue
+                axis_inds = [int(np.abs(value-axis_value[:]).argmin())
                              for value in values]
-                slc[axis] = slice(axis_inds[0], axis_inds[1])
+                slc[axis] = slice(axis_inds[0], axis_inds[1], axis_stride)
             except TypeError:
                 axis_ind = np.abs(values-axis_value[:]).argmin()
                 #axis_inds = [axis_ind, axis_ind+1]
                 slc[axis] = axis_ind
+        if len(slc) == 1:
+            # plain slice allows server-side windowing
+            return self[slc[0]]
         return self[tuple(slc)]
 
     def __nonzero__(self):
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+welch.py - streaming Welch spectral estimates for long records
+
+**Classes**
+
+* WelchEstimator - running PSD, CSD and coherence from chunks of data
+
+**Functions**
+
+* signal_chunks - iterate over a time window of signals in chunks
+
+Chunks are transformed as they arrive, and only the summed segment
+spectra and a carry buffer of less than one segment per channel are kept,
+so memory does not grow with record length.  Segments do not span record
+boundaries, so records from several shots can be combined in one estimate.
+
+Created on Sun Oct 18 19:20:44 2026
+
+@author: ktritz
+"""
+from __future__ import division
+import numpy as np
+from .crosssignal import spectral_segments, onesided
+from .fdp_globals import FdpError, CHUNK_SIZE
+
+
+def _time_indices(signal, tmin, tmax):
+    # [start, stop) sample indices of signal between tmin and tmax
+    time = signal.time
+    root = getattr(signal, '_root', None)
+    if root is not None and signal._is_windowed() and \
+            getattr(time, '_empty', False) is True:
+        # look up indices on the MDS server, without loading the time axis
+        indices = root._get_mdsindex(time, (tmin, tmax))
+        if indices is not None:
+            return indices[0], indices[1] + 1
+    time = np.asarray(time[:])
+    return (int(np.searchsorted(time, tmin, side='left')),
+            int(np.searchsorted(time, tmax, side='right')))
+
+
+def signal_chunks(signals, tmin=0.2, tmax=1.0, chunksize=CHUNK_SIZE):
+    """
+    Iterate over data(channel, sample) chunks of signals from tmin to tmax
+
+    Unloaded signals are read window by window from the MDS server, so the
+    full records are never held in memory.  Yields (time0, data), with
+    time0 the time of the first sample in the chunk.
+    """
+    signals = list(signals)
+    start, stop = _time_indices(signals[0], tmin, tmax)
+    for chunkstart in range(start, stop, chunksize):
+        chunkstop = min(chunkstart + chunksize, stop)
+        data = np.array([np.asarray(signal[chunkstart:chunkstop],
+                                    dtype=float) for signal in signals])
+        time0 = float(signals[0].time[chunkstart:chunkstart + 1][0])
+        yield time0, data
+
+
+class WelchEstimator(object):
+    """
+    WelchEstimator class
+
+    Accumulates Welch estimates of auto and cross spectral densities from
+    chunks of multi-channel data.  Segments overlap by 50% and are windowed
+    and transformed as in CrossSpectralMatrix.  Results are available at
+    any time and cover all complete segments received so far.
+
+    **Usage**::
+
+        >>> welch = WelchEstimator(nperseg=1024)
+        >>> for shot in [204620, 204621]:
+        ...     bes = nstxu.s(shot).bes
+        ...     welch.add_signals([bes.ch01, bes.ch02], tmin=0.2, tmax=1.0)
+        >>> welch.coherence[:, 0, 1]
+
+    Parameters
+    ==========
+    nperseg : int, optional
+        Samples per segment.  Defaults to 256.
+    fs : float, optional
+        Sampling frequency in Hz.  Defaults to the sampling rate of the
+        first signals added.
+    window : str, tuple, or array, optional
+        Window for each segment.  Defaults to 'hann'.
+    offsetdc : bool, optional
+        Remove the mean of each segment.  Defaults to False.
+    cross : bool, optional
+        Accumulate cross spectral densities of all channel pairs.  Defaults
+        to True; with False, only auto spectral densities are kept.
+    degrees : bool, optional
+        Cross phase in degrees.  Defaults to True.
+
+    Attributes
+    ==========
+    freqs : frequency array [kHz]
+    nsegments : number of segments in the estimate
+    asd : auto spectral density asd(freq, channel)
+    csd : complex cross spectral density csd(freq, channel, channel)
+    crosspower, crossphase, mscoherence, coherence : (freq, channel,
+        channel)
+    """
+
+    def __init__(self, nperseg=256, fs=None, window='hann', offsetdc=False,
+                 cross=True, degrees=True):
+        self.nperseg = nperseg
+        self.fSample = fs
+        self.window = window
+        self.detrend = 'constant' if offsetdc else False
+        self.cross = cross
+        self.degrees = degrees
+        if not isinstance(window, (str, tuple)):
+            self.nperseg = np.asarray(window).size
+        self.step = self.nperseg - self.nperseg // 2
+        self.reset()
+
+    def reset(self):
+        'Discard all accumulated segments'
+
+        self.nchannels = None
+        self.nsegments = 0
+        self.nsamples = 0
+        self.times = []
+        self._carry = None
+        self._carrytime = None
+        self._asdsum = None
+        self._csdsum = None
+        self._scale = None
+        self._freqs = None
+
+    def new_record(self):
+        'Drop carried samples, so segments do not span records'
+
+        self._carry = None
+        self._carrytime = None
+
+    def update(self, data, time0=None):
+        """
+        Add the next chunk of data(channel, sample) to the estimate
+
+        1-D data is treated as a single channel.  time0 is the time of the
+        first sample, used for segment times.  Returns self.
+        """
+
+        if self.fSample is None:
+            raise FdpError('Sampling frequency is not set')
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+        if self.nchannels is None:
+            self.nchannels = data.shape[0]
+        elif data.shape[0] != self.nchannels:
+            raise FdpError('Expected {} channels, not {}'.format(
+                self.nchannels, data.shape[0]))
+        self.nsamples += data.shape[1]
+        if self._carry is not None:
+            time0 = self._carrytime
+            data = np.concatenate((self._carry, data), axis=1)
+        nseg = max((data.shape[1] - self.nperseg) // self.step + 1, 0)
+        if nseg:
+            self._accumulate(data[:, :(nseg - 1) * self.step + self.nperseg],
+                             time0)
+        # keep samples of the next, incomplete segment
+        self._carry = data[:, nseg * self.step:].copy()
+        if time0 is not None:
+            self._carrytime = time0 + nseg * self.step / self.fSample
+        return self
+
+    def _accumulate(self, data, time0):
+        freqs, times, spectra, scale = spectral_segments(
+                data,
+                self.fSample,
+                window=self.window,
+                nperseg=self.nperseg,
+                detrend=self.detrend
+            )
+        if self._asdsum is None:
+            self._freqs = freqs
+            self._scale = scale
+            self._asdsum = np.zeros((freqs.size, self.nchannels))
+            if self.cross:
+                self._csdsum = np.zeros((freqs.size, self.nchannels,
+                                         self.nchannels), dtype=complex)
+        self._asdsum += np.sum(np.square(np.absolute(spectra)), axis=0)
+        if self.cross:
+            self._csdsum += np.einsum('sfi,sfj->fij', np.conj(spectra),
+                                      spectra)
+        self.nsegments += spectra.shape[0]
+        if time0 is not None:
+            self.times.extend(times + time0)
+
+    def add_signals(self, signals, tmin=0.2, tmax=1.0, chunksize=CHUNK_SIZE):
+        """
+        Add signals (one record) from tmin to tmax, read in chunks
+
+        Returns self.
+        """
+
+        for _ in self.iter_signals(signals, tmin=tmin, tmax=tmax,
+                                   chunksize=chunksize):
+            pass
+        return self
+
+    def iter_signals(self, signals, tmin=0.2, tmax=1.0, chunksize=CHUNK_SIZE):
+        """
+        Add signals (one record) from tmin to tmax, yielding the estimator
+        after each chunk for partial results
+        """
+
+        signals = list(signals)
+        if not signals:
+            raise FdpError('No signals for WelchEstimator')
+        if tmax > 10:
+            # assume ms input and convert to s
+            tmin = tmin / 1e3
+            tmax = tmax / 1e3
+        start, _ = _time_indices(signals[0], tmin, tmax)
+        time = np.asarray(signals[0].time[start:start + 1000])
+        fs = 1 / np.mean(np.diff(time))
+        if self.fSample is None:
+            self.fSample = fs
+        elif abs(fs - self.fSample) >= 1e-3 * self.fSample:
+            raise FdpError('Signals are not sampled at {} Hz'.format(
+                self.fSample))
+        self.new_record()
+        for time0, data in signal_chunks(signals, tmin=tmin, tmax=tmax,
+                                         chunksize=chunksize):
+            yield self.update(data, time0=time0)
+        self.new_record()
+
+    def _check(self):
+        if not self.nsegments:
+            raise FdpError('No complete segments in WelchEstimator')
+
+    @property
+    def freqs(self):
+        self._check()
+        return self._freqs / 1000
+
+    @property
+    def asd(self):
+        self._check()
+        return onesided(self._scale * self._asdsum / self.nsegments,
+                        self.nperseg)
+
+    @property
+    def csd(self):
+        self._check()
+        if not self.cross:
+            raise FdpError('Cross spectra are not accumulated')
+        return onesided(self._scale * self._csdsum / self.nsegments,
+                        self.nperseg)
+
+    @property
+    def crosspower(self):
+        return np.absolute(self.csd)
+
+    @property
+    def crossphase(self):
+        crossphase = np.angle(self.csd)
+        if self.degrees:
+            crossphase = np.rad2deg(crossphase)
+        return crossphase
+
+    @property
+    def mscoherence(self):
+        asd = self.asd
+        return (np.square(self.crosspower) /
+                (asd[:, :, np.newaxis] * asd[:, np.newaxis, :]))
+
+    @property
+    def coherence(self):
+        return np.sqrt(self.mscoherence)
+
+    @property
+    def minsig_coherence(self):
+        self._check()
+        if self.nsegments == 1:
+            return 1
+        return np.sqrt(1 - 0.05**(1 / (self.nsegments - 1)))
@@ -12,8 +12,8 @@ from .plot import plot
 from ._netcat import _netcat
 from .utilities import listSignals, listMethods, listContainers, listAttributes
 from .info import info
-from .fft import fft, plotfft
+from .fft import fft, multifft, plotfft
 
 __all__ = ['plot', '_netcat', 'listSignals', 'listMethods', 
            'listContainers', 'listAttributes', 'info',
-           'fft', 'plotfft']
+           'fft', 'multifft', 'plotfft']
@@ -11,7 +11,7 @@ import matplotlib.pyplot as plt
 
 from fdp.classes.utilities import isSignal, isContainer
 from fdp.classes.fdp_globals import FdpWarning
-from fdp.classes.fft import Fft
+from fdp.classes.fft import Fft, MultiFft, group_by_time
 from . import utilities as UT
 
 def fft(obj, *args, **kwargs):
@@ -30,6 +30,23 @@ def fft(obj, *args, **kwargs):
             ffts.append(Fft(signal, *args, **kwargs))
         return ffts
 
+def multifft(obj, *args, **kwargs):
+    """
+    Calculate FFTs for all signals in container, transformed together.
+    Return MultiFft instance from classes/fft.py, or list of MultiFft
+    instances if signals have different time axes.
+    """
+    if not isContainer(obj):
+        warn("Method valid only at container-level", FdpWarning)
+        return
+    obj.load()
+    signals = sorted(obj._signals.values(), key=lambda sig: sig._name.lower())
+    ffts = [MultiFft(group, *args, **kwargs)
+            for group in group_by_time(signals)]
+    if len(ffts) == 1:
+        return ffts[0]
+    return ffts
+
 def plotfft(signal, fmax=None, *args, **kwargs):
     """
     Plot spectrogram
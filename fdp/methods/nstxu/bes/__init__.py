@@ -16,14 +16,14 @@ configuration with channels 1-8 spanning the radial range R = 129-146 cm.
 """
 
 from .gui import gui
-from .fft import fft, plotfft, powerspectrum
+from .fft import fft, multifft, plotfft, powerspectrum
 from .animation import animate
 from .configuration import loadConfig
 from .crosspower import plotcrosspower, plotcrossphase, plotcoherence
-from .crosspower import crosssignal, plotcorrelation
+from .crosspower import crosssignal, plotcorrelation, crossspectralmatrix
 
-__all__ = ['fft', 'plotfft', 'powerspectrum',
+__all__ = ['fft', 'multifft', 'plotfft', 'powerspectrum',
            'animate', 'loadConfig',
            'gui',
            'crosssignal','plotcrosspower', 'plotcoherence', 'plotcrossphase',
-           'plotcorrelation']
+           'plotcorrelation', 'crossspectralmatrix']
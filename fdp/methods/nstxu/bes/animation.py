@@ -5,18 +5,53 @@ Created on Fri Apr 15 15:32:52 2016
 @author: drsmith
 """
 
-import gc
-
 import numpy as np
 import scipy.signal
-import scipy.interpolate
+import scipy.sparse
 from matplotlib import animation
 import matplotlib.pyplot as plt
 
 from fdp.classes.fdp_globals import FdpError
 from fdp.classes.utilities import isContainer
+from fdp.classes.filters import bandpass
 from . import utilities as UT
 
+def bilinear_weights(xgrid, ygrid, xnew, ynew):
+    """
+    Sparse matrix of bilinear interpolation weights
+
+    Maps data(len(ygrid), len(xgrid)), flattened, to interpolated
+    data(len(ynew), len(xnew)), flattened, with nearest-neighbor
+    extrapolation as in scipy.interpolate.interp2d.
+    """
+    def axis_weights(grid, new):
+        # lower grid index and weight of upper neighbor for each new point
+        new = np.clip(new, grid[0], grid[-1])
+        lower = np.clip(np.searchsorted(grid, new, side='right') - 1,
+                        0, grid.size - 2)
+        weight = (new - grid[lower]) / (grid[lower+1] - grid[lower])
+        return lower, weight
+    xlower, xweight = axis_weights(np.asarray(xgrid, dtype=float),
+                                   np.asarray(xnew, dtype=float))
+    ylower, yweight = axis_weights(np.asarray(ygrid, dtype=float),
+                                   np.asarray(ynew, dtype=float))
+    nx = len(xgrid)
+    # output points (ynew, xnew), each with 4 neighbors
+    yl, xl = np.meshgrid(ylower, xlower, indexing='ij')
+    yw, xw = np.meshgrid(yweight, xweight, indexing='ij')
+    rows = np.repeat(np.arange(yl.size), 4)
+    columns = np.column_stack([(yl*nx + xl).ravel(),
+                               (yl*nx + xl+1).ravel(),
+                               ((yl+1)*nx + xl).ravel(),
+                               ((yl+1)*nx + xl+1).ravel()]).ravel()
+    weights = np.column_stack([((1-yw)*(1-xw)).ravel(),
+                               ((1-yw)*xw).ravel(),
+                               (yw*(1-xw)).ravel(),
+                               (yw*xw).ravel()]).ravel()
+    return scipy.sparse.csr_matrix((weights, (rows, columns)),
+                                   shape=(yl.size, nx*len(ygrid)))
+
+
 def animate(*args, **kwargs):
     """Plot 2D signals"""
     return Animation(*args, **kwargs)
@@ -30,7 +65,10 @@ class Animation(object):
                  tmin=0.0, tmax=5.0,
                  savemovie=False,
                  hightimeres=False,
-                 saveeps = False):
+                 saveeps = False,
+                 fmin=None, fmax=None,
+                 blit=True,
+                 grid=False):
         
         if not isContainer(container):
             raise FdpError("Use at container level, not signal level")
@@ -44,6 +82,11 @@ class Animation(object):
         self.hightimeres = hightimeres
         self.saveeps = saveeps
         self.savemovie = savemovie
+        self.blit = blit
+        self.grid = grid
+        # zero-phase band-pass filter limits in kHz
+        self.fmin = fmin
+        self.fmax = fmax
         
         self.signals = None
         self.data = None
@@ -57,6 +100,7 @@ class Animation(object):
         self.fdata = None
         self.ftime = None
         self.cdata = None
+        self.gdata = None
         
         self.getSignals()
         self.loadConfig()
@@ -64,7 +108,8 @@ class Animation(object):
         self.loadData()
         self.applyNormalization()
         self.filterData()
-        #self.gridData()
+        if self.grid:
+            self.gridData()
         self.makeAnimation()
         if self.savemovie:
             self.saveAnimationVideo()
@@ -101,31 +146,36 @@ class Animation(object):
             self.datamask[row-1,column-1] = True
         
     def applyNormalization(self):
-        nrow,ncol,_ = self.data.shape
-        # column-wise normalization factor
-        self.colcal = np.zeros((ncol,))
-        for col in np.arange(ncol):
-            rowmask = self.datamask[:,col]
-            if not rowmask.any():
-                continue
-            self.colcal[col] = np.mean(self.data[rowmask.nonzero(),col,0:self.ntime/20])
-        # boxcar filter column-wise normalization factor
-        tmp = self.colcal.copy()
-        for col in np.arange(ncol):
-            if col==0 or col==ncol-1:
-                continue
-            d = self.colcal[col-1:col+2]
-            if np.count_nonzero(d)!=3:
-                continue
-            tmp[col] = np.mean(d)
-        self.colcal = tmp.copy()
+        # channel means over the first 5% of the time window
+        chanmean = np.mean(self.data[:,:,0:self.ntime//20], axis=2)
+        # column-wise normalization factor, from channels present
+        self.colcal = np.ma.masked_array(chanmean,
+                                         mask=~self.datamask).mean(axis=0)
+        self.colcal = self.colcal.filled(0.)
+        # boxcar filter column-wise normalization factor, for interior
+        # columns with three nonzero factors
+        boxcar = np.array([self.colcal[:-2],
+                           self.colcal[1:-1],
+                           self.colcal[2:]])
+        valid = np.all(boxcar!=0, axis=0)
+        self.colcal[1:-1] = np.where(valid, boxcar.mean(axis=0),
+                                     self.colcal[1:-1])
         # apply normalization to data array
-        for row in np.arange(nrow):
-            for col in np.arange(ncol):
-                if self.datamask[row,col]:
-                    self.data[row,col,:] = self.data[row,col,:] * self.colcal[col] / np.mean(self.data[row,col,0:self.ntime/20])
+        rows, cols = np.nonzero(self.datamask)
+        scale = self.colcal[cols] / chanmean[rows,cols]
+        self.data[rows,cols,:] *= scale[:,np.newaxis]
         
     def filterData(self):
+        if self.fmin is not None or self.fmax is not None:
+            # band-pass all channels in one batch
+            fs = 1/np.mean(np.diff(np.asarray(self.time[0:10000])))
+            fmin = self.fmin*1e3 if self.fmin is not None else None
+            fmax = self.fmax*1e3 if self.fmax is not None else None
+            self.fdata = self.data.copy()
+            self.fdata[self.datamask] = bandpass(self.data[self.datamask],
+                                                 fs, fmin=fmin, fmax=fmax)
+            self.ftime = self.time
+            return
         self.filter = scipy.signal.daub(4)
         self.filter = self.filter/np.sum(self.filter)
         self.fdata = scipy.signal.lfilter(self.filter, [1], 
@@ -136,25 +186,15 @@ class Animation(object):
         self.ftime = self.time
         
     def gridData(self):
-        nrad = 9
-        npol = 7
+        # bilinear interpolation of all frames with one sparse product
+        npol,nrad,ntime = self.fdata.shape
         rgrid = np.arange(1,nrad+1)
         pgrid = np.arange(1,npol+1)
-        rr,pp = np.meshgrid(rgrid, pgrid)
-        print(pp.shape)
-        rnew = np.arange(0.5,nrad+0.51,0.25)
-        pnew = np.arange(0.5,npol+0.51,0.25)
-        self.gdata = np.zeros((pnew.size,rnew.size,self.ftime.size))
-        print('starting interpolation')
-        for i in np.arange(self.ftime.size):
-            if i!=0 and np.mod(i+1,100)==0:
-                print('  frame {} of {}'.format(i+1,self.ftime.size))
-            f = scipy.interpolate.interp2d(rr,
-                                           pp,
-                                           self.fdata[:,:,i].squeeze(),
-                                           kind='linear')
-            self.gdata[:,:,i] = f(rnew,pnew)
-        
+        self.rnew = np.arange(0.5,nrad+0.51,0.25)
+        self.pnew = np.arange(0.5,npol+0.51,0.25)
+        weights = bilinear_weights(rgrid, pgrid, self.rnew, self.pnew)
+        self.gdata = weights.dot(self.fdata.reshape(npol*nrad,ntime))
+        self.gdata = self.gdata.reshape(self.pnew.size,self.rnew.size,ntime)
         
     def plotContourf(self, axes=None, index=None):
         return axes.contourf(np.arange(1,10.1),
@@ -163,18 +203,32 @@ class Animation(object):
                              cmap=plt.cm.YlGnBu)
                            
     def plotPColorMesh(self, axes=None, index=None):
+        if self.grid:
+            # cells centered on the interpolation points, in the channel
+            # cells of the ungridded mesh
+            redges = np.append(self.rnew, self.rnew[-1]+0.25) + 0.375
+            pedges = np.append(self.pnew, self.pnew[-1]+0.25) + 0.375
+            return axes.pcolormesh(redges,
+                                   pedges,
+                                   self.frameData(index),
+                                   cmap=plt.cm.YlGnBu)
         return axes.pcolormesh(np.arange(1,10.1),
                                np.arange(1,8.1),
-                               self.fdata[::-1,:,index],
+                               self.frameData(index),
                                cmap=plt.cm.YlGnBu)
+
+    def frameData(self, index):
+        # mesh colors of a frame, from gdata if grid=True
+        if self.grid:
+            return self.gdata[::-1,:,index]
+        return self.fdata[::-1,:,index]
         
     def makeAnimation(self):
-        ims = []
         if self.hightimeres:
-            frameint = 2
+            self.frameint = 2
         else:
-            frameint = 40
-        nframes = np.int(self.ftime.size/frameint)
+            self.frameint = 40
+        self.nframes = max(np.int(self.ftime.size/self.frameint), 1)
         self.fig = plt.figure(figsize=(6.4,7))
         ax1 = self.fig.add_subplot(2,1,1)
         ax1.set_xlabel('Radial channels')
@@ -185,85 +239,76 @@ class Animation(object):
         ax2.set_xlabel('Time (ms)')
         ax2.set_ylabel('Signal (V)')
         self.fig.subplots_adjust(hspace=0.38)
-        print('starting frame loop with {} frames'.format(nframes))
-        clim = [np.amin(self.fdata), np.amax(self.fdata)]
-        for i in np.arange(nframes):
-            if i!=0 and np.mod(i+1,20)==0:
-                print('  frame {} of {}'.format(i+1,nframes))
-            #im = self.plotContourf(axes=ax1, index=i*frameint)
-            im = self.plotPColorMesh(axes=ax1, index=i*frameint)
-            im.set_clim(clim)
-            if i==0:
-                cb = plt.colorbar(im, ax=ax1)
-                cb.set_label('Signal (V)')
-                cb.draw_all()
-            pt = ax2.plot(self.ftime*1e3, self.fdata[0,1,:], 'b',
-                          self.ftime*1e3, self.fdata[4,1,:], 'g',
-                          self.ftime*1e3, self.fdata[0,6,:], 'c',
-                          self.ftime*1e3, self.fdata[5,6,:], 'm')
-            ax2.get_xaxis().get_major_formatter().set_useOffset(False)
-            ax1_title = ax1.annotate('BES | {} | t={:.3f} ms'.format(
-                self.shot,
-                self.ftime[i*frameint]*1e3),
-                xy=(0.5, 1.04), 
-                xycoords='axes fraction',
-                horizontalalignment ='center',
-                size='large')
-            ln = ax2.plot(np.ones(2)*self.ftime[i*frameint]*1e3,
-                          ax2.get_ylim(), 
-                          'r')
-            an_l0 = ax2.annotate('Core Top',
-                                  xy=(self.ftime[0]*1e3+0.01,
-                                      self.fdata[0,1,15]+0.6),
-                                  color='b')
-            an_l1 = ax2.annotate('Core Bottom',
-                                  xy=(self.ftime[0]*1e3+0.01,
-                                      self.fdata[4,1,15]-0.6),
-                                  color='g')
-            an_l2 = ax2.annotate('SOL Top',
-                                  xy=(self.ftime[0]*1e3+0.01,
-                                      self.fdata[0,6,15]+0.6),
-                                  color='c')
-            an_l3 = ax2.annotate('SOL Bottom',
-                                  xy=(self.ftime[0]*1e3+0.01,
-                                      self.fdata[5,6,15]-0.6),
-                                  color='m')
-            ax2_title = ax2.annotate('BES | {}'.format(self.shot),
-                xy=(0.5, 1.04), 
-                xycoords='axes fraction',
-                horizontalalignment ='center',
-                size='large')
-            plt.draw()
-            if self.saveeps:
+        # artists are created once, and updateFrame() changes the mesh
+        # data, time label and cursor
+        meshdata = self.gdata if self.grid else self.fdata
+        clim = [np.amin(meshdata), np.amax(meshdata)]
+        self.mesh = self.plotPColorMesh(axes=ax1, index=0)
+        self.mesh.set_clim(clim)
+        cb = self.fig.colorbar(self.mesh, ax=ax1)
+        cb.set_label('Signal (V)')
+        ax2.plot(self.ftime*1e3, self.fdata[0,1,:], 'b',
+                 self.ftime*1e3, self.fdata[4,1,:], 'g',
+                 self.ftime*1e3, self.fdata[0,6,:], 'c',
+                 self.ftime*1e3, self.fdata[5,6,:], 'm')
+        ax2.get_xaxis().get_major_formatter().set_useOffset(False)
+        ax2.annotate('Core Top',
+                     xy=(self.ftime[0]*1e3+0.01, self.fdata[0,1,15]+0.6),
+                     color='b')
+        ax2.annotate('Core Bottom',
+                     xy=(self.ftime[0]*1e3+0.01, self.fdata[4,1,15]-0.6),
+                     color='g')
+        ax2.annotate('SOL Top',
+                     xy=(self.ftime[0]*1e3+0.01, self.fdata[0,6,15]+0.6),
+                     color='c')
+        ax2.annotate('SOL Bottom',
+                     xy=(self.ftime[0]*1e3+0.01, self.fdata[5,6,15]-0.6),
+                     color='m')
+        ax2.annotate('BES | {}'.format(self.shot),
+                     xy=(0.5, 1.04),
+                     xycoords='axes fraction',
+                     horizontalalignment ='center',
+                     size='large')
+        # the time label is inside ax1, so blitting restores its background
+        self.title = ax1.text(0.03, 0.95, '',
+                              transform=ax1.transAxes,
+                              verticalalignment='top',
+                              bbox=dict(facecolor='white', alpha=0.8))
+        self.cursor = ax2.axvline(self.ftime[0]*1e3, color='r')
+        self.updateFrame(0)
+        if self.saveeps:
+            for i in np.arange(self.nframes):
+                self.updateFrame(i)
                 filename = 'Bes2d_{}_{}.eps'.format(
                                 self.shot,
-                                np.int(self.ftime[i*frameint]*1e7))
+                                np.int(self.ftime[i*self.frameint]*1e7))
                 self.fig.savefig(filename, format='eps', transparent=True)
-                ax1.cla()
-                ax2.cla()
-            if self.savemovie:
-                artists = [cb.solids, pt[0], pt[1], pt[2], pt[3], ln[0], ax1_title, 
-                           an_l0, an_l1, an_l2, an_l3, ax2_title]
-                gc.disable()  # disable garbage collection to keep list appends fast
-                if hasattr(im, 'collections'):
-                    ims.append(im.collections+artists)
-                else:
-                    ims.append([im]+artists)
-                gc.enable()
-            
-        if self.savemovie:
-            print('calling ArtistAnimation')
-            self.animation = animation.ArtistAnimation(self.fig, ims, 
-                                                       blit=False,
-                                                       interval=50,
-                                                       repeat=False)
-                                                   
+        print('animation with {} frames'.format(self.nframes))
+        self.animation = animation.FuncAnimation(self.fig,
+                                                 self.updateFrame,
+                                                 frames=self.nframes,
+                                                 blit=self.blit,
+                                                 interval=50,
+                                                 repeat=False)
+
+    def updateFrame(self, i):
+        index = i*self.frameint
+        self.mesh.set_array(self.frameData(index).ravel())
+        self.title.set_text('t={:.3f} ms'.format(self.ftime[index]*1e3))
+        self.cursor.set_xdata(np.ones(2)*self.ftime[index]*1e3)
+        return self.mesh, self.title, self.cursor
+
     def saveAnimationVideo(self):
-        print('calling ArtistAnimation.save()')
+        # frames are drawn and piped to ffmpeg one at a time
         filename = 'Bes2d_{}_{}ms.mp4'.format(
             self.shot,
             np.int(self.tmin*1e3))
-        writer = animation.FFMpegWriter(fps=30,
-                                        bitrate=1e5)
-        self.animation.save(filename, writer=writer)
-
+        print('writing {} frames to {}'.format(self.nframes, filename))
+        self.writer = animation.FFMpegWriter(fps=30,
+                                             bitrate=1e5)
+        with self.writer.saving(self.fig, filename, self.fig.dpi):
+            for i in np.arange(self.nframes):
+                if i!=0 and np.mod(i+1,100)==0:
+                    print('  frame {} of {}'.format(i+1,self.nframes))
+                self.updateFrame(i)
+                self.writer.grab_frame()
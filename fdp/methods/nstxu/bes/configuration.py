@@ -7,39 +7,141 @@ Created on Tue May 10 20:54:54 2016
 
 import os.path
 import xml.etree.ElementTree as ET
+from bisect import bisect_right
 from warnings import warn
 
+import numpy as np
+
 from fdp.classes.fdp_globals import FdpError
 from fdp.classes.utilities import isContainer
 from fdp.classes.fdp_globals import FdpWarning
 
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'configuration.xml')
+
+
+class ConfigRegistry(object):
+    """
+    BES channel configurations, parsed once and indexed by shot
+
+    Shot ranges are kept sorted by start shot, so a shot is matched to
+    its configuration with a bisection.  Configuration names are cached
+    per shot and channel layouts per configuration.
+
+    **Usage**::
+
+        >>> registry = get_registry()
+        >>> registry.configname(204620)
+        'c01'
+        >>> rows, columns = registry.positions(204620, ['ch01', 'ch33'])
+
+    """
+
+    def __init__(self, config_file=CONFIG_FILE):
+        root = ET.parse(config_file).getroot()
+        ranges = []
+        self.configs = {}
+        for element in root:
+            if element.tag=='shotrange':
+                ranges.append((int(element.attrib['start']),
+                               int(element.attrib['stop']),
+                               element.attrib['config']))
+            elif element.tag=='config':
+                channels = sorted((channel.attrib['name'],
+                                   int(channel.attrib['row']),
+                                   int(channel.attrib['column']))
+                                  for channel in element)
+                names, rows, columns = zip(*channels) if channels \
+                    else ((), (), ())
+                self.configs[element.attrib['name']] = (np.array(names),
+                                                        np.array(rows),
+                                                        np.array(columns))
+        ranges.sort()
+        for previous, current in zip(ranges[:-1], ranges[1:]):
+            if current[0] <= previous[1]:
+                warn("Overlapping BES shot ranges {}-{} and {}-{}".format(
+                    previous[0], previous[1], current[0], current[1]),
+                    FdpWarning)
+        self.starts = [shotrange[0] for shotrange in ranges]
+        self.ranges = ranges
+        self._shots = {}
+        self._layouts = {}
+
+    def configname(self, shot):
+        """
+        Return configuration name for shot, or None
+        """
+        if shot not in self._shots:
+            configname = None
+            index = bisect_right(self.starts, shot) - 1
+            if index >= 0 and shot <= self.ranges[index][1]:
+                configname = self.ranges[index][2]
+            self._shots[shot] = configname
+        return self._shots[shot]
+
+    def positions(self, shot, channels):
+        """
+        Return (rows, columns) arrays for channel names in shot
+        """
+        configname = self.configname(shot)
+        if configname is None:
+            raise FdpError("Invalid shot {} for BES configuration".format(shot))
+        if configname not in self.configs:
+            raise FdpError("BES configuration {} not found".format(configname))
+        names, rows, columns = self.configs[configname]
+        channels = np.asarray(channels)
+        index = np.clip(np.searchsorted(names, channels), 0,
+                        max(names.size-1, 0))
+        if names.size==0 or np.any(names[index]!=channels):
+            raise FdpError("Channels not in BES configuration {}".format(
+                configname))
+        return rows[index], columns[index]
+
+    def layout(self, shot):
+        """
+        Return dictionary of channel name -> (row, column) for shot, cached
+        """
+        configname = self.configname(shot)
+        if configname is None or configname not in self.configs:
+            return None
+        if configname not in self._layouts:
+            names, rows, columns = self.configs[configname]
+            positions = zip(rows.tolist(), columns.tolist())
+            self._layouts[configname] = dict(zip(names.tolist(), positions))
+        return self._layouts[configname]
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    Return the BES configuration registry, parsed on first use
+    """
+    global _registry
+    if _registry is None:
+        _registry = ConfigRegistry()
+    return _registry
+
+
 def loadConfig(container=None):
     """
+    Set row and column attributes of BES channels for the container shot
     """
     if not isContainer(container):
         raise FdpError("loadConfig() is a BES container method, not signal method")
-    config_file = os.path.join(os.path.dirname(__file__), 'configuration.xml')
-    tree = ET.parse(config_file)
-    root = tree.getroot()
+    registry = get_registry()
     shot = container.shot
-    configname = None
-    for shotrange in root:
-        if shotrange.tag=='shotrange':
-            start = int(shotrange.attrib['start'])
-            stop = int(shotrange.attrib['stop'])
-            if shot>=start and shot<=stop:
-                configname = shotrange.attrib['config']
-                break
+    configname = registry.configname(shot)
     if configname is None:
         warn("Invalid shot for configuration", FdpWarning)
         return
-    for config in root:
-        if config.tag=='config' and config.attrib['name']==configname:
-            for channel in config:
-                signal = getattr(container, channel.attrib['name'])
-                signal.row = int(channel.attrib['row'])
-                signal.column = int(channel.attrib['column'])
-            print('BES configuration loaded')
-            return
-    warn("BES configuration name not found", FdpWarning)
+    layout = registry.layout(shot)
+    if layout is None:
+        warn("BES configuration name not found", FdpWarning)
+        return
+    for name, (row, column) in layout.items():
+        signal = getattr(container, name)
+        signal.row = row
+        signal.column = column
+    print('BES configuration loaded')
     return
@@ -10,7 +10,7 @@ from warnings import warn
 import numpy as np
 import matplotlib.pyplot as plt
 
-from fdp.classes.crosssignal import CrossSignal
+from fdp.classes.crosssignal import CrossSignal, CrossSpectralMatrix
 from fdp.classes.utilities import isContainer
 from fdp.classes.fdp_globals import FdpWarning
 
@@ -29,6 +29,21 @@ def crosssignal(container, sig1name='ch01', sig2name='ch02',
     return cs
 
 
+def crossspectralmatrix(container, channels=None, refchannels=None,
+                        tmin=0.5, tmax=0.55, nperseg=None, degrees=True,
+                        fchunk=None):
+    if not isContainer(container):
+        warn("Method valid only at container-level", FdpWarning)
+        return
+    signals = sorted(container._signals.values(),
+                     key=lambda sig: sig._name.lower())
+    csm = CrossSpectralMatrix(signals, channels=channels,
+                              refchannels=refchannels, tmin=tmin, tmax=tmax,
+                              nperseg=nperseg, offsetminimum=True,
+                              degrees=degrees, fchunk=fchunk)
+    return csm
+
+
 def plotcrosspower(container, *args, **kwargs):
     if not isContainer(container):
         warn("Method valid only at container-level", FdpWarning)
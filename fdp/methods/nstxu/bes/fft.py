@@ -7,7 +7,7 @@ import matplotlib.pyplot as plt
 
 from fdp.classes.utilities import isSignal, isContainer
 from fdp.classes.fdp_globals import FdpWarning
-from fdp.classes.fft import Fft
+from fdp.classes.fft import Fft, MultiFft, group_by_time
 from . import utilities as UT
 
 
@@ -17,8 +17,10 @@ def fft(obj, *args, **kwargs):
     Return Fft instance from classes/fft.py
     """
 
-    # default to offsetminimum=True for BES ffts
-    offsetminimum = kwargs.pop('offsetminimum', True)
+    # default to offsetminimum=True for BES ffts without band-pass
+    offsetminimum = kwargs.pop('offsetminimum',
+                               kwargs.get('fmin') is None and
+                               kwargs.get('fmax') is None)
     normalizetodc = kwargs.pop('normalizetodc', True)
     if isSignal(obj):
         return Fft(obj,
@@ -37,6 +39,33 @@ def fft(obj, *args, **kwargs):
         return ffts
 
 
+def multifft(obj, *args, **kwargs):
+    """
+    Calculate FFTs for all BES channels, transformed together.
+    Return MultiFft instance from classes/fft.py, or list of MultiFft
+    instances if channels have different time axes.
+    """
+
+    if not isContainer(obj):
+        warn("Method valid only at container-level", FdpWarning)
+        return
+    # default to offsetminimum=True for BES ffts without band-pass
+    offsetminimum = kwargs.pop('offsetminimum',
+                               kwargs.get('fmin') is None and
+                               kwargs.get('fmax') is None)
+    normalizetodc = kwargs.pop('normalizetodc', True)
+    obj.load()
+    signals = sorted(obj._signals.values(), key=lambda sig: sig._name.lower())
+    ffts = [MultiFft(group,
+                     offsetminimum=offsetminimum,
+                     normalizetodc=normalizetodc,
+                     *args, **kwargs)
+            for group in group_by_time(signals)]
+    if len(ffts) == 1:
+        return ffts[0]
+    return ffts
+
+
 def plotfft(signal, fmax=None, *args, **kwargs):
     """
     Plot spectrogram
@@ -9,25 +9,29 @@ from warnings import warn
 #import time
 
 import numpy as np
-import numba as nb
 #import matplotlib as mpl
 #mpl.use('TkAgg')
 import matplotlib.pyplot as plt
-#import pyqtgraph as pg
 
-from fdp.classes.fdp_globals import FdpWarning
+from fdp.classes.fdp_globals import FdpWarning, CHUNK_SIZE
+from fdp.classes.pyramid import get_pyramid, MinMaxPyramid
 
-#pg.mkQApp()
+# samples per pyramid block for out-of-core plots
+OUTOFCORE_BASE = 1024
 
 
-def plot1d(signal, tmin=0.0, tmax=None, **kwargs):
+def plot1d(signal, tmin=0.0, tmax=None, size=None, **kwargs):
     xaxis = getattr(signal, signal.axes[0])
     kwargs.pop('stack', None)
     kwargs.pop('signals', None)
     kwargs.pop('maxrange', None)
     kwargs.pop('minrange', None)
     ax = kwargs.pop('axes', None)
-    ax.plot(xaxis, signal, **kwargs)
+    if size is None:
+        envelope = EnvelopeLine(ax, signal, xaxis, **kwargs)
+    else:
+        envelope = OutOfCoreLine(ax, signal, xaxis, size, **kwargs)
+    ax.callbacks.connect('xlim_changed', envelope.update)
     ax.set_ylabel('{} ({})'.format(signal._name, signal.units))
     ax.set_xlabel('{} ({})'.format(xaxis._name, xaxis.units))
     ax.set_title('{} -- {} -- {}'.format(signal._parent._name.upper(),
@@ -101,6 +105,17 @@ def plot(signal, fig=None, ax=None, **kwargs):
         plot_container(signal, **defaults)
         return
 
+    if defaults.pop('outofcore', False) and signal._is_windowed():
+        # long signals are read window by window, never in full
+        size = signal._root._get_chunked_size(signal)
+        if size is not None:
+            if fig is None:
+                fig = plt.figure()
+            if ax is None:
+                ax = fig.add_subplot(111)
+            plot1d(signal, axes=ax, size=size, **defaults)
+            return
+
     signal[:]
     if signal.size == 0:
         warn("Empty signal {}".format(signal._mdsnode), FdpWarning)
@@ -199,6 +214,97 @@ def plot_container(container, **kwargs):
     plt.tight_layout()
 
 
+class EnvelopeLine(object):
+    """
+    Line showing the min/max envelope of a 1-D signal for the current
+    x limits, from the pyramid cached on the signal
+    """
+
+    def __init__(self, ax, signal, xaxis, *args, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(xaxis)
+        self.pyramid = get_pyramid(signal)
+        xdata, ydata = self.envelope(0, self.x.size)
+        self.line, = plt.Axes.plot(ax, xdata, ydata, *args, **kwargs)
+        # callbacks hold weak references, so the line keeps this alive
+        self.line._envelope = self
+
+    def envelope(self, start, stop):
+        pixels = max(int(self.ax.get_window_extent().width), 100)
+        indices, values = self.pyramid.envelope(start, stop, pixels)
+        return self.x[indices], values
+
+    def update(self, *args):
+        # new envelope for the visible samples, plus one either side
+        xmin, xmax = self.ax.get_xlim()
+        start = np.searchsorted(self.x, xmin, side='left') - 1
+        stop = np.searchsorted(self.x, xmax, side='right') + 1
+        self.line.set_data(*self.envelope(start, stop))
+
+
+class OutOfCoreLine(EnvelopeLine):
+    """
+    Envelope line for a long signal that is never loaded in full
+
+    The pyramid is built in one pass over CHUNK_SIZE data windows, with
+    blocks of OUTOFCORE_BASE samples, and the x axis is kept every
+    OUTOFCORE_BASE samples.  Views with fewer samples per pixel read the
+    visible window with its axis.
+    """
+
+    def __init__(self, ax, signal, xaxis, size, *args, **kwargs):
+        self.ax = ax
+        self.signal = signal
+        self.xaxis = xaxis
+        self.size = size
+        # x axis at block boundaries and the last sample, for np.interp
+        self.xindex = np.append(np.arange(0, size, OUTOFCORE_BASE), size-1)
+        xgrid = []
+        self.pyramid = MinMaxPyramid(chunks=self._chunks(xgrid),
+                                     base=OUTOFCORE_BASE)
+        self.x = np.concatenate(xgrid)
+        xdata, ydata = self.envelope(0, size)
+        self.line, = plt.Axes.plot(ax, xdata, ydata, *args, **kwargs)
+        self.line._envelope = self
+
+    def _chunks(self, xgrid):
+        # data-only signal windows, with strided x axis windows appended
+        # to xgrid
+        root = self.signal._root
+        for start in range(0, self.size, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, self.size)
+            xgrid.append(np.asarray(
+                self.xaxis[start:stop:OUTOFCORE_BASE]))
+            yield np.asarray(root._get_mdsdata(self.signal,
+                                               window=(start, stop, 1)))
+        xgrid.append(np.asarray(self.xaxis[self.size-1:self.size]))
+
+    def envelope(self, start, stop):
+        pixels = max(int(self.ax.get_window_extent().width), 100)
+        start, stop = int(max(start, 0)), int(min(stop, self.size))
+        if stop <= start:
+            return np.zeros(0), np.zeros(0)
+        if stop - start > 2 * pixels * self.pyramid.base:
+            indices, values = self.pyramid.envelope(start, stop, pixels)
+            return np.interp(indices, self.xindex, self.x), values
+        # read the visible window, the x axis comes with it
+        window = self.signal[start:stop]
+        ydata = np.asarray(window)
+        xdata = np.asarray(getattr(window, window.axes[0]))
+        indices, values = MinMaxPyramid(ydata).envelope(0, ydata.size,
+                                                         pixels)
+        return xdata[indices], values
+
+    def update(self, *args):
+        # visible samples from the x axis grid, plus one block either side
+        xmin, xmax = self.ax.get_xlim()
+        first = max(np.searchsorted(self.x, xmin, side='left') - 1, 0)
+        last = min(np.searchsorted(self.x, xmax, side='right'),
+                   self.xindex.size - 1)
+        self.line.set_data(*self.envelope(self.xindex[first],
+                                          self.xindex[last] + 1))
+
+
 class PlotAxes(plt.Axes):
 
     def __init__(self, plot_method, *args, **kwargs):
@@ -209,67 +315,17 @@ class PlotAxes(plt.Axes):
         self.limits = None
 
     def plot(self, signal, *args, **kwargs):
-        index_list = []
-        stride = kwargs.get('stride', 0)
-        if stride:
-            stride_levels = np.floor(np.log(signal.size/3000)/np.log(stride))
-            index_list = [numba_decimate_stride(signal, int(level))
-                          for level in np.arange(stride_levels)+1]
-        myplot = signal, index_list, args, kwargs
+        for key in ['stride', 'numba', 'type', 'stack']:
+            kwargs.pop(key, None)
+        xaxis = getattr(signal, signal.axes[0])
+        myplot = EnvelopeLine(self, signal, xaxis, *args, **kwargs)
         self._plot_objects.append(myplot)
-        self._update_plot(myplot)
         self._set_limits(signal)
 
     def _update_all_plots(self, event):
-        self.clear()
+        # replace line data only, artists and limits are kept
         for myplot in self._plot_objects:
-            self._update_plot(myplot)
-        self.callbacks.connect('xlim_changed', self._update_all_plots)
-
-    def _update_plot(self, myplot):
-
-        signal, index_list, args, kwargs = myplot
-        axes = [getattr(signal, axis) for axis in signal.axes]
-
-        y = signal
-        x = axes[0]
-        # dpi = self.figure.get_dpi()
-
-        autoscale = self.get_autoscale_on()
-
-        if autoscale:
-            self.set_autoscale_on(False)
-
-        # width = self.get_position().width * self.figure.get_figwidth()
-
-        # nx = int(round(width * dpi))
-        nx = 3e3
-        xmin, xmax = self.get_xlim()
-        ymin, ymax = self.get_ylim()
-
-        ixmin = np.searchsorted(x, xmin, side='left')
-        ixmax = np.searchsorted(x, xmax*1.1, side='right')
-        stride = kwargs.pop('stride', 0)
-        kwargs.pop('type', None)
-        kwargs.pop('stack', None)
-        stride_level = 0
-        if stride:
-            stride_level = int(np.floor(np.log((ixmax-ixmin)/nx)/np.log(stride)))
-            if stride_level:
-                dec_index = index_list[stride_level-1]
-                dec_min = np.searchsorted(dec_index, ixmin, side='left')
-                dec_max = np.searchsorted(dec_index, ixmax, side='right')
-                index = dec_index[dec_min:dec_max]
-                super(PlotAxes, self).plot(x[index], y[index], *args, **kwargs)
-                return
-        xdata = x[ixmin:ixmax]
-        ydata = y[ixmin:ixmax]
-        use_numba = kwargs.pop('numba', False)
-        if use_numba:
-            dec_index = numba_decimate(ydata)
-        else:
-            dec_index = decimate_plot(ydata)
-        super(PlotAxes, self).plot(xdata[dec_index], ydata[dec_index], *args, **kwargs)
+            myplot.update()
 
     def _set_limits(self, signal):
         if len(signal.axes) > 1:
@@ -294,162 +350,3 @@ class PlotAxes(plt.Axes):
         self.set_xlim(xmin, xmax)
         self.set_ylim(ymin, ymax)
         self.limits = ((xmin, xmax), (ymin, ymax))
-
-
-#class PyQTPlot(pg.PlotCurveItem):
-#    def __init__(self, *args, **kwds):
-#        self.hdf5 = None
-#        self.limit = 10000  # maximum number of samples to be plotted
-#        pg.PlotCurveItem.__init__(self, *args, **kwds)
-#
-#    def setHDF5(self, data):
-#        self.hdf5 = data
-#        self.updateHDF5Plot()
-#
-#    def viewRangeChanged(self):
-#        self.updateHDF5Plot()
-#
-#    def updateHDF5Plot(self):
-#        if self.hdf5 is None:
-#            self.setData([])
-#            return
-#
-#        vb = self.getViewBox()
-#        if vb is None:
-#            return  # no ViewBox yet
-#
-#        # Determine what data range must be read from HDF5
-#        xrange = vb.viewRange()[0]
-#        start = max(0, int(xrange[0])-1)
-#        stop = min(len(self.hdf5), int(xrange[1]+2))
-#
-#        # Decide by how much we should downsample
-#        ds = int((stop-start) / self.limit) + 1
-#
-#        if ds == 1:
-#            # Small enough to display with no intervention.
-#            visible = self.hdf5[start:stop]
-#            scale = 1
-#        else:
-#            # Here convert data into a down-sampled array suitable for visualizing.
-#            # Must do this piecewise to limit memory usage.
-#            samples = 1 + ((stop-start) // ds)
-#            visible = np.zeros(samples*2, dtype=self.hdf5.dtype)
-#            sourcePtr = start
-#            targetPtr = 0
-#
-#            # read data in chunks of ~1M samples
-#            chunkSize = (1000000//ds) * ds
-#            while sourcePtr < stop-1:
-#                chunk = self.hdf5[sourcePtr:min(stop, sourcePtr+chunkSize)]
-#                sourcePtr += len(chunk)
-#
-#                # reshape chunk to be integral multiple of ds
-#                chunk = chunk[:(len(chunk)//ds) * ds].reshape(len(chunk)//ds, ds)
-#
-#                # compute max and min
-#                chunkMax = chunk.max(axis=1)
-#                chunkMin = chunk.min(axis=1)
-#
-#                # interleave min and max into plot data to preserve envelope shape
-#                visible[targetPtr:targetPtr+chunk.shape[0]*2:2] = chunkMin
-#                visible[1+targetPtr:1+targetPtr+chunk.shape[0]*2:2] = chunkMax
-#                targetPtr += chunk.shape[0]*2
-#
-#            visible = visible[:targetPtr]
-#            scale = ds * 0.5
-#
-#        self.setData(visible)  # update the plot
-#        self.setPos(start, 0)  # shift to match starting index
-#        self.resetTransform()
-#        self.scale(scale, 1)   # scale to match downsampling
-
-
-def decimate_plot(data, pixels=2000):
-    # returns a decimated indices array to visually approximate a plot with
-    # points >> pixels
-    if data.size <= pixels*2:
-        return np.arange(data.size)
-    stride = (data.size-2)/(pixels-1)
-    endpoint = (pixels-1)*stride+1
-    data2D = data[1:endpoint].reshape((pixels-1, stride))
-    column_offset = np.arange(pixels-1)*stride + 1
-    data_min = data2D.argmin(axis=1)+column_offset
-    data_max = data2D.argmax(axis=1)+column_offset
-    data_endmin = data[endpoint:-2].argmin() + endpoint
-    data_endmax = data[endpoint:-2].argmax() + endpoint
-    decimate_index = np.dstack((data_min, data_max)).flatten()
-    decimate_index = np.concatenate(([0], decimate_index,
-                                     [data_endmin], [data_endmax],
-                                     [data.size-1]))
-    return np.sort(decimate_index)
-
-
-@nb.autojit(nopython=True)
-def numba_decimate(data, pixels=2000):
-    # returns a decimated indices array to visually approximate a plot with
-    # points >> pixels
-    output = np.zeros(2*pixels+2, dtype=np.int64)
-    if data.size <= pixels*2:
-        return np.arange(data.size)
-    stride = (data.size-2)/(pixels-1)
-    output[0] = 0
-    output[-1] = data.size-1
-    for pixel in range(1, pixels+1):
-        offset = 1 + stride * (pixel-1)
-        arrmin = data[offset]
-        arrmax = data[offset]
-        minind = offset
-        maxind = offset
-        if offset+stride > data.size-1:
-            stride = data.size-offset-1
-        for index in range(offset+1, offset+stride):
-            check = data[index]
-            if check < arrmin:
-                minind = index
-                arrmin = check
-            else:
-                if check > arrmax:
-                    maxind = index
-                    arrmax = check
-        if maxind > minind:
-            output[2*pixel-1] = minind
-            output[2*pixel] = maxind
-        else:
-            output[2*pixel-1] = maxind
-            output[2*pixel] = minind
-    return output
-
-
-@nb.autojit(nopython=True)
-def numba_decimate_stride(data, stride):
-    # returns a decimated indices array to visually approximate a plot with
-    # points >> pixels
-    elements = 2*int((data.size-2)/stride) + 2
-    output = np.zeros(elements, dtype=np.int64)
-    output[0] = 0
-    output[-1] = data.size-1
-    for element in range(1, elements-1, 2):
-        offset = 1 + stride * (element-1)/2
-        arrmin = data[offset]
-        arrmax = data[offset]
-        minind = offset
-        maxind = offset
-        if offset+stride > data.size-1:
-            stride = data.size-offset-1
-        for index in range(offset+1, offset+stride):
-            check = data[index]
-            if check < arrmin:
-                minind = index
-                arrmin = check
-            else:
-                if check > arrmax:
-                    maxind = index
-                    arrmax = check
-        if maxind > minind:
-            output[element] = minind
-            output[element+1] = maxind
-        else:
-            output[element] = maxind
-            output[element+1] = minind
-    return output
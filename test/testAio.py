@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:20:41 2026
+
+@author: ktritz
+"""
+
+import os
+import sys
+import time
+import types
+import importlib
+import threading
+import unittest
+
+print('running tests in {}'.format(__file__))
+
+
+def import_aio():
+    # fdp does not import with Python 3, so load fdp/classes alone
+    if sys.version_info < (3, 5):
+        return None
+    try:
+        import MDSplus
+    except ImportError:
+        return None
+    if '_fdpclasses' not in sys.modules:
+        package = types.ModuleType('_fdpclasses')
+        package.__path__ = [os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), 'fdp', 'classes')]
+        sys.modules['_fdpclasses'] = package
+    return importlib.import_module('_fdpclasses.aio')
+
+aio = import_aio()
+
+
+class EventLogbook(object):
+
+    def get_entries(self, shot=None, date=None, xp=None):
+        time.sleep(0.05)
+        return [{'shot': shot, 'thread': threading.current_thread().name}]
+
+
+class EventShot(object):
+
+    def __init__(self, shot):
+        self.shot = shot
+
+
+class EventMachine(object):
+    # machine with scripted event waits, each event is a shot number or
+    # None for a timeout
+
+    _name = 'nstxu'
+
+    def __init__(self, events):
+        self.events = list(events)
+        self._lock = threading.Lock()
+
+    def _wfevent(self, connection, event, timeout=0):
+        time.sleep(0.05)
+        return event, connection
+
+    def _wait_shot(self, connection, event=None, timeout=0):
+        time.sleep(0.01)
+        with self._lock:
+            shot = self.events.pop(0) if self.events else None
+        if shot is None:
+            raise aio.FdpTimeout('Timeout after {}s in wfevent'.format(
+                timeout))
+        return shot
+
+    def __getattr__(self, name):
+        return EventShot(int(name[1:]))
+
+
+class EventWaiter(object if aio is None else aio.EventWaiter):
+    # event waiter without an event server
+
+    def _get_connection(self):
+        return threading.current_thread().name
+
+
+@unittest.skipIf(aio is None, 'requires Python 3.5 and MDSplus')
+class TestAio(unittest.TestCase):
+
+    def setUp(self):
+        self.interval = aio.WATCH_INTERVAL
+        aio.WATCH_INTERVAL = 0.01
+        self.loop = aio.asyncio.new_event_loop()
+        aio.asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        aio.WATCH_INTERVAL = self.interval
+        self.loop.close()
+        aio.asyncio.set_event_loop(None)
+
+    def run_future(self, future):
+        return self.loop.run_until_complete(future)
+
+    def testLogbook(self):
+        """
+        Assert logbook queries run in one thread without blocking the loop
+        """
+        logbook = aio.AsyncLogbook(EventLogbook())
+        entries = self.run_future(aio.asyncio.gather(
+            *[logbook.get_entries(shot=shot) for shot in [204620, 204621]]))
+        self.assertEqual([entry[0]['shot'] for entry in entries],
+                         [204620, 204621])
+        self.assertEqual(entries[0][0]['thread'], entries[1][0]['thread'])
+        logbook.shutdown()
+
+    def testWait(self):
+        """
+        Assert event waits run concurrently on per-thread connections
+        """
+        waiter = EventWaiter(EventMachine([]), workers=2)
+        t0 = time.time()
+        results = self.run_future(aio.asyncio.gather(
+            *[waiter.wait('myevent', timeout=1) for _ in range(4)]))
+        self.assertLess(time.time() - t0, 0.18)
+        self.assertEqual([result[0] for result in results], ['myevent'] * 4)
+        self.assertEqual(len(set(result[1] for result in results)), 2)
+        waiter.shutdown()
+
+    def testWatchShots(self):
+        """
+        Assert shots are yielded across timeouts, up to count
+        """
+        machine = EventMachine([None, 204620, None, None, 204621, 204622])
+        waiter = EventWaiter(machine)
+        watcher = aio.ShotWatcher(machine, waiter, count=2)
+        shots = [self.run_future(watcher.__anext__()).shot for _ in range(2)]
+        self.assertEqual(shots, [204620, 204621])
+        with self.assertRaises(StopAsyncIteration):
+            self.run_future(watcher.__anext__())
+        waiter.shutdown()
+        machine = EventMachine([])
+        waiter = EventWaiter(machine)
+        watcher = aio.ShotWatcher(machine, waiter)
+        self.loop.call_later(0.05, watcher.close)
+        with self.assertRaises(StopAsyncIteration):
+            self.run_future(watcher.__anext__())
+        waiter.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
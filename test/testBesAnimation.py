@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:48:09 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+import scipy.interpolate
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from fdp.methods.nstxu.bes.animation import Animation, bilinear_weights
+
+print('running tests in {}'.format(__file__))
+
+
+def loop_normalization(data, datamask, ntime):
+    # per row and column normalization of Animation before vectorizing
+    nrow, ncol, _ = data.shape
+    colcal = np.zeros((ncol,))
+    for col in np.arange(ncol):
+        rowmask = datamask[:,col]
+        if not rowmask.any():
+            continue
+        colcal[col] = np.mean(data[rowmask.nonzero(),col,0:ntime//20])
+    tmp = colcal.copy()
+    for col in np.arange(ncol):
+        if col==0 or col==ncol-1:
+            continue
+        d = colcal[col-1:col+2]
+        if np.count_nonzero(d)!=3:
+            continue
+        tmp[col] = np.mean(d)
+    colcal = tmp.copy()
+    for row in np.arange(nrow):
+        for col in np.arange(ncol):
+            if datamask[row,col]:
+                data[row,col,:] = data[row,col,:] * colcal[col] / \
+                    np.mean(data[row,col,0:ntime//20])
+    return data, colcal
+
+
+class TestBesAnimation(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(204620)
+        self.ntime = 200
+        self.data = np.random.rand(7, 9, self.ntime) + 1.
+        self.datamask = np.random.rand(7, 9) > 0.2
+        # a column without channels
+        self.datamask[:,3] = False
+        self.data[~self.datamask] = -1.
+
+    def testNormalization(self):
+        """
+        Assert vectorized normalization matches the row and column loops
+        """
+        animation = Animation.__new__(Animation)
+        animation.data = self.data.copy()
+        animation.datamask = self.datamask
+        animation.ntime = self.ntime
+        animation.applyNormalization()
+        data, colcal = loop_normalization(self.data.copy(), self.datamask,
+                                          self.ntime)
+        self.assertTrue(np.allclose(animation.colcal, colcal))
+        self.assertTrue(np.allclose(animation.data, data))
+
+    def testBilinearWeights(self):
+        """
+        Assert bilinear weights match interp2d on the channel grid,
+        including extrapolation
+        """
+        rgrid = np.arange(1, 10)
+        pgrid = np.arange(1, 8)
+        rnew = np.arange(0.5, 9.51, 0.25)
+        pnew = np.arange(0.5, 7.51, 0.25)
+        weights = bilinear_weights(rgrid, pgrid, rnew, pnew)
+        for frame in self.data[:,:,:3].transpose(2, 0, 1):
+            # grid axes, interp2d of meshgrid arrays fits a spline surface
+            interp = scipy.interpolate.interp2d(rgrid, pgrid, frame,
+                                                kind='linear')
+            gridded = weights.dot(frame.ravel()).reshape(pnew.size,
+                                                          rnew.size)
+            self.assertTrue(np.allclose(gridded, interp(rnew, pnew)))
+
+    def testGridMesh(self):
+        """
+        Assert the mesh shows gridded frames if grid=True
+        """
+        animation = Animation.__new__(Animation)
+        animation.fdata = self.data
+        animation.grid = True
+        animation.gridData()
+        fig = plt.figure()
+        mesh = animation.plotPColorMesh(axes=fig.add_subplot(1,1,1),
+                                        index=2)
+        self.assertTrue(np.array_equal(
+            np.ravel(mesh.get_array()),
+            animation.gdata[::-1,:,2].ravel()))
+        plt.close(fig)
+
+
+if __name__ == '__main__':
+    unittest.main()
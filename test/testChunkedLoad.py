@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:12:36 2026
+
+@author: ktritz
+"""
+
+import re
+import threading
+import unittest
+import numpy as np
+from contextlib import contextmanager
+from fdp.classes import machine as machinemodule
+from fdp.classes.machine import Machine
+from fdp.classes.signal import Signal
+
+print('running tests in {}'.format(__file__))
+
+
+class TdiData(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def value_of(self):
+        return self
+
+    def __int__(self):
+        return int(self.value)
+
+
+class RecordGetMany(object):
+    # GetMany for the expressions of Machine._load_chunked
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.expressions = []
+        self.results = {}
+
+    def append(self, name, expression):
+        self.expressions.append((name, expression))
+
+    def execute(self):
+        record = self.connection.record
+        for name, expression in self.expressions:
+            if name == 'size':
+                self.results[name] = TdiData(np.size(record))
+            else:
+                limit = int(re.search(r'> (\d+)', expression).group(1))
+                self.results[name] = TdiData(
+                    np.uint8(0) if np.size(record) > limit else record)
+
+    def get(self, name):
+        return self.results[name]
+
+
+class RecordConnection(object):
+    # connection serving one record as _fdpc
+
+    def __init__(self, record):
+        self.record = record
+        self.requests = []
+
+    def getMany(self):
+        self.requests.append('getMany')
+        return RecordGetMany(self)
+
+    def get(self, expression):
+        self.requests.append(expression)
+        match = re.match(r'_fdpc\[(\d+) : (\d+)\]', expression)
+        if match:
+            start, stop = int(match.group(1)), int(match.group(2)) + 1
+            return TdiData(self.record[start:stop])
+        return TdiData(None)
+
+
+class RecordMachine(Machine):
+    # machine without MDS access and one record on its connection
+
+    def __init__(self, record):
+        self._cache = None
+        self._load_lock = threading.RLock()
+        self.connection = RecordConnection(record)
+
+    @contextmanager
+    def _get_connection(self, shot, tree, pool=None):
+        yield self.connection
+
+
+class TextSignal(Signal):
+    # signal recording attached data, a float signal cannot hold text
+
+    def _set_data(self, data):
+        self.attached = data
+        self._empty = False
+
+
+class TestChunkedLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.chunksize = machinemodule.CHUNK_SIZE
+        machinemodule.CHUNK_SIZE = 4
+
+    def tearDown(self):
+        machinemodule.CHUNK_SIZE = self.chunksize
+
+    def load(self, record, signalclass=Signal):
+        machine = RecordMachine(record)
+        signal = signalclass(_name='signal', shot=204620, _mdstree='tree',
+                             _mdsnode='node')
+        self.assertTrue(machine._load_chunked(signal))
+        self.assertIs(signal._empty, False)
+        return signal, machine.connection.requests
+
+    def testShortRecord(self):
+        """
+        Assert short records load with one request
+        """
+        signal, requests = self.load(np.arange(4.))
+        self.assertTrue(np.array_equal(signal, np.arange(4.)))
+        self.assertEqual(requests, ['getMany'])
+
+    def testTextRecord(self):
+        """
+        Assert a text record is not taken for a long record
+        """
+        signal, requests = self.load('chunked', signalclass=TextSignal)
+        self.assertEqual(str(signal.attached), 'chunked')
+        self.assertEqual(requests, ['getMany'])
+
+    def testLongRecord(self):
+        """
+        Assert long records are read in chunks
+        """
+        signal, requests = self.load(np.arange(10.))
+        self.assertTrue(np.array_equal(signal, np.arange(10.)))
+        self.assertEqual(requests, ['getMany', '_fdpc[0 : 3]',
+                                    '_fdpc[4 : 7]', '_fdpc[8 : 9]',
+                                    'deallocate("_fdpc")'])
+
+
+if __name__ == '__main__':
+    unittest.main()
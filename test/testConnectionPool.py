@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:41:52 2026
+
+@author: ktritz
+"""
+
+import time
+import threading
+import unittest
+from fdp.classes.connectionpool import ConnectionPool
+
+print('running tests in {}'.format(__file__))
+
+
+class TreeConnection(object):
+    # connection recording open and closed trees
+
+    def __init__(self):
+        self.tree = None
+        self.alive = True
+        self.log = []
+
+    def openTree(self, tree, shot):
+        self.log.append(('open', tree, shot))
+
+    def closeAllTrees(self):
+        self.log.append(('close',))
+
+    def get(self, expression):
+        if not self.alive:
+            raise IOError('dead socket')
+        return expression
+
+
+class TreePool(ConnectionPool):
+
+    def _connect(self):
+        return TreeConnection()
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def testCheckout(self):
+        """
+        Assert checked-out connections are not shared or reopened
+        """
+        pool = TreePool('server', size=2)
+        with pool.connection('tree1', 1) as first:
+            with pool.connection('tree1', 1) as second:
+                self.assertIsNot(first, second)
+                self.assertEqual(pool.stats()['busy'], 2)
+            with pool.connection('tree2', 2) as third:
+                # the idle connection is reopened, not the busy one
+                self.assertIs(third, second)
+            self.assertEqual(first.log, [('open', 'tree1', 1)])
+        self.assertEqual(pool.stats()['busy'], 0)
+        with pool.connection('tree1', 1) as connection:
+            self.assertIs(connection, first)
+
+    def testWait(self):
+        """
+        Assert requests wait while all connections are checked out
+        """
+        pool = TreePool('server', size=1)
+        times = []
+
+        def use():
+            with pool.connection('tree2', 2):
+                times.append(time.time())
+
+        with pool.connection('tree1', 1):
+            thread = threading.Thread(target=use)
+            thread.start()
+            time.sleep(0.1)
+            released = time.time()
+        thread.join()
+        self.assertGreaterEqual(times[0], released)
+
+    def testReconnect(self):
+        """
+        Assert a replaced connection stays checked out until released
+        """
+        pool = TreePool('server', size=1)
+        with pool.connection('tree1', 1) as connection:
+            connection.alive = False
+            self.assertFalse(pool.is_alive(connection))
+            newconnection = pool.reconnect(connection)
+            self.assertEqual(pool.stats()['busy'], 1)
+            self.assertEqual(newconnection.log, [('open', 'tree1', 1)])
+        self.assertEqual(pool.stats(), dict(pool.stats(), busy=0,
+                                            connections=1, reconnects=1))
+        with pool.connection('tree1', 1) as connection:
+            self.assertIs(connection, newconnection)
+
+
+if __name__ == '__main__':
+    unittest.main()
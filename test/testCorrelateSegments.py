@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:51 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+from scipy.signal import fftconvolve
+from fdp.classes.crosssignal import correlate_segments
+
+print('running tests in {}'.format(__file__))
+
+
+class TestCorrelateSegments(unittest.TestCase):
+
+    def testFftconvolve(self):
+        """
+        Assert batched correlations match per-segment fftconvolve
+        """
+        nperseg = 200
+        t = np.arange(2000) / 2e6
+        x = np.sin(2*np.pi*10e3*t) + 0.1*np.random.randn(t.size)
+        y = np.sin(2*np.pi*10e3*(t + 5e-6)) + 0.1*np.random.randn(t.size)
+        xcorr, auto1, auto2, coef = correlate_segments(x, y, nperseg)
+        segx = x.reshape(-1, nperseg)
+        segy = y.reshape(-1, nperseg)
+        segx = segx - segx.mean(axis=1)[:, np.newaxis]
+        segy = segy - segy.mean(axis=1)[:, np.newaxis]
+        refxcorr = np.mean([fftconvolve(sx, sy[::-1])[::-1]
+                            for sx, sy in zip(segx, segy)], axis=0)
+        refauto1 = np.mean([fftconvolve(sx, sx[::-1])[::-1]
+                            for sx in segx], axis=0)
+        refcoef = np.mean([fftconvolve(sx, sy[::-1])[::-1] /
+                           np.sqrt(np.sum(sx*sx) * np.sum(sy*sy))
+                           for sx, sy in zip(segx, segy)], axis=0)
+        self.assertEqual(xcorr.size, 2*nperseg - 1)
+        self.assertTrue(np.allclose(xcorr, refxcorr))
+        self.assertTrue(np.allclose(auto1, refauto1))
+        self.assertTrue(np.allclose(coef, refcoef))
+        self.assertAlmostEqual(auto2[nperseg - 1], np.mean(np.sum(segy*segy,
+                                                                  axis=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
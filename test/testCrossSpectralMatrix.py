@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:25:40 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+from scipy.signal import csd, welch
+from fdp.classes.crosssignal import CrossSpectralMatrix
+
+print('running tests in {}'.format(__file__))
+
+
+class FakeSignal(np.ndarray):
+    # minimal signal-like array for CrossSpectralMatrix
+    pass
+
+
+def make_signal(data, name, fs=2e6):
+    signal = np.asarray(data).view(FakeSignal)
+    signal._name = name
+    signal.shot = 0
+    signal.time = np.arange(signal.size) / fs
+    return signal
+
+
+class TestCrossSpectralMatrix(unittest.TestCase):
+
+    def setUp(self):
+        common = np.random.randn(100000)
+        self.signals = [make_signal(common + np.random.randn(100000),
+                                    'ch{:02d}'.format(i)) for i in range(4)]
+
+    def testScipyCsd(self):
+        """
+        Assert matrix entries match scipy csd and welch
+        """
+        csm = CrossSpectralMatrix(self.signals, tmin=0.0, tmax=1.0,
+                                  nperseg=256, fchunk=40)
+        x = np.asarray(self.signals[1])
+        y = np.asarray(self.signals[3])
+        _, pxy = csd(x, y, fs=2e6, nperseg=256, detrend=False)
+        _, pxx = welch(x, fs=2e6, nperseg=256, detrend=False)
+        self.assertEqual(csm.csd.shape, (129, 4, 4))
+        self.assertTrue(np.allclose(csm.csd[:, 1, 3], pxy))
+        self.assertTrue(np.allclose(csm.asd[:, 1], pxx))
+        self.assertTrue(np.allclose(csm.coherence[:, 2, 2], 1))
+
+    def testChannelSubset(self):
+        """
+        Assert channel subsets select rows and columns of the full matrix
+        """
+        full = CrossSpectralMatrix(self.signals, tmin=0.0, tmax=1.0,
+                                   nperseg=256)
+        subset = CrossSpectralMatrix(self.signals, channels=['ch01', 'ch03'],
+                                     refchannels=[2], tmin=0.0, tmax=1.0,
+                                     nperseg=256)
+        self.assertEqual(subset.csd.shape, (129, 1, 2))
+        self.assertTrue(np.allclose(subset.csd[:, 0, 1], full.csd[:, 2, 3]))
+        self.assertEqual(subset.pair('ch02', 'ch03'), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
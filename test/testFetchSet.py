@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:40:18 2026
+
+@author: ktritz
+"""
+
+import time
+import threading
+import unittest
+import numpy as np
+from concurrent import futures
+from fdp.classes.loader import FetchSet, ParallelLoader
+from fdp.classes.machine import Machine
+from fdp.classes.signal import Signal
+
+print('running tests in {}'.format(__file__))
+
+
+def load(signals):
+    time.sleep(0.01)
+    return signals
+
+
+class LoadMachine(Machine):
+    # machine without MDS access, loads return arange(size)
+
+    def __init__(self):
+        self._connections = None
+        self._load_lock = threading.RLock()
+
+    def _get_mdsdata_many(self, signals, pool=None):
+        return [np.arange(5.) for signal in signals]
+
+
+class TestFetchSet(unittest.TestCase):
+
+    def testProgress(self):
+        """
+        Assert all signals are counted when wait() returns
+        """
+        executor = futures.ThreadPoolExecutor(max_workers=4)
+        groups = [['signal'] * size for size in [1, 2, 3, 4] * 5]
+        futurelist = [executor.submit(load, group) for group in groups]
+        fetchset = FetchSet(futurelist, [len(group) for group in groups])
+        fetchset.wait()
+        self.assertEqual(fetchset.progress(), (50, 50))
+        self.assertEqual(len(fetchset.result()), 50)
+        executor.shutdown()
+
+    def testAttach(self):
+        """
+        Assert loader threads do not replace data of loaded signals
+        """
+        machine = LoadMachine()
+        loaded = Signal(_name='loaded')
+        loaded._set_data(np.ones(3))
+        empty = Signal(_name='empty')
+        loader = ParallelLoader(machine, workers=1)
+        loader._load_group(204620, 'tree', [loaded, empty])
+        self.assertTrue(np.array_equal(loaded, np.ones(3)))
+        self.assertTrue(np.array_equal(empty, np.arange(5.)))
+        self.assertIs(empty._empty, False)
+        loader.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:40:12 2026
+
+@author: ktritz
+"""
+
+import unittest
+import warnings
+import numpy as np
+from fdp.classes.fft import Fft, MultiFft, segments
+from fdp.classes.signal import Signal
+
+print('running tests in {}'.format(__file__))
+
+
+class FakeSignal(np.ndarray):
+    # minimal signal-like array for Fft
+    pass
+
+
+def make_signal(data, fs=2e6):
+    signal = np.asarray(data).view(FakeSignal)
+    signal._name = 'ch01'
+    signal._parent = signal
+    signal.shot = 0
+    signal.time = np.arange(signal.size) / fs
+    return signal
+
+
+class TestFft(unittest.TestCase):
+
+    def testSegments(self):
+        """
+        Assert strided segments match sliced segments
+        """
+        data = np.arange(100.)
+        view = segments(data, 16, 8, start=3)
+        self.assertEqual(view.shape, (11, 16))
+        for i in range(view.shape[0]):
+            self.assertTrue(np.array_equal(view[i], data[3+8*i:19+8*i]))
+
+    def testSineWave(self):
+        """
+        Assert single-sided spectrum peaks at sine wave frequency
+        """
+        t = np.arange(200000) / 2e6
+        signal = make_signal(np.sin(2*np.pi*50e3*t))
+        fft = Fft(signal, power2=1024, tmin=0.01, tmax=0.09)
+        self.assertEqual(fft.fft.shape, (fft.nbins, 513))
+        self.assertTrue(np.all(np.diff(fft.time) > 0))
+        peak = fft.freq[np.argmax(fft.binavg_psd)]
+        self.assertAlmostEqual(peak, 50.0, delta=2*fft.freq[1])
+
+    def testMultiFft(self):
+        """
+        Assert multi-channel ffts match single-channel ffts
+        """
+        signals = [make_signal(np.random.randn(100000)) for i in range(3)]
+        for signal in signals[1:]:
+            signal.time = signals[0].time
+        multifft = MultiFft(signals, power2=512, tmin=0.0, tmax=0.04,
+                            offsetminimum=True, normalizetodc=True)
+        self.assertEqual(multifft.fft.shape[0], 3)
+        for i, signal in enumerate(signals):
+            fft = Fft(signal, power2=512, tmin=0.0, tmax=0.04,
+                      offsetminimum=True, normalizetodc=True)
+            self.assertTrue(np.allclose(multifft.fft[i], fft.fft))
+            self.assertTrue(np.allclose(multifft.binavg_psd[i],
+                                        fft.binavg_psd))
+
+    def testBandpassMinimumOffset(self):
+        """
+        Assert offsetminimum is ignored for band-passed signals
+        """
+        signal = make_signal(np.random.randn(100000) + 5.)
+        kwargs = {'power2': 512, 'tmin': 0.01, 'tmax': 0.04, 'fmin': 10}
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            offset = Fft(signal, offsetminimum=True, **kwargs)
+        self.assertEqual(len(caught), 1)
+        self.assertIn('offsetminimum', str(caught[0].message))
+        fft = Fft(signal, **kwargs)
+        self.assertTrue(np.allclose(offset.fft, fft.fft))
+
+    def testBandpassSignalTime(self):
+        """
+        Assert band-passed ffts accept a Signal time axis
+        """
+        signal = make_signal(np.random.randn(100000))
+        time = Signal(_name='time')
+        time._set_data(np.asarray(signal.time))
+        signal.time = time
+        fft = Fft(signal, power2=512, tmin=0.01, tmax=0.04, fmin=10)
+        self.assertTrue(np.all(np.isfinite(fft.binavg_psd)))
+
+
+if __name__ == '__main__':
+    unittest.main()
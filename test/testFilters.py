@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:55:31 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+from scipy.signal import filtfilt, firwin
+from fdp.classes.filters import bandpass, get_design
+
+print('running tests in {}'.format(__file__))
+
+
+class TestFilters(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.randn(4, 20000)
+
+    def testFiltfilt(self):
+        """
+        Assert batched FIR band-pass matches scipy filtfilt per channel
+        """
+        filtered = bandpass(self.data, 2e6, fmin=10e3, fmax=100e3)
+        h = firwin(501, [10e3, 100e3], pass_zero=False, nyq=1e6)
+        for i in range(self.data.shape[0]):
+            expected = filtfilt(h, 1.0, self.data[i], padlen=501)
+            self.assertTrue(np.allclose(filtered[i], expected))
+
+    def testAxis(self):
+        """
+        Assert filtering along axis 0 matches filtering along the last axis
+        """
+        filtered = bandpass(self.data, 2e6, fmin=10e3, fmax=100e3)
+        transposed = bandpass(self.data.T, 2e6, fmin=10e3, fmax=100e3,
+                              axis=0)
+        self.assertTrue(np.allclose(filtered, transposed.T))
+
+    def testDesignCache(self):
+        """
+        Assert designs are cached and full-band filters pass data through
+        """
+        design = get_design(2e6, fmin=10e3, fmax=100e3, kind='iir')
+        self.assertIs(design, get_design(2e6, fmin=10e3, fmax=100e3,
+                                         kind='iir'))
+        self.assertTrue(np.array_equal(bandpass(self.data, 2e6, fmax=1e6),
+                                       self.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:44 2026
+
+@author: ktritz
+"""
+
+import unittest
+from fdp.classes.machine import ImmutableMachine
+
+print('running tests in {}'.format(__file__))
+
+
+class ShotlistLogbook(object):
+    # logbook with a fixed shot list, records bulk queries
+
+    def __init__(self, shots):
+        self.shots = shots
+        self.queries = []
+
+    def _shot_query(self, shot=[]):
+        self.queries.append(sorted(shot))
+
+
+class ShotlistShot(object):
+
+    def __init__(self, shot):
+        self.shot = shot
+        self.xp = 1032
+        self.date = 20161006
+
+
+class ShotlistMachine(object):
+    _name = 'nstxu'
+
+    def __init__(self, shots):
+        self._logbook = ShotlistLogbook(shots)
+
+    def get_shotlist(self, xp=[], date=[]):
+        return self._logbook.shots
+
+    def __getattr__(self, name):
+        return ShotlistShot(int(name[1:]))
+
+
+class TestImmutableMachine(unittest.TestCase):
+
+    def testListShots(self):
+        """
+        Assert list_shots() queries the logbook once for all shots
+        """
+        parent = ShotlistMachine([204620, 204621, 204622])
+        machine = ImmutableMachine(xp=1032, parent=parent)
+        machine.list_shots()
+        self.assertEqual(parent._logbook.queries, [[204620, 204621, 204622]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:20:57 2026
+
+@author: ktritz
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from fdp.classes.local import open_local, h5py, FORMAT_VERSION
+
+print('running tests in {}'.format(__file__))
+
+
+@unittest.skipIf(h5py is None, 'requires h5py')
+class TestLocal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        empty = os.path.join(self.directory, 'empty.h5')
+        with h5py.File(empty, 'w') as h5file:
+            h5file.attrs['machine'] = 'nstxu'
+            h5file.attrs['format'] = FORMAT_VERSION
+        machine = open_local(empty)
+        self.data = np.random.randn(1000)
+        channel = machine.s204620.bes.ch01
+        channel._set_data(self.data)
+        channel.time._set_data(np.arange(1000) * 5e-7)
+        self.bundles = {}
+        for compression in [None, 'gzip']:
+            path = os.path.join(self.directory, '{}.h5'.format(compression))
+            if compression is None:
+                # default export
+                machine.s204620.export(path)
+            else:
+                machine.s204620.export(path, compression=compression)
+            self.bundles[compression] = path
+        machine._h5file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testExport(self):
+        """
+        Assert bundles are memory-mapped by default and keep no module XML
+        """
+        for compression, mapped in [(None, True), ('gzip', False)]:
+            machine = open_local(self.bundles[compression])
+            channel = machine.s204620.bes.ch01
+            self.assertEqual(
+                isinstance(machine._get_array(channel), np.memmap), mapped)
+            self.assertTrue(np.array_equal(channel[10:20], self.data[10:20]))
+            self.assertTrue(np.array_equal(channel[:], self.data))
+            self.assertNotIn('xml', machine._h5file['204620/bes'].attrs)
+            machine._h5file.close()
+
+    def testPendingSignals(self):
+        """
+        Assert pending signals include created dynamic containers
+        """
+        machine = open_local(self.bundles[None])
+        shot = machine.s204620
+        pending = set(id(signal) for signal in shot.bes._get_pending_signals())
+        highn = shot.magnetics.highn
+        shot.bes._dynamic_containers.update({'highn': highn, 'other': None})
+        dynamic = set(id(signal) for signal in highn._get_pending_signals())
+        self.assertTrue(dynamic)
+        self.assertEqual(set(id(signal) for signal in
+                             shot.bes._get_pending_signals()),
+                         pending | dynamic)
+        machine._h5file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:05:26 2026
+
+@author: ktritz
+"""
+
+import time
+import threading
+import unittest
+from fdp.classes.logbook import Logbook
+
+print('running tests in {}'.format(__file__))
+
+
+class QueryLogbook(Logbook):
+    # logbook without a server, queries return rows or raise
+
+    def __init__(self, rows):
+        self._name = 'nstxu'
+        self._mirror = None
+        self.logbook = {}
+        self.rows = rows
+
+    def _query_entries(self, shots):
+        if isinstance(self.rows, Exception):
+            raise self.rows
+        return [dict(row) for row in self.rows if row['shot'] in shots]
+
+
+class SharedConnection(object):
+    # server connection counting cursors in use at the same time
+
+    def __init__(self):
+        self.active = 0
+        self.overlaps = 0
+
+    def cursor(self):
+        return SharedCursor(self)
+
+
+class SharedCursor(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+        connection.active += 1
+        if connection.active > 1:
+            connection.overlaps += 1
+
+    def execute(self, query, args=()):
+        time.sleep(0.01)
+
+    def fetchall(self):
+        return [{'shot': 204620, 'rundate': 20161006}]
+
+    def close(self):
+        self.connection.active -= 1
+
+
+class ServerLogbook(Logbook):
+    # logbook with a shared connection and no mirror
+
+    def __init__(self):
+        self._name = 'nstxu'
+        self._mirror = None
+        self._cursor_lock = threading.RLock()
+        self._logbook_connection = SharedConnection()
+        self._shot_query_prefix = self._shotlist_query_prefix = 'SELECT'
+        self.logbook = {}
+
+
+class TestLogbook(unittest.TestCase):
+
+    def testShotQuery(self):
+        """
+        Assert shots without entries are cached as empty
+        """
+        logbook = QueryLogbook([{'shot': 204620, 'rundate': 20161006}])
+        logbook._shot_query(shot=[204620, 204621])
+        self.assertEqual(sorted(logbook.logbook.keys()), [204620, 204621])
+        self.assertEqual(logbook.logbook[204621], [])
+        self.assertEqual(logbook.logbook[204620][0]['rundate'].day, 6)
+
+    def testFailedQuery(self):
+        """
+        Assert shots are not cached when the query fails
+        """
+        logbook = QueryLogbook(IOError('network down'))
+        with self.assertRaises(IOError):
+            logbook._shot_query(shot=[204620, 204621])
+        self.assertEqual(logbook.logbook, {})
+        logbook.rows = [{'shot': 204620, 'rundate': 20161006}]
+        logbook._shot_query(shot=[204620, 204621])
+        self.assertEqual(len(logbook.logbook[204620]), 1)
+
+    def testSharedConnection(self):
+        """
+        Assert queries from several threads do not share the connection
+        at the same time
+        """
+        logbook = ServerLogbook()
+        threads = [threading.Thread(target=logbook._query_entries,
+                                    args=([204620, 204621],))
+                   for _ in range(3)]
+        threads += [threading.Thread(target=logbook.get_shotlist,
+                                     kwargs={'date': [20161006]})
+                    for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(logbook._logbook_connection.active, 0)
+        self.assertEqual(logbook._logbook_connection.overlaps, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
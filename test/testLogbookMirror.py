@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:31:08 2026
+
+@author: ktritz
+"""
+
+import shutil
+import os
+import datetime
+import tempfile
+import unittest
+from fdp.classes.logbookmirror import LogbookMirror
+
+print('running tests in {}'.format(__file__))
+
+
+class ServerCursor(object):
+    # cursor on a list of server rows, for the mirror sync query
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._result = []
+
+    def execute(self, query, params=None):
+        if params is None:
+            # voided keys
+            self._result = [{'dbkey': row['dbkey'], 'voided': row['voided']}
+                            for row in self._rows
+                            if row['voided'] is not None]
+            return
+        maxdbkey, entered = params
+        self._result = [dict(row) for row in self._rows
+                        if row['dbkey'] > maxdbkey or row['entered'] > entered]
+
+    def fetchall(self):
+        rows, self._result = self._result, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._result = self._result[:size], self._result[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class ServerLogbook(object):
+    _table = 'entries'
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def _get_cursor(self, rowcount=0):
+        return ServerCursor(self.rows)
+
+
+class TestLogbookMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        entered = datetime.datetime(2016, 10, 6, 12)
+        self.server = ServerLogbook(
+            [{'dbkey': i, 'username': 'user', 'rundate': 20161006,
+              'shot': 204620 + i // 2, 'xp': 1032 + i // 4, 'topic': '',
+              'text': 'entry {}'.format(i), 'voided': None,
+              'entered': entered + datetime.timedelta(minutes=i)}
+             for i in range(8)])
+        self.mirror = LogbookMirror('nstxu', os.path.join(self.directory,
+                                                          'nstxu.sqlite'))
+
+    def tearDown(self):
+        self.mirror._db.close()
+        shutil.rmtree(self.directory)
+
+    def testSync(self):
+        """
+        Assert sync copies all entries, then new entries and voided flags
+        """
+        self.assertEqual(self.mirror.sync(self.server), 8)
+        self.assertEqual(self.mirror.sync(self.server), 0)
+        # voiding changes neither dbkey nor entered
+        self.server.rows[0] = dict(self.server.rows[0], voided=1)
+        self.server.rows.append(dict(self.server.rows[7], dbkey=8,
+                                     shot=204624, xp=1034))
+        self.assertEqual(self.mirror.sync(self.server), 2)
+        self.assertEqual(self.mirror.count(), 9)
+        self.assertEqual(self.mirror.maxshot, 204624)
+        entries = self.mirror.entries([204620, 204621])
+        self.assertEqual([entry['dbkey'] for entry in entries], [1, 2, 3])
+        self.assertIsInstance(entries[0]['entered'], datetime.datetime)
+        shots = [row['shot'] for row in self.mirror.shotlist(xp=[1033])]
+        self.assertEqual(sorted(shots), [204622, 204623])
+        # edits in place are copied by a full sync
+        self.server.rows[1] = dict(self.server.rows[1], text='edited')
+        self.mirror.sync(self.server, full=True)
+        self.assertEqual(self.mirror.entries([204620])[0]['text'], 'edited')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:40:27 2026
+
+@author: ktritz
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from fdp.classes import moduletree
+
+print('running tests in {}'.format(__file__))
+
+
+class TestModuleTree(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testCompile(self):
+        """
+        Assert module trees are compiled with expanded ranges and cached
+        """
+        trees = moduletree.compile_modules('nstxu', self.directory)
+        self.assertIn('bes', trees)
+        bes = trees['bes']
+        self.assertTrue(bes.xml)
+        signals = bes.findall('signal')
+        self.assertEqual(len(signals[0].channels), 32)
+        self.assertEqual(signals[0].channels[0][0], 'ch01')
+        self.assertEqual(signals[1].channels[0][0], 'ch33')
+        self.assertEqual(signals[1].channels[0][3], '01')
+        cache_file = moduletree._cache_file('nstxu', self.directory)
+        self.assertTrue(os.path.isfile(cache_file))
+        cached = moduletree.compile_modules('nstxu', self.directory)
+        self.assertEqual(sorted(cached.keys()), sorted(trees.keys()))
+        self.assertEqual(cached['bes'].findall('signal')[1].channels,
+                         signals[1].channels)
+
+
+if __name__ == '__main__':
+    unittest.main()
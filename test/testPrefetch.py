@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:37 2026
+
+@author: ktritz
+"""
+
+import time
+import unittest
+import warnings
+from concurrent import futures
+from fdp.classes import prefetch
+from fdp.classes.loader import FetchSet
+from fdp.classes.fdp_globals import FdpError, FdpTimeout
+
+print('running tests in {}'.format(__file__))
+
+
+class EventContainer(object):
+
+    def __init__(self, shot):
+        self.shot = shot
+
+    def multifft(self, **kwargs):
+        return ('multifft', self.shot, kwargs)
+
+
+class EventShot(object):
+
+    def __init__(self, shot):
+        self.shot = shot
+        self.bes = EventContainer(shot)
+
+
+class EventMachine(object):
+    # machine with scripted event waits, each event is a shot number,
+    # an exception to raise, or None for a timeout
+
+    def __init__(self, events, name='nstxu', cache=True):
+        self._name = name
+        self._cache = {} if cache else None
+        self._shots = {}
+        self.events = list(events)
+        self.connections = []
+
+    def _wait_shot(self, connection, event=None, timeout=0):
+        self.connections.append(connection)
+        time.sleep(0.01)
+        if not self.events or self.events[0] is None:
+            if self.events:
+                self.events.pop(0)
+            raise FdpTimeout('Timeout after {}s in wfevent'.format(timeout))
+        event = self.events.pop(0)
+        if isinstance(event, Exception):
+            raise event
+        return event
+
+    def fetch(self, shots, signals, workers=4):
+        future = futures.Future()
+        future.set_result([getattr(self, 's{}'.format(shot))
+                           for shot in shots])
+        return FetchSet([future], [len(shots)])
+
+    def __getattr__(self, name):
+        shot = int(name[1:])
+        if shot not in self._shots:
+            self._shots[shot] = EventShot(shot)
+        return self._shots[shot]
+
+
+class EventDaemon(prefetch.PrefetchDaemon):
+
+    def _connect(self):
+        self.nconnects = getattr(self, 'nconnects', 0) + 1
+        return self.nconnects
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.interval = prefetch.RECONNECT_INTERVAL
+        prefetch.RECONNECT_INTERVAL = 0.01
+
+    def tearDown(self):
+        prefetch.RECONNECT_INTERVAL = self.interval
+
+    def testPrefetch(self):
+        """
+        Assert new shots are prefetched after timeouts and a dropped
+        connection, and stay in the machine until released
+        """
+        machine = EventMachine([None, 204620, IOError('connection lost'),
+                                None, 204621])
+        machine.s204000
+        daemon = EventDaemon(machine, 'bes.*', spectra={'bes': {'tmax': 1}})
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            daemon.start()
+            t0 = time.time()
+            while len(daemon.shots) < 2 and time.time() - t0 < 10:
+                time.sleep(0.01)
+            daemon.stop()
+        self.assertFalse(daemon.is_alive())
+        self.assertEqual(list(daemon.shots.keys()), [204620, 204621])
+        self.assertEqual(daemon.spectra(204621)['bes'],
+                         ('multifft', 204621, {'tmax': 1}))
+        self.assertEqual(daemon.shots[204620]['signals'], 1)
+        self.assertEqual(sorted(machine._shots.keys()),
+                         [204000, 204620, 204621])
+        shotobj = machine._shots[204620]
+        daemon.prefetch(204000)
+        daemon.release(204000)
+        daemon.release(204620)
+        self.assertEqual(sorted(machine._shots.keys()), [204000, 204621])
+        self.assertEqual(list(daemon.shots.keys()), [204621])
+        # released shots are used again from the cache
+        self.assertIsNot(machine.s204620, shotobj)
+        with self.assertRaises(FdpError):
+            daemon.release(204620)
+        self.assertEqual(daemon.nconnects, 2)
+        self.assertEqual(machine.connections[:3], [1, 1, 1])
+        self.assertEqual(machine.connections[3], 2)
+        self.assertEqual(len(caught), 1)
+        self.assertIn('connection lost', str(caught[0].message))
+
+    def testNoShotEvent(self):
+        """
+        Assert a machine without a shot event fails when created
+        """
+        with self.assertRaises(FdpError):
+            EventDaemon(EventMachine([], name='d3d'), 'bes.*')
+
+    def testNoCache(self):
+        """
+        Assert a machine without a signal cache fails when created
+        """
+        with self.assertRaises(FdpError):
+            EventDaemon(EventMachine([], cache=False), 'bes.*')
+
+
+if __name__ == '__main__':
+    unittest.main()
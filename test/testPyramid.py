@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:31:15 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+from fdp.classes.pyramid import MinMaxPyramid
+
+print('running tests in {}'.format(__file__))
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.cumsum(np.random.randn(500000))
+        self.pyramid = MinMaxPyramid(self.data)
+
+    def testEnvelope(self):
+        """
+        Assert envelopes keep extrema with a bounded number of points
+        """
+        for start, stop in [(0, 500000), (1234, 345678), (400000, 500000)]:
+            indices, values = self.pyramid.envelope(start, stop, 500)
+            self.assertTrue(np.array_equal(self.data[indices], values))
+            self.assertTrue(np.all(np.diff(indices) >= 0))
+            self.assertLess(indices.size, 2 * 4 * 500 + 4)
+            inside = (indices >= start) & (indices < stop)
+            self.assertLessEqual(values.min(), self.data[start:stop].min())
+            self.assertGreaterEqual(values.max(),
+                                    self.data[start:stop].max())
+            self.assertTrue(inside[2:-2].all())
+
+    def testChunks(self):
+        """
+        Assert pyramids built from chunks match pyramids built from arrays
+        """
+        pyramid = MinMaxPyramid(chunks=[self.data[:2**16],
+                                        self.data[2**16:]])
+        self.assertEqual(pyramid.size, self.data.size)
+        for level, chunked in zip(self.pyramid.levels, pyramid.levels):
+            for array, chunkedarray in zip(level, chunked):
+                self.assertTrue(np.array_equal(array, chunkedarray))
+
+
+if __name__ == '__main__':
+    unittest.main()
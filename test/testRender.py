@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:48:05 2026
+
+@author: ktritz
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from fdp.classes.local import open_local, h5py, FORMAT_VERSION
+from fdp.classes.render import OverviewRenderer
+
+print('running tests in {}'.format(__file__))
+
+SHOTS = [204620, 204621, 204622]
+
+
+class BatchRenderer(OverviewRenderer):
+    # renderer recording the shots of each fetch
+
+    def fetch(self, shots):
+        self.batches = getattr(self, 'batches', []) + [list(shots)]
+        super(BatchRenderer, self).fetch(shots)
+
+
+@unittest.skipIf(h5py is None, 'requires h5py')
+class TestOverviewRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        empty = os.path.join(self.directory, 'empty.h5')
+        with h5py.File(empty, 'w') as h5file:
+            h5file.attrs['machine'] = 'nstxu'
+            h5file.attrs['format'] = FORMAT_VERSION
+        machine = open_local(empty)
+        self.bundle = os.path.join(self.directory, 'shots.h5')
+        time = np.arange(100000) * 5e-7
+        for shot in SHOTS:
+            shotobj = getattr(machine, 's{}'.format(shot))
+            for channel in [shotobj.bes.ch01, shotobj.bes.ch02]:
+                channel._set_data(np.cumsum(np.random.randn(time.size)))
+                channel.time._set_data(time)
+            shotobj.export(self.bundle, compression=None)
+        machine._h5file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRender(self):
+        """
+        Assert one figure per shot is rendered in batches, and rendered
+        shots keep no pyramids
+        """
+        machine = open_local(self.bundle)
+        # a shot not in the machine is dropped after rendering
+        machine._shots.pop(SHOTS[-1])
+        path = os.path.join(self.directory, 'overviews')
+        renderer = BatchRenderer(machine, ['bes.ch0[12]'], path=path,
+                                 batchsize=2, processes=0)
+        timings = renderer.render(SHOTS)
+        self.assertEqual(renderer.batches, [SHOTS[:2], SHOTS[2:]])
+        self.assertEqual([timing['panels'] for timing in timings], [2, 2, 2])
+        for shot in SHOTS:
+            self.assertTrue(os.path.isfile(os.path.join(
+                path, '{}.png'.format(shot))))
+        self.assertEqual(sorted(machine._shots.keys()), SHOTS[:2])
+        for shot in SHOTS[:2]:
+            bes = machine._shots[shot].bes
+            for channel in [bes.ch01, bes.ch02]:
+                self.assertNotIn('_pyramid', channel.__dict__)
+        machine._h5file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:17 2026
+
+@author: ktritz
+"""
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from fdp.classes.cache import SignalCache
+
+print('running tests in {}'.format(__file__))
+
+
+class TestSignalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SignalCache('nstxu', directory=self.directory,
+                                 size=3*8200)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testHitMiss(self):
+        """
+        Assert cached arrays round-trip and hits/misses are counted
+        """
+        data = np.arange(1000, dtype=np.float64)
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', data)
+        cached = self.cache.get('a')
+        self.assertTrue(np.array_equal(cached, data))
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def testEviction(self):
+        """
+        Assert least-recently-used arrays are evicted above the size cap
+        """
+        data = np.zeros(1000)
+        for key in ['a', 'b', 'c']:
+            self.cache.put(key, data)
+        self.cache.get('a')
+        self.cache.put('d', data)
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertGreater(self.cache.stats()['evictions'], 0)
+
+    def testReopen(self):
+        """
+        Assert cache index is rebuilt from disk
+        """
+        self.cache.put('a', np.ones(10))
+        cache = SignalCache('nstxu', directory=self.directory)
+        self.assertTrue(np.array_equal(cache.get('a'), np.ones(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:48:02 2026
+
+@author: ktritz
+"""
+
+import unittest
+import numpy as np
+from scipy.signal import csd, welch
+from fdp.classes.welch import WelchEstimator
+
+print('running tests in {}'.format(__file__))
+
+
+class FakeSignal(np.ndarray):
+    # minimal signal-like array for WelchEstimator
+    pass
+
+
+def make_signal(data, fs=2e6):
+    signal = np.asarray(data).view(FakeSignal)
+    signal._name = 'ch01'
+    signal.shot = 0
+    signal.time = np.arange(signal.size) / fs
+    return signal
+
+
+class TestWelchEstimator(unittest.TestCase):
+
+    def setUp(self):
+        common = np.random.randn(50000)
+        self.data = np.array([common + np.random.randn(50000)
+                              for i in range(3)])
+
+    def testChunks(self):
+        """
+        Assert estimates from uneven chunks match scipy csd and welch
+        """
+        estimator = WelchEstimator(nperseg=256, fs=2e6)
+        for start, stop in [(0, 100), (100, 7000), (7000, 7001),
+                            (7001, 50000)]:
+            estimator.update(self.data[:, start:stop])
+        _, pxy = csd(self.data[0], self.data[2], fs=2e6, nperseg=256,
+                     detrend=False)
+        _, pxx = welch(self.data[1], fs=2e6, nperseg=256, detrend=False)
+        self.assertEqual(estimator.nsegments, (50000 - 256) // 128 + 1)
+        self.assertTrue(np.allclose(estimator.csd[:, 0, 2], pxy))
+        self.assertTrue(np.allclose(estimator.asd[:, 1], pxx))
+
+    def testRecords(self):
+        """
+        Assert segments do not span records added from signals
+        """
+        estimator = WelchEstimator(nperseg=256)
+        for i in range(2):
+            signals = [make_signal(row) for row in self.data]
+            estimator.add_signals(signals, tmin=0.0, tmax=0.01,
+                                  chunksize=3000)
+        self.assertAlmostEqual(estimator.fSample, 2e6, places=3)
+        self.assertEqual(estimator.nsegments, 2 * ((20001 - 256) // 128 + 1))
+        self.assertTrue(np.allclose(estimator.coherence[:, 1, 1], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()